@@ -52,28 +52,20 @@ export default function Dashboard() {
                 const sinceStr = thirtyDaysAgo.toISOString().split('T')[0];
                 const untilStr = new Date().toISOString().split('T')[0];
 
-                // Fetch Insights
-                const insightsRes = await axios.get(`/api/dashboard/instagram/insights/?since=${sinceStr}&until=${untilStr}`, {
-                    headers: { Authorization: `Bearer ${token}` }
-                });
-
-                // Fetch Profile
-                const profileRes = await axios.get('/api/dashboard/instagram/profile/', {
-                    headers: { Authorization: `Bearer ${token}` }
-                });
-                setProfile(profileRes.data.profile);
-
-                // Fetch Posts
-                const postsRes = await axios.get('/api/dashboard/instagram/posts/', {
+                // Profile, posts and insights in one round trip; a section
+                // that failed or timed out on the server comes back as null.
+                const overviewRes = await axios.get(`/api/dashboard/overview/?since=${sinceStr}&until=${untilStr}`, {
                     headers: { Authorization: `Bearer ${token}` }
                 });
+                const overview = overviewRes.data;
+                setProfile(overview.profile);
                 
-                const allFetchedPosts = postsRes.data.posts || [];
+                const allFetchedPosts = overview.posts || [];
                 setAllPosts(allFetchedPosts);
                 setRecentPosts(allFetchedPosts.slice(0, 3));
 
                 // Process Stats
-                const rawInsights = insightsRes.data.insights || [];
+                const rawInsights = overview.insights || [];
                 const metrics = {};
                 rawInsights.forEach((item) => {
                     const key = Object.keys(item)[0];
@@ -89,7 +81,7 @@ export default function Dashboard() {
                     metrics[key] = vals;
                 });
 
-                const profileData = profileRes.data.profile;
+                const profileData = overview.profile;
 
                 // Help function to get latest/summed values from insights
                 const latestVal = (key) => {
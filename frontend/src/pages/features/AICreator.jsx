@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { useSelector } from "react-redux";
 import { Wand2, Image as ImageIcon, Copy, RefreshCw, Download, Send, Calendar as CalendarIcon } from "lucide-react";
 import { Button } from "@/components/ui/button";
@@ -12,6 +12,20 @@ import { format } from "date-fns";
 import { cn } from "@/lib/utils";
 import axios from "axios";
 
+// Remembers the running generation job so a reload picks it up instead of
+// starting a new one.
+const GENERATION_JOB_KEY = "aiCreator.generationJobId";
+
+// Give up following a generation job after this many polls (2s apart, 10 minutes).
+const GENERATION_POLL_ATTEMPTS = 300;
+
+const GENERATION_STAGES = {
+    queued: "Waiting for a worker...",
+    expanded: "Prompt expanded, generating image...",
+    image: "Image ready, writing caption...",
+    caption: "Caption ready, saving...",
+};
+
 
 export default function AICreator() {
 
@@ -19,6 +33,7 @@ export default function AICreator() {
     const token = useSelector((state) => state.auth.token);
     const [prompt, setPrompt] = useState("");
     const [isGenerating, setIsGenerating] = useState(false);
+    const [generationStage, setGenerationStage] = useState("queued");
     const [generatedImages, setGeneratedImages] = useState([]);
     const [caption, setCaption] = useState("This is a caption");
     const [date, setDate] = useState();
@@ -27,21 +42,64 @@ export default function AICreator() {
     const [isScheduling, setIsScheduling] = useState(false);
     const [isPosting, setIsPosting] = useState(false);
 
+    const followGenerationJob = async (jobId) => {
+        // Generation runs in a background worker; poll until the job is stored or failed.
+        setIsGenerating(true);
+        setError(null);
+        try {
+            let finished = false;
+            for (let attempt = 0; attempt < GENERATION_POLL_ATTEMPTS && !finished; attempt++) {
+                const res = await axios.get(`/api/dashboard/generation_jobs/${jobId}/`, {
+                    headers: { Authorization: `Bearer ${token}` }
+                });
+                const job = res.data;
+                setGenerationStage(job.status);
+                if (job.image_url) {
+                    // wrap in array for existing UI logic
+                    setGeneratedImages([job.image_url]);
+                }
+                if (job.status === "stored") {
+                    if (job.caption) setCaption(job.caption);
+                    finished = true;
+                } else if (job.status === "failed") {
+                    setError(`Failed to generate content: ${job.error}`);
+                    finished = true;
+                } else {
+                    await new Promise((resolve) => setTimeout(resolve, 2000));
+                }
+            }
+            if (!finished) {
+                setError("Generation is taking longer than expected. Please try again.");
+            }
+            localStorage.removeItem(GENERATION_JOB_KEY);
+        } catch (err) {
+            console.error(err);
+            if (err.response?.status === 404) localStorage.removeItem(GENERATION_JOB_KEY);
+            setError("Failed to generate content");
+        } finally {
+            setIsGenerating(false);
+        }
+    };
+
+    useEffect(() => {
+        const jobId = localStorage.getItem(GENERATION_JOB_KEY);
+        if (jobId && token) followGenerationJob(jobId);
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [token]);
+
     const handleGenerate = async () => {
         setIsGenerating(true);
+        setGenerationStage("queued");
         setError(null);
         try {
             const res = await axios.post('/api/dashboard/generate_post/', { prompt }, {
                 headers: { Authorization: `Bearer ${token}` }
             });
-            // API returns image_url, wrap in array for existing UI logic
-            setGeneratedImages([res.data.image_url]);
-            setCaption(res.data.caption);
-            console.log(res.data.image_url)
+            localStorage.setItem(GENERATION_JOB_KEY, res.data.job_id);
+            await followGenerationJob(res.data.job_id);
         } catch (err) {
             console.error(err);
             setError("Failed to generate content");
-        } finally {
             setIsGenerating(false);
         }
     };
@@ -61,6 +119,20 @@ export default function AICreator() {
         }
     };
 
+    const waitForPublishJob = async (jobId) => {
+        // Publishing runs in a background worker; poll until it settles.
+        for (let attempt = 0; attempt < 90; attempt++) {
+            const res = await axios.get(`/api/dashboard/publish_jobs/${jobId}/`, {
+                headers: { Authorization: `Bearer ${token}` }
+            });
+            if (res.data.status === "published" || res.data.status === "failed") {
+                return res.data;
+            }
+            await new Promise((resolve) => setTimeout(resolve, 2000));
+        }
+        return null;
+    };
+
     const handlePostNow = async () => {
         if (!caption) {
             alert("Please generate a caption first.");
@@ -80,8 +152,15 @@ export default function AICreator() {
                 },
             });
 
-            if (res.status === 200) {
-                alert("Posted successfully!");
+            if (res.status === 202) {
+                const job = await waitForPublishJob(res.data.job_id);
+                if (!job) {
+                    alert("Your post is still being processed by Instagram. It will appear shortly.");
+                } else if (job.status === "published") {
+                    alert("Posted successfully!");
+                } else {
+                    alert(`Failed to post content: ${job.error}`);
+                }
             }
         } catch (err) {
             console.error(err);
@@ -128,7 +207,7 @@ export default function AICreator() {
                 },
             });
 
-            if (res.status === 200) {
+            if (res.status === 202) {
                 alert(`Post scheduled successfully for ${format(date, "PPP")} at ${time}`);
                 setDate(undefined);
             }
@@ -174,7 +253,7 @@ export default function AICreator() {
                                 {isGenerating ? (
                                     <>
                                         <RefreshCw className="mr-2 h-4 w-4 animate-spin" />
-                                        Generating...
+                                        {GENERATION_STAGES[generationStage] || "Generating..."}
                                     </>
                                 ) : (
                                     <>
@@ -48,14 +48,13 @@ export default function Analytics() {
                 const since = thirtyDaysAgo.toISOString().split('T')[0];
                 const until = new Date().toISOString().split('T')[0];
 
-                const [insightRes, postsRes, profileRes] = await Promise.all([
-                    axios.get(`/api/dashboard/instagram/insights/?since=${since}&until=${until}`, { headers: { Authorization: `Bearer ${token}` } }),
-                    axios.get('/api/dashboard/instagram/posts/', { headers: { Authorization: `Bearer ${token}` } }),
-                    axios.get('/api/dashboard/instagram/profile/', { headers: { Authorization: `Bearer ${token}` } }),
-                ]);
+                const { data: overview } = await axios.get(
+                    `/api/dashboard/overview/?since=${since}&until=${until}`,
+                    { headers: { Authorization: `Bearer ${token}` } },
+                );
 
                 // Parse insights into a usable dict
-                const rawInsights = insightRes.data.insights || [];
+                const rawInsights = overview.insights || [];
                 const parsed = {};
                 rawInsights.forEach((item) => {
                     const key = Object.keys(item)[0];
@@ -74,10 +73,10 @@ export default function Analytics() {
                     parsed[key] = vals;
                 });
                 setInsights(parsed);
-                setPosts(postsRes.data.posts || []);
+                setPosts(overview.posts || []);
 
                 // Profile has real-time counts
-                setProfile(profileRes.data.profile || null);
+                setProfile(overview.profile || null);
 
             } catch (err) {
                 console.error(err);
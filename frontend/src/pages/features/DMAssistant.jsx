@@ -1,5 +1,5 @@
 import { useState, useEffect, useRef } from "react";
-import { useSelector } from "react-redux";
+import { useDispatch, useSelector } from "react-redux";
 import axios from "axios";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Avatar, AvatarFallback, AvatarImage } from "@/components/ui/avatar";
@@ -7,9 +7,11 @@ import { Input } from "@/components/ui/input";
 import { Button } from "@/components/ui/button";
 import { Send, Loader2, MessageSquare, Search, RefreshCw } from "lucide-react";
 import { Badge } from "@/components/ui/badge";
+import { logout } from "@/redux/authSlice";
 
 export default function DMAssistant() {
     const token = useSelector((state) => state.auth.token);
+    const dispatch = useDispatch();
     const [threads, setThreads] = useState([]);
     const [selectedThread, setSelectedThread] = useState(null);
     const [messages, setMessages] = useState([]);
@@ -42,14 +44,45 @@ export default function DMAssistant() {
         }
     };
 
+    // Threads arrive as NDJSON, one page per line, so the list renders
+    // while later pages are still being fetched.
     const fetchThreads = async () => {
         if (!token) return;
         try {
             setLoading(true);
-            const res = await axios.get('/api/dashboard/instagram/conversations/', {
+            const res = await fetch('/api/dashboard/instagram/conversations/?stream=true', {
                 headers: { Authorization: `Bearer ${token}` }
             });
-            setThreads(res.data.conversations || []);
+            if (res.status === 401) {
+                dispatch(logout());
+                return;
+            }
+            if (!res.ok) throw new Error(`Failed to fetch threads: ${res.status}`);
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            let received = [];
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                const lines = buffer.split("\n");
+                buffer = lines.pop();
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const chunk = JSON.parse(line);
+                    if (chunk.error) console.error("Error fetching threads:", chunk.error);
+                    if (chunk.conversations) {
+                        received = [...received, ...chunk.conversations];
+                        setThreads(received);
+                        setLoading(false);
+                    }
+                }
+            }
+            setThreads(received);
         } catch (err) {
             console.error("Error fetching threads:", err);
         } finally {
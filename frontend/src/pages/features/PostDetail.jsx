@@ -86,8 +86,9 @@ export default function PostDetail() {
         setCommentSentiments({});
 
         try {
-            // Take up to 20 comments for analysis to avoid overloading API in MVP
-            const commentsToAnalyze = comments.slice(0, 20);
+            // Scored comments are free; cap only the ones that still need the API
+            const unscored = comments.filter(c => !c.sentiment).slice(0, 20);
+            const commentsToAnalyze = [...comments.filter(c => c.sentiment), ...unscored];
             const results = {
                 POSITIVE: 0,
                 NEGATIVE: 0,
@@ -96,9 +97,17 @@ export default function PostDetail() {
 
             const individualResults = {};
 
-            // Call API for each comment
+            // Comments come back already scored; only unscored ones need the API
             const promises = commentsToAnalyze.map(async (comment) => {
                 if (!comment.text) return;
+                if (comment.sentiment) {
+                    const upperScore = comment.sentiment.toUpperCase();
+                    individualResults[comment.id] = upperScore;
+                    if (results[upperScore] !== undefined) {
+                        results[upperScore]++;
+                    }
+                    return;
+                }
                 try {
                     const res = await axios.post('/api/dashboard/sentiment_analysis/', 
                         { text: comment.text },
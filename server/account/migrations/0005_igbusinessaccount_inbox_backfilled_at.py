@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_igbusinessaccount_username'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='igbusinessaccount',
+            name='inbox_backfilled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_igbusinessaccount_inbox_backfilled_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='igbusinessaccount',
+            name='media_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='igbusinessaccount',
+            name='media_reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
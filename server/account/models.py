@@ -33,6 +33,12 @@ class IGBusinessAccount(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     auto_reply_enabled = models.BooleanField(default=False)
+    # Set once the DM inbox has been copied into dashboard.Conversation/Message.
+    inbox_backfilled_at = models.DateTimeField(blank=True, null=True)
+    # Last media sync into dashboard.InstagramMedia, and last one that walked the
+    # whole media list (so the mirror is complete and deleted media was dropped).
+    media_synced_at = models.DateTimeField(blank=True, null=True)
+    media_reconciled_at = models.DateTimeField(blank=True, null=True)
 
     def __str__(self):
         return f"{self.name} - ({self.custom_user.user.username})"
\ No newline at end of file
@@ -0,0 +1,106 @@
+from django.conf import settings
+
+from account.models import IGBusinessAccount
+from server.utils.graph_cache import LRUCache
+
+
+# Query parameter used to pick one of several connected business accounts
+# (the `id` returned by the business account API).
+BUSINESS_ACCOUNT_PARAM = 'business_account'
+
+# Optional per-process cache of a user's accounts, off unless
+# BUSINESS_ACCOUNT_CACHE_TTL is set. Edits made through the account API drop
+# the entry in the process that made them; other processes see the change
+# once the TTL runs out.
+_process_cache = LRUCache(maxsize=4096)
+
+
+def _load_business_accounts(user_id: int) -> list[IGBusinessAccount]:
+    ttl = getattr(settings, 'BUSINESS_ACCOUNT_CACHE_TTL', 0)
+    if ttl:
+        accounts = _process_cache.get(user_id)
+        if isinstance(accounts, list):
+            return accounts
+
+    # user -> customuser -> business account -> token in one joined query.
+    accounts = list(
+        IGBusinessAccount.objects
+        .select_related('access_token', 'custom_user__user')
+        .filter(custom_user__user_id=user_id)
+        .order_by('created_at', 'id')
+    )
+
+    if ttl:
+        _process_cache.set(user_id, accounts, ttl)
+    return accounts
+
+
+async def _aload_business_accounts(user_id: int) -> list[IGBusinessAccount]:
+    ttl = getattr(settings, 'BUSINESS_ACCOUNT_CACHE_TTL', 0)
+    if ttl:
+        accounts = _process_cache.get(user_id)
+        if isinstance(accounts, list):
+            return accounts
+
+    accounts = [
+        account async for account in
+        IGBusinessAccount.objects
+        .select_related('access_token', 'custom_user__user')
+        .filter(custom_user__user_id=user_id)
+        .order_by('created_at', 'id')
+    ]
+
+    if ttl:
+        _process_cache.set(user_id, accounts, ttl)
+    return accounts
+
+
+def get_business_accounts(request) -> list[IGBusinessAccount]:
+    """All business accounts of the authenticated user, loaded once per request."""
+    accounts = getattr(request, '_business_accounts', None)
+    if accounts is None:
+        accounts = _load_business_accounts(request.user.pk)
+        request._business_accounts = accounts
+    return accounts
+
+
+def resolve_business_account(request) -> IGBusinessAccount:
+    """
+    The business account a dashboard request acts on, with its access token
+    and owner already loaded.
+
+    Users with several connected accounts pick one with the
+    `?business_account=<id>` query parameter; without it the first connected
+    account is used. Raises IGBusinessAccount.DoesNotExist if the user has no
+    (matching) account.
+    """
+    return _select_business_account(request, get_business_accounts(request))
+
+
+async def aget_business_accounts(request) -> list[IGBusinessAccount]:
+    """Async variant of `get_business_accounts`."""
+    accounts = getattr(request, '_business_accounts', None)
+    if accounts is None:
+        accounts = await _aload_business_accounts(request.user.pk)
+        request._business_accounts = accounts
+    return accounts
+
+
+async def aresolve_business_account(request) -> IGBusinessAccount:
+    """Async variant of `resolve_business_account`, using the async ORM."""
+    return _select_business_account(request, await aget_business_accounts(request))
+
+
+def _select_business_account(request, accounts: list[IGBusinessAccount]) -> IGBusinessAccount:
+    selected = request.query_params.get(BUSINESS_ACCOUNT_PARAM)
+    if selected:
+        accounts = [a for a in accounts if str(a.pk) == str(selected)]
+
+    if not accounts:
+        raise IGBusinessAccount.DoesNotExist('Instagram Business Account not found.')
+    return accounts[0]
+
+
+def invalidate_business_accounts(user_id: int) -> None:
+    """Drop this process's cached accounts for a user after they change."""
+    _process_cache.delete(user_id)
@@ -1,3 +1,81 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
-# Create your tests here.
+from account import resolver
+from account.models import CustomUser, IGAccessToken, IGBusinessAccount
+
+
+def connect_account(custom_user, business_account_id):
+    token = IGAccessToken.objects.create(
+        custom_user=custom_user, access_token=f'tok-{business_account_id}', expires_at=timezone.now(),
+    )
+    return IGBusinessAccount.objects.create(
+        custom_user=custom_user, business_account_id=business_account_id, access_token=token, name=business_account_id,
+    )
+
+
+class ResolveBusinessAccountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner')
+        custom_user = CustomUser.objects.create(user=cls.user)
+        cls.first = connect_account(custom_user, 'first')
+        cls.second = connect_account(custom_user, 'second')
+        cls.foreign = connect_account(CustomUser.objects.create(user=User.objects.create_user('other')), 'foreign')
+
+    def setUp(self):
+        resolver._process_cache.clear()
+
+    def request(self, user=None, **params):
+        request = Request(APIRequestFactory().get('/dashboard/', params))
+        request.user = user or self.user
+        return request
+
+    def test_first_connected_account_is_used_by_default(self):
+        request = self.request()
+
+        with self.assertNumQueries(1):
+            account = resolver.resolve_business_account(request)
+            # Token and owner come with the account.
+            self.assertEqual(account.access_token.access_token, 'tok-first')
+            self.assertEqual(account.custom_user.user, self.user)
+        with self.assertNumQueries(0):
+            resolver.resolve_business_account(request)
+        self.assertEqual(account, self.first)
+
+    def test_account_is_picked_by_query_parameter(self):
+        request = self.request(business_account=self.second.pk)
+
+        self.assertEqual(resolver.resolve_business_account(request), self.second)
+        self.assertEqual(resolver.get_business_accounts(request), [self.first, self.second])
+
+    def test_other_users_account_is_not_found(self):
+        with self.assertRaises(IGBusinessAccount.DoesNotExist):
+            resolver.resolve_business_account(self.request(business_account=self.foreign.pk))
+
+    def test_user_without_accounts(self):
+        with self.assertRaises(IGBusinessAccount.DoesNotExist):
+            resolver.resolve_business_account(self.request(user=User.objects.create_user('new')))
+
+    async def test_async_resolver_matches(self):
+        request = self.request(business_account=self.second.pk)
+
+        account = await resolver.aresolve_business_account(request)
+
+        self.assertEqual(account, self.second)
+        self.assertEqual(account.access_token.access_token, 'tok-second')
+
+    @override_settings(BUSINESS_ACCOUNT_CACHE_TTL=60)
+    def test_cached_accounts_are_dropped_on_invalidate(self):
+        resolver.resolve_business_account(self.request())
+        with self.assertNumQueries(0):
+            resolver.resolve_business_account(self.request())
+
+        resolver.invalidate_business_accounts(self.user.pk)
+
+        with self.assertNumQueries(1):
+            resolver.resolve_business_account(self.request())
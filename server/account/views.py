@@ -15,6 +15,8 @@ from account.models import IGBusinessAccount, CustomUser, IGAccessToken
 from account.serializer import IGBusinessAccountSerializer
 from server.utils.logger import logger
 from server.utils.instagram_api import fetch_long_lived_token, fetch_business_account
+from server.utils.graph_cache import invalidate_account
+from account.resolver import invalidate_business_accounts
 from server.utils.rag_pipeline import BusinessRAGPipeline
 from rest_framework.views import APIView
 from account.serializer import UserProfileSerializer, ChangePasswordSerializer
@@ -104,6 +106,7 @@ def insta_webhook_login(request):
             access_token=access_token,
             defaults={'expires_at': timezone.now() + timedelta(days=60)}
         )
+        invalidate_business_accounts(custom_user.user_id)
         logger.info(f"Instagram webhook login successful for user: {custom_user.user.username}")
         return Response({'message': 'Instagram webhook login successful'}, status=200)
 
@@ -157,7 +160,9 @@ class IGBusinessAccountViewSet(viewsets.ModelViewSet):
                 request.data['business_account_id'] = business_account_id
                 request.data['username'] = business_account_username
 
-            return super().create(request, *args, **kwargs)
+            response = super().create(request, *args, **kwargs)
+            invalidate_business_accounts(request.user.pk)
+            return response
         except Exception as e:
             logger.error(f"Error while creating IG Business Account: {str(e)}")
             raise
@@ -165,7 +170,11 @@ class IGBusinessAccountViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         """Standard DRF update using serializer update logic."""
         try:
-            return super().update(request, *args, **kwargs)
+            instance = self.get_object()
+            invalidate_account(instance.access_token.access_token, instance.business_account_id)
+            response = super().update(request, *args, **kwargs)
+            invalidate_business_accounts(request.user.pk)
+            return response
         except Exception as e:
             logger.error(f"Error while updating IG Business Account: {str(e)}")
             raise
@@ -174,7 +183,9 @@ class IGBusinessAccountViewSet(viewsets.ModelViewSet):
         try:
             instance = self.get_object()
             name = instance.name
+            invalidate_account(instance.access_token.access_token, instance.business_account_id)
             instance.delete()
+            invalidate_business_accounts(request.user.pk)
             logger.info(f"Business account deleted: {name}")
 
             return Response(
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PostImage, InstagramPost
+from .models import GenerationJob, PostImage, InstagramPost, InstagramMedia, PublishJob, AccountInsightPoint, Conversation, Message, MediaComment
 
 # Register your models here.
 @admin.register(PostImage)
@@ -10,4 +10,48 @@ class PostImageAdmin(admin.ModelAdmin):
 @admin.register(InstagramPost)
 class InstagramPostAdmin(admin.ModelAdmin):
     list_display = ('business_account', 'caption', 'is_posted', 'scheduled_time', 'created_at')
-    search_fields = ('business_account__name', 'caption')
\ No newline at end of file
+    search_fields = ('business_account__name', 'caption')
+
+
+@admin.register(InstagramMedia)
+class InstagramMediaAdmin(admin.ModelAdmin):
+    list_display = ('media_id', 'business_account', 'media_type', 'timestamp', 'like_count', 'comments_count', 'synced_at')
+    search_fields = ('media_id', 'caption', 'business_account__name')
+
+
+@admin.register(PublishJob)
+class PublishJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'post', 'media_type', 'status', 'poll_attempts', 'media_id', 'created_at', 'updated_at')
+    list_filter = ('status', 'media_type')
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'kind', 'status', 'image', 'created_at', 'updated_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('prompt',)
+
+
+@admin.register(AccountInsightPoint)
+class AccountInsightPointAdmin(admin.ModelAdmin):
+    list_display = ('business_account', 'metric', 'date', 'value', 'fetched_at')
+    list_filter = ('metric',)
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('business_account', 'participant_username', 'participant_id', 'conversation_id', 'updated_time')
+    search_fields = ('participant_username', 'participant_id', 'conversation_id')
+
+
+@admin.register(Message)
+class MessageAdmin(admin.ModelAdmin):
+    list_display = ('message_id', 'conversation', 'is_outgoing', 'created_time')
+    search_fields = ('message_id', 'text')
+
+
+@admin.register(MediaComment)
+class MediaCommentAdmin(admin.ModelAdmin):
+    list_display = ('comment_id', 'media_id', 'business_account', 'username', 'sentiment', 'timestamp')
+    list_filter = ('sentiment',)
+    search_fields = ('comment_id', 'media_id', 'text', 'username')
@@ -0,0 +1,362 @@
+"""
+Async versions of the read-only Instagram proxy views.
+
+Each view mirrors its namesake in `dashboard.views` (same URL, query
+parameters and response body) but awaits Graph over the pooled
+`httpx.AsyncClient` and reads the database with the async ORM. Served by an
+ASGI server, a single worker can then keep hundreds of Graph calls in flight
+instead of parking a thread on each one.
+
+DRF views cannot be async, so these are plain Django views that authenticate
+with the same JWT settings. `urls.py` routes to them when ASYNC_PROXY_VIEWS is
+on; leave it off under WSGI, where every async view pays for an event loop.
+
+Work that only exists as sync code (the media mirror sync, the insight
+backfill, the comment refresh) runs in a thread with `sync_to_async`.
+"""
+import asyncio
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from account.models import IGBusinessAccount
+from account.resolver import aresolve_business_account
+from .models import MediaComment
+from .serializer import InstagramMediaSerializer, MediaCommentSerializer
+from .tasks import backfill_account_insights, daily_insight_series, queue_inbox_backfill, refresh_media_comments
+from .views import (
+    NON_DAILY_INSIGHT_METRICS,
+    _daily_insight_range,
+    _filter_media,
+    _local_conversations_response,
+    _media_last_modified,
+    _mirrored_media,
+    _set_last_modified,
+    _totals_since,
+    revalidate,
+)
+
+from server.utils.logger import logger
+import server.utils.instagram_api as insta_api
+import server.utils.async_instagram_api as async_insta_api
+from server.utils.graph_cache import aget_business_account
+
+
+_jwt_authentication = JWTAuthentication()
+
+
+async def _authenticate(request):
+    """The user of the request's Bearer token, or None if it has none."""
+    header = _jwt_authentication.get_header(request)
+    raw_token = _jwt_authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+
+    validated_token = _jwt_authentication.get_validated_token(raw_token)
+    return await sync_to_async(_jwt_authentication.get_user)(validated_token)
+
+
+def async_api_view(view):
+    """
+    GET-only, authenticated async view, answering 401/405 the way
+    `@api_view(['GET'])` with IsAuthenticated does.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+        try:
+            user = await _authenticate(request)
+        except (InvalidToken, AuthenticationFailed) as e:
+            detail = e.detail if isinstance(e.detail, dict) else {'detail': e.detail}
+            response = JsonResponse(detail, status=401)
+            response['WWW-Authenticate'] = 'Bearer realm="api"'
+            return response
+
+        if user is None:
+            response = JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+            response['WWW-Authenticate'] = 'Bearer realm="api"'
+            return response
+
+        request.user = user
+        # Shared helpers read DRF-style `query_params`.
+        request.query_params = request.GET
+        return await view(request, *args, **kwargs)
+
+    # Token-authenticated like the DRF views, so no CSRF check.
+    return csrf_exempt(wrapper)
+
+
+async def _in_thread(iterator):
+    """Consume a sync (ORM-backed) iterator from async code, one item per thread hop."""
+    done = object()
+    while (item := await sync_to_async(next)(iterator, done)) is not done:
+        yield item
+
+
+@revalidate
+@async_api_view
+async def fetch_user_instagram_profile(request):
+    try:
+        business_account = await aresolve_business_account(request)
+        access_token = business_account.access_token.access_token
+
+        profile_data = await aget_business_account(access_token)
+
+        return JsonResponse({'profile': profile_data}, status=200)
+
+    except IGBusinessAccount.DoesNotExist:
+        return JsonResponse({'error': 'Instagram Business Account not found.'}, status=404)
+
+    except Exception as e:
+        logger.error(f"Error fetching Instagram profile: {str(e)}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@revalidate
+@async_api_view
+async def get_all_instagram_posts(request):
+    try:
+        business_account = await aresolve_business_account(request)
+
+        media = await sync_to_async(_mirrored_media)(business_account)
+        try:
+            media, offset, limit = _filter_media(media, request.query_params)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        count = await media.acount()
+        rows = [item async for item in media[offset:offset + limit]]
+
+        response = JsonResponse({
+            'posts': InstagramMediaSerializer(rows, many=True).data,
+            'count': count,
+            'next_offset': offset + limit if offset + limit < count else None,
+        }, status=200)
+        _set_last_modified(response, await sync_to_async(_media_last_modified)(business_account))
+        return response
+
+    except IGBusinessAccount.DoesNotExist:
+        return JsonResponse({'error': 'Instagram Business Account not found'}, status=404)
+
+    except Exception as e:
+        logger.error(f"Error fetching Instagram posts: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@revalidate
+@async_api_view
+async def get_post_details(request, media_id):
+    try:
+        business_account = await aresolve_business_account(request)
+        access_token = business_account.access_token.access_token
+
+        post_details = await async_insta_api.fetch_post_details(media_id, access_token)
+        return JsonResponse({'post_details': post_details}, status=200)
+
+    except IGBusinessAccount.DoesNotExist:
+        return JsonResponse({'error': 'Instagram Business Account not found'}, status=404)
+
+    except Exception as e:
+        logger.error(f"Error fetching Instagram post details: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+async def _account_insights(business_account, since: str | None, until: str | None, period: str = 'day') -> list:
+    """Async variant of `views._account_insights`; the store backfill and the Graph-only metrics run side by side."""
+    business_account_id = business_account.business_account_id
+    access_token = business_account.access_token.access_token
+
+    if period != 'day':
+        return await async_insta_api.get_all_instagram_user_insights(business_account_id, access_token, since, until, period)
+
+    since_date, until_date = _daily_insight_range(since, until)
+
+    _, other_insights = await asyncio.gather(
+        sync_to_async(backfill_account_insights)(business_account, since_date, until_date),
+        async_insta_api.get_all_instagram_user_insights(
+            business_account_id, access_token, _totals_since(since_date, until_date).isoformat(), until_date.isoformat(), period,
+            metrics=NON_DAILY_INSIGHT_METRICS,
+        ),
+    )
+    insights = await sync_to_async(daily_insight_series)(business_account, since_date, until_date)
+    return insights + other_insights
+
+
+@revalidate
+@async_api_view
+async def get_instagram_insights(request):
+    try:
+        business_account = await aresolve_business_account(request)
+        period = request.query_params.get('period', 'day')
+        since = request.query_params.get('since', None)
+        until = request.query_params.get('until', None)
+
+        try:
+            insights = await _account_insights(business_account, since, until, period)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        return JsonResponse({'insights': insights}, status=200)
+
+    except IGBusinessAccount.DoesNotExist:
+        return JsonResponse({'error': 'Instagram Business Account not found'}, status=404)
+
+    except Exception as e:
+        logger.error(f"Error fetching Instagram insights: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@revalidate
+@async_api_view
+async def get_instagram_post_comments(request, media_id):
+    try:
+        business_account = await aresolve_business_account(request)
+
+        try:
+            await sync_to_async(refresh_media_comments)(business_account, media_id)
+        except insta_api.GraphAPIError as e:
+            logger.error(str(e))
+            return JsonResponse({'error': 'Failed to fetch comments from Instagram API'}, status=502)
+
+        comments = [
+            comment async for comment in
+            MediaComment.objects.filter(business_account=business_account, media_id=media_id)
+        ]
+        return JsonResponse({'comments': MediaCommentSerializer(comments, many=True).data}, status=200)
+
+    except IGBusinessAccount.DoesNotExist:
+        return JsonResponse({'error': 'Instagram Business Account not found'}, status=404)
+
+    except Exception as e:
+        logger.error(f"Error fetching Instagram post comments: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+async def _ndjson_conversation_pages(pages):
+    """Async variant of `views._ndjson_conversation_pages`."""
+    count = 0
+    try:
+        async for page in pages:
+            count += len(page)
+            yield json.dumps({'conversations': page}) + '\n'
+    except insta_api.GraphAPIError as e:
+        logger.error(str(e))
+        yield json.dumps({'error': 'Failed to fetch conversations from Instagram API', 'count': count}) + '\n'
+        return
+
+    yield json.dumps({'done': True, 'count': count}) + '\n'
+
+
+async def _prepend(first, rest):
+    yield first
+    async for item in rest:
+        yield item
+
+
+def _local_response(response):
+    """Adapt a response built by the sync local-inbox helpers for an async view."""
+    if isinstance(response, Response):
+        return JsonResponse(response.data, status=response.status_code)
+    if response.streaming and not response.is_async:
+        response.streaming_content = _in_thread(iter(response.streaming_content))
+    return response
+
+
+@revalidate
+@async_api_view
+async def get_instagram_conversations(request):
+    try:
+        business_account = await aresolve_business_account(request)
+
+        business_account_id = business_account.business_account_id
+        access_token = business_account.access_token.access_token
+
+        if not business_account_id:
+            return JsonResponse({'error': 'Instagram Business Account ID not found'}, status=400)
+
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except (TypeError, ValueError):
+            limit = 50
+
+        paginated = str(request.query_params.get('paginated', 'false')).lower() == 'true'
+        stream = str(request.query_params.get('stream', 'false')).lower() == 'true'
+
+        if business_account.inbox_backfilled_at:
+            response = await sync_to_async(_local_conversations_response)(
+                request, business_account, max(1, min(limit, 100)), paginated, stream,
+            )
+            return _local_response(response)
+        await sync_to_async(queue_inbox_backfill)(business_account)
+
+        if paginated:
+            data = await async_insta_api.fetch_conversations(
+                business_account_id=business_account_id,
+                access_token=access_token,
+                limit=limit,
+                after=request.query_params.get('after'),
+            )
+
+            if data is None:
+                return JsonResponse({'error': 'Failed to fetch conversations from Instagram API'}, status=502)
+
+            paging = data.get('paging', {})
+            return JsonResponse({
+                'conversations': data.get('data', []),
+                'paging': {
+                    'cursors': paging.get('cursors', {}),
+                    'next': paging.get('next'),
+                },
+            }, status=200)
+
+        # Safety cap to avoid walking forever on malformed pagination responses.
+        max_pages = 100
+
+        pages = async_insta_api.iter_conversation_pages(
+            business_account_id=business_account_id,
+            access_token=access_token,
+            limit=limit,
+            max_items=max(1, min(limit, 100)) * max_pages,
+        )
+
+        if stream:
+            try:
+                first_page = await anext(pages)
+            except insta_api.GraphAPIError as e:
+                logger.error(str(e))
+                return JsonResponse({'error': 'Failed to fetch conversations from Instagram API'}, status=502)
+
+            response = StreamingHttpResponse(
+                _ndjson_conversation_pages(_prepend(first_page, pages)),
+                content_type='application/x-ndjson',
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        try:
+            all_conversations = [conversation async for page in pages for conversation in page]
+        except insta_api.GraphAPIError as e:
+            logger.error(str(e))
+            return JsonResponse({'error': 'Failed to fetch conversations from Instagram API'}, status=502)
+
+        return JsonResponse({
+            'conversations': all_conversations,
+            'count': len(all_conversations),
+            'paging': None,
+        }, status=200)
+
+    except IGBusinessAccount.DoesNotExist:
+        return JsonResponse({'error': 'Instagram Business Account not found'}, status=404)
+
+    except Exception as e:
+        logger.error(f"Error fetching Instagram conversations: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
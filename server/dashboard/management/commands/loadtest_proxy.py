@@ -0,0 +1,81 @@
+import asyncio
+import itertools
+import math
+import statistics
+import time
+
+import httpx
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent GET requests at a dashboard endpoint and report throughput '
+        'and latency, e.g. to compare the WSGI views with ASYNC_PROXY_VIEWS under ASGI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Full endpoint URL, e.g. http://localhost:8000/api/dashboard/instagram/profile/')
+        parser.add_argument('--token', required=True, help='JWT access token sent as the Bearer token')
+        parser.add_argument('--requests', type=int, default=500, help='Total number of requests (default 500)')
+        parser.add_argument('--concurrency', type=int, default=100, help='Requests in flight at once (default 100)')
+        parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds (default 60)')
+        parser.add_argument(
+            '--pool-size', type=int, default=20,
+            help='Connections per HTTP client; more concurrency is spread over several clients (default 20)',
+        )
+
+    def handle(self, *args, **options):
+        latencies, statuses, elapsed = asyncio.run(self.run(options))
+
+        ok = [latency for latency, status in zip(latencies, statuses) if status == 200]
+        failed = len(statuses) - len(ok)
+
+        self.stdout.write(f"{len(statuses)} requests, {options['concurrency']} concurrent, {elapsed:.2f}s")
+        self.stdout.write(f'throughput: {len(statuses) / elapsed:.1f} req/s')
+        if ok:
+            quantiles = statistics.quantiles(ok, n=100) if len(ok) > 1 else [ok[0]] * 99
+            self.stdout.write(
+                f'latency ms: p50={quantiles[49] * 1000:.0f} p95={quantiles[94] * 1000:.0f} '
+                f'p99={quantiles[98] * 1000:.0f} max={max(ok) * 1000:.0f}'
+            )
+        if failed:
+            by_status = {}
+            for status in statuses:
+                if status != 200:
+                    by_status[status] = by_status.get(status, 0) + 1
+            self.stdout.write(self.style.WARNING(f'failed: {failed} {by_status}'))
+
+    async def run(self, options):
+        headers = {'Authorization': f"Bearer {options['token']}"}
+        # One large httpx pool costs CPU quadratic in its size, which would make
+        # this process the bottleneck; use several small ones instead.
+        pools = math.ceil(options['concurrency'] / max(1, options['pool_size']))
+        per_pool = math.ceil(options['concurrency'] / pools)
+        limits = httpx.Limits(max_connections=per_pool, max_keepalive_connections=per_pool)
+        clients = [
+            httpx.AsyncClient(headers=headers, limits=limits, timeout=options['timeout'])
+            for _ in range(pools)
+        ]
+        turn = itertools.cycle(clients)
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        latencies, statuses = [], []
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await next(turn).get(options['url'])
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses.append(status)
+
+        try:
+            started = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(options['requests'])))
+            return latencies, statuses, time.perf_counter() - started
+        finally:
+            for client in clients:
+                await client.aclose()
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_igbusinessaccount_username'),
+        ('dashboard', '0002_instagrampost_post_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstagramMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media_id', models.CharField(max_length=100)),
+                ('caption', models.TextField(blank=True, null=True)),
+                ('media_type', models.CharField(blank=True, max_length=30, null=True)),
+                ('media_url', models.TextField(blank=True, null=True)),
+                ('permalink', models.URLField(blank=True, max_length=500, null=True)),
+                ('thumbnail_url', models.TextField(blank=True, null=True)),
+                ('timestamp', models.DateTimeField()),
+                ('like_count', models.PositiveIntegerField(default=0)),
+                ('comments_count', models.PositiveIntegerField(default=0)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+                ('business_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media', to='account.igbusinessaccount')),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['business_account', '-timestamp'], name='dashboard_i_busines_e5abc1_idx')],
+                'constraints': [models.UniqueConstraint(fields=('business_account', 'media_id'), name='unique_media_per_account')],
+            },
+        ),
+    ]
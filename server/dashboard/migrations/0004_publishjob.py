@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:45
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_instagrammedia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublishJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('media_type', models.CharField(choices=[('IMAGE', 'Image'), ('REELS', 'Reel'), ('CAROUSEL', 'Carousel')], default='IMAGE', max_length=20)),
+                ('items', models.JSONField(default=list)),
+                ('cover_url', models.URLField(blank=True, max_length=500, null=True)),
+                ('creation_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('creating', 'Creating containers'), ('processing', 'Processing media'), ('publishing', 'Publishing'), ('published', 'Published'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('poll_attempts', models.PositiveIntegerField(default=0)),
+                ('publish_attempted', models.BooleanField(default=False)),
+                ('media_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('permalink', models.URLField(blank=True, max_length=500, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='publish_jobs', to='dashboard.instagrampost')),
+            ],
+        ),
+    ]
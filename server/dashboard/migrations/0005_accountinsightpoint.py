@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_igbusinessaccount_username'),
+        ('dashboard', '0004_publishjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountInsightPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=64)),
+                ('date', models.DateField()),
+                ('value', models.BigIntegerField(blank=True, null=True)),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+                ('business_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='insight_points', to='account.igbusinessaccount')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business_account', 'metric', 'date'), name='unique_insight_point')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_igbusinessaccount_inbox_backfilled_at'),
+        ('dashboard', '0005_accountinsightpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('conversation_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('participant_id', models.CharField(max_length=100)),
+                ('participant_username', models.CharField(blank=True, max_length=255, null=True)),
+                ('updated_time', models.DateTimeField()),
+                ('business_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to='account.igbusinessaccount')),
+            ],
+            options={
+                'ordering': ['-updated_time', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Message',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.CharField(max_length=255, unique=True)),
+                ('text', models.TextField(blank=True, default='')),
+                ('from_id', models.CharField(max_length=100)),
+                ('from_username', models.CharField(blank=True, max_length=255, null=True)),
+                ('is_outgoing', models.BooleanField(default=False)),
+                ('created_time', models.DateTimeField()),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='dashboard.conversation')),
+            ],
+            options={
+                'ordering': ['-created_time', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['business_account', 'updated_time', 'id'], name='dashboard_c_busines_8c2480_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['business_account', 'conversation_id'], name='dashboard_c_busines_1bfdc8_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('business_account', 'participant_id'), name='unique_conversation_participant'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_time', 'id'], name='dashboard_m_convers_733173_idx'),
+        ),
+    ]
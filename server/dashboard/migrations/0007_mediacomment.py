@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_igbusinessaccount_inbox_backfilled_at'),
+        ('dashboard', '0006_conversation_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaComment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media_id', models.CharField(max_length=100)),
+                ('comment_id', models.CharField(max_length=100)),
+                ('text', models.TextField(blank=True, default='')),
+                ('username', models.CharField(default='Audience Member', max_length=255)),
+                ('timestamp', models.DateTimeField(blank=True, null=True)),
+                ('sentiment', models.CharField(blank=True, max_length=20, null=True)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('sentiment_scores', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media_comments', to='account.igbusinessaccount')),
+            ],
+            options={
+                'ordering': ['-timestamp', '-id'],
+                'indexes': [models.Index(fields=['business_account', 'media_id', '-timestamp'], name='dashboard_m_busines_9f2cc4_idx')],
+                'constraints': [models.UniqueConstraint(fields=('business_account', 'comment_id'), name='unique_comment_per_account')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:24
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_mediacomment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('image', 'Image')], default='post', max_length=10)),
+                ('prompt', models.TextField()),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('expanded', 'Prompt expanded'), ('image', 'Image generated'), ('caption', 'Caption generated'), ('stored', 'Stored'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('expanded_prompt', models.TextField(blank=True, null=True)),
+                ('caption', models.TextField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='dashboard.postimage')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'kind', 'status'], name='dashboard_g_user_id_c357cc_idx')],
+            },
+        ),
+    ]
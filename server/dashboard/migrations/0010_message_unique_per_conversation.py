@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_postimage_content_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='message_id',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='message',
+            constraint=models.UniqueConstraint(fields=('conversation', 'message_id'), name='unique_conversation_message'),
+        ),
+    ]
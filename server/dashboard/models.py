@@ -1,10 +1,14 @@
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.utils import timezone
 from django.db import models
 from rest_framework_simplejwt import settings
 from django.conf import settings
 from account.models import IGBusinessAccount
-from dashboard.tasks import schedule_post
-from server.utils.instagram_api import create_and_publish_post
+from dashboard.tasks import run_publish_job
+from server.utils.image_pipeline import content_hash, process_images
 from server.utils.logger import logger
 from django.conf import settings
 
@@ -13,6 +17,11 @@ from django.conf import settings
 class PostImage(models.Model):
     image = models.ImageField(upload_to='post_images/')
     image_url = models.URLField(blank=True, null=True)
+    # SHA-256 of the source bytes the stored JPEG was made from (see store_images).
+    content_hash = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    thumbnail = models.ImageField(upload_to='post_images/thumbnails/', null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -20,6 +29,49 @@ class PostImage(models.Model):
             return f"Image: {self.image.url[:30]}..."
         return f"Image URL: {self.image_url[:30]}..."
 
+    @property
+    def public_url(self):
+        """URL Instagram can download the image from."""
+        if self.image:
+            return settings.PUBLIC_URL + self.image.url
+        return self.image_url
+
+    @classmethod
+    def store_images(cls, sources: list[bytes]) -> list['PostImage']:
+        """
+        PostImages for raw image bytes (uploads or generated images), in order.
+
+        Each source becomes an Instagram-ready JPEG and a thumbnail stored
+        under its content hash; a source that was stored before returns the
+        existing row without being processed again. Raises
+        ImageValidationError (a ValueError) if a source cannot be published.
+        """
+        digests = [content_hash(data) for data in sources]
+        images = {image.content_hash: image for image in cls.objects.filter(content_hash__in=digests)}
+
+        missing = {digest: data for digest, data in zip(digests, sources) if digest not in images}
+        for processed in process_images(list(missing.values())):
+            images[processed.digest] = cls._store_processed(processed)
+
+        return [images[digest] for digest in digests]
+
+    @classmethod
+    def _store_processed(cls, processed) -> 'PostImage':
+        image_name = f'post_images/{processed.digest}.jpg'
+        thumbnail_name = f'post_images/thumbnails/{processed.digest}.jpg'
+        # Same name, same bytes: a file left behind by an earlier row is reused as is.
+        for name, data in ((image_name, processed.jpeg), (thumbnail_name, processed.thumbnail)):
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(data))
+
+        image, _ = cls.objects.get_or_create(content_hash=processed.digest, defaults={
+            'image': image_name,
+            'thumbnail': thumbnail_name,
+            'width': processed.width,
+            'height': processed.height,
+        })
+        return image
+
 
 class InstagramPost(models.Model):
     business_account = models.ForeignKey(IGBusinessAccount, on_delete=models.CASCADE)
@@ -34,35 +86,272 @@ class InstagramPost(models.Model):
     def __str__(self):
         return f"Post {self.business_account.name} - {self.caption[:30]}..."
 
-    def publish_to_instagram(self, request):
-        if self.media and not self.is_posted:
-            if self.media.image:
-                absolute_url = request.build_absolute_uri(self.media.image.url)
-                absolute_url = settings.PUBLIC_URL + self.media.image.url
-                # print("Absolute URL:", absolute_url)
-            else:
-                absolute_url = self.media.image_url
-
-            if self.scheduled_time and self.scheduled_time > timezone.now():
-                celery_id = schedule_post.apply_async(
-                    args=[absolute_url, self.caption, self.business_account.access_token.access_token, self.business_account.business_account_id, self.id],
-                    eta=self.scheduled_time
-                )
-                logger.info(f"Post {self.id} scheduled with Celery task ID: {celery_id}")
-                print(f"Post {self.id} scheduled with Celery task ID: {celery_id}")
-                return -1, -1  # Indicate that the post is scheduled but not yet published
-            else:
-                post_link, media_id = create_and_publish_post(
-                    image_url=absolute_url,
-                    caption=self.caption,
-                    access_token=self.business_account.access_token.access_token,
-                    business_account_id=self.business_account.business_account_id,
-                )
-
-                if post_link:
-                    self.is_posted = True
-                    self.short_code = post_link.split("/")[-2]
-                    self.post_id = media_id
-                    self.save()   
-                return post_link, media_id
-        return False, False
\ No newline at end of file
+    def queue_publish(self, media_type='IMAGE', items=None, cover_url=None):
+        """
+        Create a PublishJob for this post and hand it to the publish worker,
+        at `scheduled_time` if that is in the future. Returns the job.
+        """
+        if items is None:
+            items = [{'media_type': 'IMAGE', 'url': self.media.public_url}]
+
+        job = PublishJob.objects.create(post=self, media_type=media_type, items=items, cover_url=cover_url)
+
+        if self.scheduled_time and self.scheduled_time > timezone.now():
+            celery_id = run_publish_job.apply_async(args=[str(job.id)], eta=self.scheduled_time)
+            logger.info(f"Post {self.id} scheduled with Celery task ID: {celery_id}")
+        else:
+            run_publish_job.delay(str(job.id))
+        return job
+
+
+class PublishJob(models.Model):
+    """
+    One run of the staged publish pipeline, driven by the `run_publish_job`
+    Celery task: create containers -> wait for Instagram to process them ->
+    publish.
+
+    `items` lists the media as {'media_type': 'IMAGE' | 'VIDEO', 'url': ...};
+    each item's `creation_id` is stored as soon as its container exists, so
+    a retried run picks up where the last one stopped.
+    """
+    QUEUED = 'queued'
+    CREATING = 'creating'
+    PROCESSING = 'processing'
+    PUBLISHING = 'publishing'
+    PUBLISHED = 'published'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (CREATING, 'Creating containers'),
+        (PROCESSING, 'Processing media'),
+        (PUBLISHING, 'Publishing'),
+        (PUBLISHED, 'Published'),
+        (FAILED, 'Failed'),
+    ]
+
+    IMAGE = 'IMAGE'
+    REELS = 'REELS'
+    CAROUSEL = 'CAROUSEL'
+    MEDIA_TYPE_CHOICES = [
+        (IMAGE, 'Image'),
+        (REELS, 'Reel'),
+        (CAROUSEL, 'Carousel'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    post = models.ForeignKey(InstagramPost, on_delete=models.CASCADE, related_name='publish_jobs')
+    media_type = models.CharField(max_length=20, choices=MEDIA_TYPE_CHOICES, default=IMAGE)
+    items = models.JSONField(default=list)
+    cover_url = models.URLField(max_length=500, blank=True, null=True)
+    creation_id = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    poll_attempts = models.PositiveIntegerField(default=0)
+    publish_attempted = models.BooleanField(default=False)
+    media_id = models.CharField(max_length=100, blank=True, null=True)
+    permalink = models.URLField(max_length=500, blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Publish job {self.id} ({self.status})"
+
+    def set_status(self, status):
+        if self.status != status:
+            self.status = status
+            self.save(update_fields=['status', 'updated_at'])
+
+
+class GenerationJob(models.Model):
+    """
+    One AI generation request, run by the `run_generation_job` Celery task.
+
+    `status` names the last finished stage: expanded -> image -> caption ->
+    stored (image jobs skip the caption). Every stage's output is saved as
+    soon as it exists, so a retried run resumes instead of regenerating and
+    the result can be read again after a page reload.
+    """
+    POST = 'post'
+    IMAGE = 'image'
+    KIND_CHOICES = [
+        (POST, 'Post'),
+        (IMAGE, 'Image'),
+    ]
+
+    QUEUED = 'queued'
+    EXPANDED = 'expanded'
+    IMAGE_READY = 'image'
+    CAPTION_READY = 'caption'
+    STORED = 'stored'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (EXPANDED, 'Prompt expanded'),
+        (IMAGE_READY, 'Image generated'),
+        (CAPTION_READY, 'Caption generated'),
+        (STORED, 'Stored'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='generation_jobs')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=POST)
+    prompt = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    expanded_prompt = models.TextField(blank=True, null=True)
+    image = models.ForeignKey(PostImage, on_delete=models.SET_NULL, null=True, blank=True)
+    caption = models.TextField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'kind', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Generation job {self.id} ({self.kind}, {self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STORED, self.FAILED)
+
+
+class InstagramMedia(models.Model):
+    """
+    Local mirror of a business account's Instagram media, kept up to date by
+    the `sync_instagram_media` Celery task so dashboard reads never hit Graph.
+    """
+    business_account = models.ForeignKey(IGBusinessAccount, on_delete=models.CASCADE, related_name='media')
+    media_id = models.CharField(max_length=100)
+    caption = models.TextField(blank=True, null=True)
+    media_type = models.CharField(max_length=30, blank=True, null=True)
+    media_url = models.TextField(blank=True, null=True)
+    permalink = models.URLField(max_length=500, blank=True, null=True)
+    thumbnail_url = models.TextField(blank=True, null=True)
+    timestamp = models.DateTimeField()
+    like_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-timestamp']
+        constraints = [
+            models.UniqueConstraint(fields=['business_account', 'media_id'], name='unique_media_per_account'),
+        ]
+        indexes = [
+            models.Index(fields=['business_account', '-timestamp']),
+        ]
+
+    def __str__(self):
+        return f"Media {self.media_id} ({self.business_account.name})"
+
+
+class AccountInsightPoint(models.Model):
+    """
+    One daily value of an account insight metric (reach, follower_count, ...),
+    filled by `backfill_account_insights`. A null value records a day Graph
+    had no data for, so it is not fetched again.
+    """
+    business_account = models.ForeignKey(IGBusinessAccount, on_delete=models.CASCADE, related_name='insight_points')
+    metric = models.CharField(max_length=64)
+    date = models.DateField()
+    value = models.BigIntegerField(null=True, blank=True)
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business_account', 'metric', 'date'], name='unique_insight_point'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.date}: {self.value}"
+
+
+class Conversation(models.Model):
+    """
+    Local copy of an Instagram DM thread. Filled by the messaging webhook and
+    a one-time Graph backfill (`backfill_inbox`), so the inbox can be browsed
+    without calling Graph.
+
+    Webhooks only carry the other participant's id, so that identifies the
+    thread; the Graph conversation id is added by the backfill.
+    """
+    business_account = models.ForeignKey(IGBusinessAccount, on_delete=models.CASCADE, related_name='conversations')
+    conversation_id = models.CharField(max_length=255, blank=True, null=True)
+    participant_id = models.CharField(max_length=100)
+    participant_username = models.CharField(max_length=255, blank=True, null=True)
+    updated_time = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-updated_time', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['business_account', 'participant_id'], name='unique_conversation_participant'),
+        ]
+        indexes = [
+            models.Index(fields=['business_account', 'updated_time', 'id']),
+            models.Index(fields=['business_account', 'conversation_id']),
+        ]
+
+    def __str__(self):
+        return f"Conversation with {self.participant_username or self.participant_id} ({self.business_account.name})"
+
+
+class Message(models.Model):
+    """
+    A DM in a Conversation, keyed by its Graph / webhook message id (`mid`).
+
+    The id is only unique per conversation: a DM between two connected
+    business accounts is stored once in each account's inbox.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    message_id = models.CharField(max_length=255)
+    text = models.TextField(blank=True, default='')
+    from_id = models.CharField(max_length=100)
+    from_username = models.CharField(max_length=255, blank=True, null=True)
+    is_outgoing = models.BooleanField(default=False)
+    created_time = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_time', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'message_id'], name='unique_conversation_message'),
+        ]
+        indexes = [
+            # Serves the inbox's keyset pagination on (created_time, id).
+            models.Index(fields=['conversation', 'created_time', 'id']),
+        ]
+
+    def __str__(self):
+        return f"Message {self.message_id} ({'outgoing' if self.is_outgoing else 'incoming'})"
+
+
+class MediaComment(models.Model):
+    """
+    Cached, normalized comment on an Instagram media object with its
+    sentiment, refreshed by `sync_comments_for_media`. Only comments not seen
+    before are scored, so reading a post's comments never runs the model.
+    """
+    business_account = models.ForeignKey(IGBusinessAccount, on_delete=models.CASCADE, related_name='media_comments')
+    media_id = models.CharField(max_length=100)
+    comment_id = models.CharField(max_length=100)
+    text = models.TextField(blank=True, default='')
+    username = models.CharField(max_length=255, default='Audience Member')
+    timestamp = models.DateTimeField(blank=True, null=True)
+    sentiment = models.CharField(max_length=20, blank=True, null=True)
+    confidence = models.FloatField(blank=True, null=True)
+    sentiment_scores = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-timestamp', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['business_account', 'comment_id'], name='unique_comment_per_account'),
+        ]
+        indexes = [
+            models.Index(fields=['business_account', 'media_id', '-timestamp']),
+        ]
+
+    def __str__(self):
+        return f"Comment {self.comment_id} on {self.media_id}"
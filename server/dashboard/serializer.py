@@ -0,0 +1,95 @@
+from rest_framework import serializers
+
+from dashboard.models import Conversation, GenerationJob, InstagramMedia, MediaComment, Message, PublishJob
+
+
+class InstagramMediaSerializer(serializers.ModelSerializer):
+    # Expose the Graph media id as `id` so the payload matches what Graph returns.
+    id = serializers.CharField(source='media_id', read_only=True)
+
+    class Meta:
+        model = InstagramMedia
+        fields = ['id', 'caption', 'media_type', 'media_url', 'permalink', 'thumbnail_url', 'timestamp', 'like_count', 'comments_count']
+
+
+class MediaCommentSerializer(serializers.ModelSerializer):
+    id = serializers.CharField(source='comment_id', read_only=True)
+
+    class Meta:
+        model = MediaComment
+        fields = ['id', 'text', 'username', 'timestamp', 'sentiment', 'confidence', 'sentiment_scores']
+
+
+class PublishJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+    scheduled_time = serializers.DateTimeField(source='post.scheduled_time', read_only=True)
+
+    class Meta:
+        model = PublishJob
+        fields = ['job_id', 'status', 'media_type', 'media_id', 'permalink', 'error', 'scheduled_time', 'created_at', 'updated_at']
+
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+    image_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GenerationJob
+        fields = ['job_id', 'kind', 'status', 'prompt', 'expanded_prompt', 'caption', 'image_url', 'thumbnail_url', 'error', 'created_at', 'updated_at']
+
+    def get_image_url(self, obj):
+        return obj.image.image.url if obj.image and obj.image.image else None
+
+    def get_thumbnail_url(self, obj):
+        return obj.image.thumbnail.url if obj.image and obj.image.thumbnail else None
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """Shaped like a Graph conversation so the inbox reads both the same way."""
+    id = serializers.SerializerMethodField()
+    participants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'updated_time', 'participants']
+
+    def get_id(self, obj):
+        # Threads only seen through webhooks have no Graph id yet.
+        return obj.conversation_id or str(obj.pk)
+
+    def get_participants(self, obj):
+        business_account = obj.business_account
+        return {'data': [
+            {'id': obj.participant_id, 'username': obj.participant_username},
+            {'id': business_account.business_account_id, 'username': business_account.username},
+        ]}
+
+
+class MessageSerializer(serializers.ModelSerializer):
+    id = serializers.CharField(source='message_id', read_only=True)
+    direction = serializers.SerializerMethodField()
+    to = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Message
+        fields = ['id', 'text', 'created_time', 'direction', 'to']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # `from` is a keyword, so it cannot be declared as a class attribute.
+        fields['from'] = serializers.SerializerMethodField(method_name='get_from')
+        return fields
+
+    def get_direction(self, obj):
+        return 'outgoing' if obj.is_outgoing else 'incoming'
+
+    def get_from(self, obj):
+        return {'id': obj.from_id, 'username': obj.from_username}
+
+    def get_to(self, obj):
+        conversation = obj.conversation
+        if obj.is_outgoing:
+            return [{'id': conversation.participant_id, 'username': conversation.participant_username}]
+        business_account = conversation.business_account
+        return [{'id': business_account.business_account_id, 'username': business_account.username}]
@@ -1,16 +1,60 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import requests
 from celery import shared_task
-from server.utils.instagram_api import create_and_publish_post
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+import server.utils.async_instagram_api as async_insta_api
+from server.utils.graph_client import run_concurrently
+from server.utils.instagram_api import (
+    CONTAINER_POLL_POLICY,
+    DAILY_INSIGHT_METRICS,
+    INSIGHT_MAX_LOOKBACK_DAYS,
+    GraphAPIError,
+    GraphRetryLater,
+    create_and_publish_post,
+    create_carousel_item_containers,
+    create_media_container,
+    fetch_container_status,
+    fetch_container_statuses,
+    get_post_permalink,
+    insight_windows,
+    iter_conversation_messages,
+    iter_comments,
+    iter_conversations,
+    iter_posts,
+    publish_creation,
+)
 from server.utils.logger import logger
+from server.utils.rate_limiter import GraphRateLimitExceeded
 
 
 
 
-@shared_task
-def schedule_post(image_url: str, caption: str, access_token: str, business_account_id: str, post_id):
-    permalink, media_id = create_and_publish_post(image_url, caption, access_token, business_account_id)
+@shared_task(bind=True, max_retries=5)
+def schedule_post(self, image_url: str, caption: str, access_token: str, business_account_id: str, post_id, creation_id=None):
+    from .models import InstagramPost
+
+    # Containers are created after their post, so a retried publish only
+    # accepts media published since the post was created.
+    post_created_at = InstagramPost.objects.filter(id=post_id).values_list('created_at', flat=True).first()
+    try:
+        permalink, media_id = create_and_publish_post(
+            image_url, caption, access_token, business_account_id,
+            creation_id=creation_id, published_after=post_created_at,
+        )
+    except GraphRateLimitExceeded as e:
+        logger.warning(f"Deferring scheduled post {post_id}, Graph rate limit reached: {str(e)}")
+        raise self.retry(exc=e, countdown=e.retry_after)
+    except GraphRetryLater as e:
+        # Resume with the same container so a retry never creates a duplicate.
+        logger.warning(f"Re-scheduling post {post_id}: {str(e)}")
+        raise self.retry(exc=e, countdown=e.retry_after, kwargs={'creation_id': e.creation_id or creation_id})
     if permalink:
         try:
-            from .models import InstagramPost
             post = InstagramPost.objects.get(id=post_id)
             post.is_posted = True
             post.short_code = permalink.split("/")[-2]
@@ -19,5 +63,892 @@ def schedule_post(image_url: str, caption: str, access_token: str, business_acco
         except InstagramPost.DoesNotExist:
             logger.error(f"InstagramPost with id {post_id} does not exist.")
             pass
-    
-    
\ No newline at end of file
+
+
+class PublishJobFailed(Exception):
+    pass
+
+
+def _wait_for_containers(job, statuses) -> float | None:
+    """
+    Return None once every container is ready to publish, otherwise the
+    number of seconds until the next status check.
+    """
+    failed = [status for status in statuses if status in ('ERROR', 'EXPIRED')]
+    if failed:
+        raise PublishJobFailed(f"Instagram could not process the media (status {failed[0]})")
+
+    if all(status in ('FINISHED', 'PUBLISHED') for status in statuses):
+        return None
+
+    if job.poll_attempts >= CONTAINER_POLL_POLICY.max_attempts:
+        raise PublishJobFailed("Timed out waiting for Instagram to process the media")
+
+    delay = max(CONTAINER_POLL_POLICY.base_delay, CONTAINER_POLL_POLICY.backoff(job.poll_attempts))
+    job.poll_attempts += 1
+    job.save(update_fields=['poll_attempts', 'updated_at'])
+    return delay
+
+
+def _create_carousel_items(job, access_token: str, business_account_id: str) -> None:
+    pending = [item for item in job.items if not item.get('creation_id')]
+    if not pending:
+        return
+
+    try:
+        creation_ids = create_carousel_item_containers(pending, access_token, business_account_id)
+    except GraphRateLimitExceeded as e:
+        creation_ids = e.creation_ids
+        for item, creation_id in zip(pending, creation_ids):
+            item['creation_id'] = creation_id
+        job.save(update_fields=['items', 'updated_at'])
+        raise
+
+    for item, creation_id in zip(pending, creation_ids):
+        item['creation_id'] = creation_id
+    job.save(update_fields=['items', 'updated_at'])
+
+    if not all(creation_ids):
+        raise PublishJobFailed("Could not create a carousel item container")
+
+
+def advance_publish_job(job) -> float | None:
+    """
+    Move a PublishJob as far through its stages as possible without waiting.
+
+    Returns None when the job is published, otherwise the number of seconds
+    after which it should be advanced again (media still processing).
+    """
+    from .models import PublishJob
+
+    business_account = job.post.business_account
+    business_account_id = business_account.business_account_id
+    access_token = business_account.access_token.access_token
+    caption = job.post.caption
+
+    if not job.creation_id:
+        if job.status == PublishJob.QUEUED:
+            job.set_status(PublishJob.CREATING)
+
+        if job.media_type == PublishJob.CAROUSEL:
+            _create_carousel_items(job, access_token, business_account_id)
+
+            # Video items have to finish processing before the carousel container can reference them.
+            child_ids = [item['creation_id'] for item in job.items]
+            if any(item['media_type'] == 'VIDEO' for item in job.items):
+                job.set_status(PublishJob.PROCESSING)
+                delay = _wait_for_containers(job, list(fetch_container_statuses(child_ids, access_token).values()))
+                if delay is not None:
+                    return delay
+
+            creation_id = create_media_container(
+                business_account_id, access_token, media_type='CAROUSEL', children=child_ids, caption=caption,
+            )
+        elif job.media_type == PublishJob.REELS:
+            creation_id = create_media_container(
+                business_account_id, access_token, media_type='REELS', video_url=job.items[0]['url'],
+                cover_url=job.cover_url, caption=caption,
+            )
+        else:
+            creation_id = create_media_container(business_account_id, access_token, image_url=job.items[0]['url'], caption=caption)
+
+        if not creation_id:
+            raise PublishJobFailed("Could not create the media container")
+        job.creation_id = creation_id
+        job.poll_attempts = 0
+        job.status = PublishJob.PROCESSING
+        job.save(update_fields=['creation_id', 'poll_attempts', 'status', 'updated_at'])
+
+    resumed = job.publish_attempted
+    if not job.publish_attempted:
+        job.set_status(PublishJob.PROCESSING)
+        container_status = fetch_container_status(job.creation_id, access_token)
+        delay = _wait_for_containers(job, [container_status])
+        if delay is not None:
+            return delay
+        resumed = container_status == 'PUBLISHED'
+
+    job.status = PublishJob.PUBLISHING
+    job.publish_attempted = True
+    job.save(update_fields=['status', 'publish_attempted', 'updated_at'])
+
+    media_id = publish_creation(
+        job.creation_id, access_token, business_account_id,
+        caption=caption, resumed=resumed, published_after=job.created_at,
+    )
+    if not media_id:
+        raise PublishJobFailed("Instagram rejected the publish request")
+
+    permalink = get_post_permalink(media_id, access_token)
+
+    job.media_id = media_id
+    job.permalink = permalink
+    job.status = PublishJob.PUBLISHED
+    job.save(update_fields=['media_id', 'permalink', 'status', 'updated_at'])
+
+    post = job.post
+    post.is_posted = True
+    post.post_id = media_id
+    if permalink:
+        post.short_code = permalink.split("/")[-2]
+    post.save(update_fields=['is_posted', 'post_id', 'short_code'])
+
+    logger.info(f"Publish job {job.id} published media {media_id}")
+    return None
+
+
+@shared_task(bind=True, max_retries=100)
+def run_publish_job(self, job_id: str):
+    """
+    Worker side of the publish pipeline. Each run advances the job and, while
+    Instagram is still processing media (or Graph asks us to back off),
+    re-queues itself with a countdown instead of holding the worker.
+    """
+    from .models import PublishJob
+
+    try:
+        job = PublishJob.objects.select_related('post__business_account__access_token').get(id=job_id)
+    except PublishJob.DoesNotExist:
+        logger.error(f"PublishJob with id {job_id} does not exist.")
+        return None
+
+    if job.status in (PublishJob.PUBLISHED, PublishJob.FAILED):
+        return job.status
+
+    try:
+        countdown = advance_publish_job(job)
+    except (GraphRateLimitExceeded, GraphRetryLater) as e:
+        logger.warning(f"Deferring publish job {job_id}: {str(e)}")
+        countdown = e.retry_after
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Deferring publish job {job_id} after a network error: {str(e)}")
+        countdown = CONTAINER_POLL_POLICY.base_delay
+    except PublishJobFailed as e:
+        job.error = str(e)
+        job.status = PublishJob.FAILED
+        job.save(update_fields=['error', 'status', 'updated_at'])
+        logger.error(f"Publish job {job_id} failed: {str(e)}")
+        return job.status
+
+    if countdown is None:
+        return job.status
+
+    if self.request.retries >= self.max_retries:
+        job.error = "Gave up after too many retries"
+        job.status = PublishJob.FAILED
+        job.save(update_fields=['error', 'status', 'updated_at'])
+        logger.error(f"Publish job {job_id} failed: gave up after {self.request.retries} retries")
+        return job.status
+
+    raise self.retry(countdown=countdown)
+
+
+def advance_generation_job(job) -> None:
+    """
+    Run the stages of a GenerationJob that have not finished yet, saving each
+    stage's output as soon as it exists.
+    """
+    from server.utils.image_pipeline import image_bytes
+    from server.utils.llm_api_calls import expand_prompt, generate_caption, generate_image
+    from .models import GenerationJob, PostImage
+
+    if job.expanded_prompt is None:
+        job.expanded_prompt = expand_prompt(job.prompt)
+        job.status = GenerationJob.EXPANDED
+        job.save(update_fields=['expanded_prompt', 'status', 'updated_at'])
+
+    if job.image_id is None:
+        image = generate_image(job.expanded_prompt)
+        job.image = PostImage.store_images([image_bytes(image)])[0]
+        job.status = GenerationJob.IMAGE_READY
+        job.save(update_fields=['image', 'status', 'updated_at'])
+
+    if job.kind == GenerationJob.POST and job.caption is None:
+        job.caption = generate_caption(job.expanded_prompt, job.prompt)
+        job.status = GenerationJob.CAPTION_READY
+        job.save(update_fields=['caption', 'status', 'updated_at'])
+
+    job.status = GenerationJob.STORED
+    job.save(update_fields=['status', 'updated_at'])
+
+
+@shared_task(bind=True, max_retries=3)
+def run_generation_job(self, job_id: str):
+    """
+    Worker side of generate_post / generate_image. A failed stage is retried
+    with backoff; stages that already finished are not run again.
+    """
+    from .models import GenerationJob
+
+    try:
+        job = GenerationJob.objects.select_related('image').get(id=job_id)
+    except GenerationJob.DoesNotExist:
+        logger.error(f"GenerationJob with id {job_id} does not exist.")
+        return None
+
+    if job.is_finished:
+        return job.status
+
+    try:
+        advance_generation_job(job)
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            logger.warning(f"Retrying generation job {job_id} after stage '{job.status}': {str(e)}")
+            raise self.retry(exc=e, countdown=10 * 2 ** self.request.retries)
+
+        job.error = str(e)
+        job.status = GenerationJob.FAILED
+        job.save(update_fields=['error', 'status', 'updated_at'])
+        logger.error(f"Generation job {job_id} failed: {str(e)}")
+
+    return job.status
+
+
+MEDIA_SYNC_FIELDS = ['caption', 'media_type', 'media_url', 'permalink', 'thumbnail_url', 'timestamp', 'like_count', 'comments_count']
+
+
+def _parse_graph_timestamp(value: str) -> datetime:
+    # Graph timestamps look like "2024-12-01T15:30:00+0000"
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z')
+
+
+def sync_media_for_account(business_account, max_items: int | None = None) -> int:
+    """
+    Mirror an account's media into InstagramMedia.
+
+    Graph lists media newest first. Once the mirror is complete, the walk
+    stops at the first item that is both already mirrored and older than the
+    counter refresh window; every MEDIA_SYNC_RECONCILE_INTERVAL (and until the
+    first complete walk) the whole list is read instead. New posts are
+    inserted and recent posts get fresh like/comment counts, all in one
+    upsert. Mirrored media missing from the walked part of the list was
+    deleted on Instagram and is dropped. `max_items` caps the walk (a quick
+    first sync) and skips the reconciling. Returns the number of rows written.
+    """
+    from account.models import IGBusinessAccount
+    from .models import InstagramMedia
+
+    now = timezone.now()
+    mirrored = InstagramMedia.objects.filter(business_account=business_account)
+    reconciled_at = business_account.media_reconciled_at
+    complete = max_items is None and (
+        reconciled_at is None or now - reconciled_at > timedelta(seconds=settings.MEDIA_SYNC_RECONCILE_INTERVAL)
+    )
+
+    stop_before = None
+    if reconciled_at and not complete:
+        latest = mirrored.order_by('-timestamp').values_list('timestamp', flat=True).first()
+        refresh_since = now - timedelta(days=settings.MEDIA_SYNC_REFRESH_DAYS)
+        stop_before = min(latest, refresh_since) if latest else refresh_since
+
+    rows = []
+    items = iter_posts(business_account.business_account_id, business_account.access_token.access_token, max_items=max_items)
+    for item in items:
+        timestamp = _parse_graph_timestamp(item['timestamp'])
+        if stop_before and timestamp < stop_before:
+            break
+        rows.append(InstagramMedia(
+            business_account=business_account,
+            media_id=item['id'],
+            caption=item.get('caption'),
+            media_type=item.get('media_type'),
+            media_url=item.get('media_url'),
+            permalink=item.get('permalink'),
+            thumbnail_url=item.get('thumbnail_url'),
+            timestamp=timestamp,
+            like_count=item.get('like_count') or 0,
+            comments_count=item.get('comments_count') or 0,
+            # bulk_create skips auto_now, so set synced_at explicitly for the upsert.
+            synced_at=now,
+        ))
+
+    if rows:
+        InstagramMedia.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['business_account', 'media_id'],
+            update_fields=MEDIA_SYNC_FIELDS + ['synced_at'],
+            batch_size=500,
+        )
+
+    removed = 0
+    synced = {'media_synced_at': now}
+    if max_items is None:
+        # Everything from `stop_before` on (or all of it) was listed.
+        gone = mirrored.exclude(media_id__in=[row.media_id for row in rows])
+        if stop_before:
+            gone = gone.filter(timestamp__gte=stop_before)
+        removed, _ = gone.delete()
+        if complete:
+            synced['media_reconciled_at'] = now
+
+    IGBusinessAccount.objects.filter(pk=business_account.pk).update(**synced)
+    for field, value in synced.items():
+        setattr(business_account, field, value)
+
+    logger.info(
+        f"Synced {len(rows)} media items for business account {business_account.business_account_id}"
+        f" ({removed} deleted on Instagram)"
+    )
+    return len(rows)
+
+
+@shared_task(bind=True, max_retries=5)
+def sync_instagram_media(self, business_account_pk: int):
+    from account.models import IGBusinessAccount
+
+    try:
+        business_account = IGBusinessAccount.objects.select_related('access_token').get(pk=business_account_pk)
+        return sync_media_for_account(business_account)
+    except IGBusinessAccount.DoesNotExist:
+        logger.error(f"IGBusinessAccount with id {business_account_pk} does not exist.")
+    except GraphRateLimitExceeded as e:
+        raise self.retry(exc=e, countdown=e.retry_after)
+    except GraphRetryLater as e:
+        raise self.retry(exc=e, countdown=e.retry_after)
+    except GraphAPIError as e:
+        logger.error(f"Error syncing media for business account {business_account_pk}: {str(e)}")
+
+
+@shared_task
+def sync_all_instagram_media():
+    """Periodic fan-out: one sync task per connected business account."""
+    from account.models import IGBusinessAccount
+
+    account_ids = IGBusinessAccount.objects.exclude(business_account_id__isnull=True).values_list('pk', flat=True)
+    for pk in account_ids:
+        sync_instagram_media.delay(pk)
+
+
+def _days(start: date, end: date):
+    for offset in range((end - start).days + 1):
+        yield start + timedelta(days=offset)
+
+
+def _date_runs(days: list[date]) -> list[tuple[date, date]]:
+    """Group sorted days into inclusive (first, last) runs of consecutive days."""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def missing_insight_windows(business_account, start: date, end: date) -> dict[tuple[date, date], list[str]]:
+    """
+    Work out which Graph requests are needed to cover [start, end] in the
+    insight store: {(window_start, window_end): [metrics]}.
+
+    A day is missing for a metric if it has no stored point, or if it falls
+    in the last INSIGHT_REFRESH_DAYS (which Graph may still revise) and was
+    fetched more than INSIGHT_REFRESH_INTERVAL seconds ago. Each metric is
+    only requested as far back as Graph serves it.
+    """
+    from .models import AccountInsightPoint
+
+    now = timezone.now()
+    today = now.date()
+    end = min(end, today)
+    refresh_from = today - timedelta(days=settings.INSIGHT_REFRESH_DAYS)
+    stale_before = now - timedelta(seconds=settings.INSIGHT_REFRESH_INTERVAL)
+
+    stored = defaultdict(dict)
+    points = AccountInsightPoint.objects.filter(business_account=business_account, date__range=(start, end))
+    for metric, day, fetched_at in points.values_list('metric', 'date', 'fetched_at'):
+        stored[metric][day] = fetched_at
+
+    def is_missing(metric, day):
+        fetched_at = stored[metric].get(day)
+        return fetched_at is None or (day >= refresh_from and fetched_at < stale_before)
+
+    windows = defaultdict(list)
+    for metric, lookback_days in DAILY_INSIGHT_METRICS.items():
+        first = max(start, today - timedelta(days=lookback_days))
+        missing = [day for day in _days(first, end) if is_missing(metric, day)]
+        for run_start, run_end in _date_runs(missing):
+            for window in insight_windows(run_start, run_end):
+                windows[window].append(metric)
+    return windows
+
+
+def backfill_account_insights(business_account, start: date, end: date) -> int:
+    """
+    Fill the daily insight store for [start, end].
+
+    Only missing days (and the recent tail) are fetched. They are split into
+    API-legal windows that are requested concurrently; the shared Graph rate
+    limiter paces them. Windows that fail are logged and picked up by the
+    next backfill. Returns the number of points written.
+    """
+    from .models import AccountInsightPoint
+
+    windows = missing_insight_windows(business_account, start, end)
+    if not windows:
+        return 0
+
+    business_account_id = business_account.business_account_id
+    access_token = business_account.access_token.access_token
+
+    results = run_concurrently(
+        *(
+            async_insta_api.fetch_daily_insights_window(business_account_id, access_token, metrics, window_start, window_end)
+            for (window_start, window_end), metrics in windows.items()
+        ),
+        return_exceptions=True,
+    )
+
+    now = timezone.now()
+    rows = []
+    for ((window_start, window_end), metrics), points in zip(windows.items(), results):
+        if points is None or isinstance(points, BaseException):
+            logger.warning(f"Insight backfill window {window_start} to {window_end} failed for {business_account_id}: {points}")
+            continue
+
+        values = {(metric, day): value for metric, day, value in points}
+        for metric in metrics:
+            for day in _days(window_start, window_end):
+                rows.append(AccountInsightPoint(
+                    business_account=business_account,
+                    metric=metric,
+                    date=day,
+                    value=values.get((metric, day)),
+                    fetched_at=now,
+                ))
+
+    if rows:
+        AccountInsightPoint.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['business_account', 'metric', 'date'],
+            update_fields=['value', 'fetched_at'],
+            batch_size=500,
+        )
+    return len(rows)
+
+
+def daily_insight_series(business_account, start: date, end: date) -> list[dict]:
+    """
+    Read [start, end] from the insight store in the shape Graph returns
+    `period=day` metrics: [{metric: {'name', 'period', 'values': [{'value', 'end_time'}]}}].
+    """
+    from .models import AccountInsightPoint
+
+    series = {metric: [] for metric in DAILY_INSIGHT_METRICS}
+    points = (
+        AccountInsightPoint.objects
+        .filter(business_account=business_account, date__range=(start, end), value__isnull=False)
+        .order_by('metric', 'date')
+        .values_list('metric', 'date', 'value')
+    )
+    for metric, day, value in points:
+        end_time = datetime.combine(day + timedelta(days=1), datetime.min.time())
+        series.setdefault(metric, []).append({'value': value, 'end_time': end_time.strftime('%Y-%m-%dT%H:%M:%S+0000')})
+
+    return [
+        {metric: {'name': metric, 'period': 'day', 'values': values}}
+        for metric, values in series.items()
+        if values
+    ]
+
+
+@shared_task
+def backfill_instagram_insights(business_account_pk: int, days: int | None = None):
+    from account.models import IGBusinessAccount
+
+    try:
+        business_account = IGBusinessAccount.objects.select_related('access_token').get(pk=business_account_pk)
+    except IGBusinessAccount.DoesNotExist:
+        logger.error(f"IGBusinessAccount with id {business_account_pk} does not exist.")
+        return 0
+
+    today = timezone.now().date()
+    days = min(days or settings.INSIGHT_BACKFILL_DAYS, INSIGHT_MAX_LOOKBACK_DAYS)
+    written = backfill_account_insights(business_account, today - timedelta(days=days), today)
+    logger.info(f"Backfilled {written} insight points for business account {business_account.business_account_id}")
+    return written
+
+
+@shared_task
+def backfill_all_instagram_insights():
+    """Periodic fan-out: keep every account's insight store up to date."""
+    from account.models import IGBusinessAccount
+
+    account_ids = IGBusinessAccount.objects.exclude(business_account_id__isnull=True).values_list('pk', flat=True)
+    for pk in account_ids:
+        backfill_instagram_insights.delay(pk)
+
+
+def _is_business_account(business_account, user: dict) -> bool:
+    if str(user.get('id')) == str(business_account.business_account_id):
+        return True
+    return bool(business_account.username) and user.get('username') == business_account.username
+
+
+def store_conversation_messages(
+    business_account,
+    participant: dict,
+    messages: list[dict],
+    conversation_id: str | None = None,
+    updated_time: datetime | None = None,
+) -> int:
+    """
+    Upsert a conversation (identified by the other participant) and insert
+    its messages, skipping ones already stored. `messages` are dicts with
+    `id`, `text`, `from` ({'id', 'username'}) and a datetime `created_time`.
+    Returns the number of new messages.
+    """
+    from .models import Conversation, Message
+
+    conversation, _ = Conversation.objects.get_or_create(
+        business_account=business_account,
+        participant_id=str(participant['id']),
+        defaults={'updated_time': updated_time or max(m['created_time'] for m in messages)},
+    )
+
+    changed = []
+    latest = max([m['created_time'] for m in messages] + ([updated_time] if updated_time else []))
+    if latest > conversation.updated_time:
+        conversation.updated_time = latest
+        changed.append('updated_time')
+    if participant.get('username') and participant['username'] != conversation.participant_username:
+        conversation.participant_username = participant['username']
+        changed.append('participant_username')
+    if conversation_id and conversation_id != conversation.conversation_id:
+        conversation.conversation_id = conversation_id
+        changed.append('conversation_id')
+    if changed:
+        conversation.save(update_fields=changed)
+
+    rows = [
+        Message(
+            conversation=conversation,
+            message_id=m['id'],
+            text=m.get('text') or '',
+            from_id=str(m['from'].get('id', '')),
+            from_username=m['from'].get('username'),
+            is_outgoing=_is_business_account(business_account, m['from']),
+            created_time=m['created_time'],
+        )
+        for m in messages
+    ]
+    existing = set(
+        Message.objects.filter(
+            conversation=conversation, message_id__in=[r.message_id for r in rows],
+        ).values_list('message_id', flat=True)
+    )
+    new_rows = [r for r in rows if r.message_id not in existing]
+    Message.objects.bulk_create(new_rows, ignore_conflicts=True, batch_size=500)
+    return len(new_rows)
+
+
+def record_webhook_messages(payload: dict, usernames: dict | None = None) -> int:
+    """
+    Store the DMs of a messaging webhook (incoming and echoes of our own
+    replies) in the local inbox. `usernames` optionally maps user ids to
+    usernames already looked up by the caller.
+    """
+    from account.models import IGBusinessAccount
+
+    usernames = usernames or {}
+    stored = 0
+
+    for entry in payload.get('entry', []):
+        business_accounts = list(IGBusinessAccount.objects.filter(business_account_id=entry.get('id')))
+        for event in entry.get('messaging', []):
+            message = event.get('message') or {}
+            if not message.get('mid') or message.get('is_deleted'):
+                continue
+
+            sender_id = str(event['sender']['id'])
+            recipient_id = str(event['recipient']['id'])
+            participant_id = recipient_id if message.get('is_echo') else sender_id
+            created_time = datetime.fromtimestamp(event['timestamp'] / 1000, tz=dt_timezone.utc)
+
+            for business_account in business_accounts:
+                stored += store_conversation_messages(
+                    business_account,
+                    {'id': participant_id, 'username': usernames.get(participant_id)},
+                    [{
+                        'id': message['mid'],
+                        'text': message.get('text', ''),
+                        'from': {'id': sender_id, 'username': usernames.get(sender_id)},
+                        'created_time': created_time,
+                    }],
+                )
+
+    return stored
+
+
+def record_participant_username(business_account_id: str, participant_id: str, username: str) -> int:
+    """
+    Fill in a participant's username once it is known, on their conversation
+    with the business account and on their messages stored without it.
+    Returns the number of messages updated.
+    """
+    from .models import Conversation, Message
+
+    if not username:
+        return 0
+
+    conversations = Conversation.objects.filter(
+        business_account__business_account_id=business_account_id, participant_id=str(participant_id),
+    )
+    conversations.exclude(participant_username=username).update(participant_username=username)
+    return Message.objects.filter(
+        conversation__in=conversations, from_id=str(participant_id), from_username__isnull=True,
+    ).update(from_username=username)
+
+
+def backfill_inbox_for_account(business_account) -> int:
+    """
+    One-time copy of an account's DM history from Graph into the local inbox
+    (up to INBOX_BACKFILL_MAX_MESSAGES per thread). After this the messaging
+    webhook keeps it current. Returns the number of new messages.
+    """
+    from account.models import IGBusinessAccount
+
+    access_token = business_account.access_token.access_token
+    stored = 0
+
+    for conversation in iter_conversations(business_account.business_account_id, access_token, limit=100):
+        participants = (conversation.get('participants') or {}).get('data', [])
+        participant = next((p for p in participants if not _is_business_account(business_account, p)), None)
+        if participant is None:
+            continue
+
+        messages = [
+            {
+                'id': m['id'],
+                'text': m.get('message', ''),
+                'from': m.get('from') or {},
+                'created_time': _parse_graph_timestamp(m['created_time']),
+            }
+            for m in iter_conversation_messages(
+                conversation['id'], access_token, max_items=settings.INBOX_BACKFILL_MAX_MESSAGES,
+            )
+        ]
+        stored += store_conversation_messages(
+            business_account,
+            participant,
+            messages,
+            conversation_id=conversation['id'],
+            updated_time=_parse_graph_timestamp(conversation['updated_time']),
+        )
+
+    now = timezone.now()
+    IGBusinessAccount.objects.filter(pk=business_account.pk).update(inbox_backfilled_at=now)
+    business_account.inbox_backfilled_at = now
+
+    logger.info(f"Backfilled {stored} messages for business account {business_account.business_account_id}")
+    return stored
+
+
+@shared_task(bind=True, max_retries=5)
+def backfill_inbox(self, business_account_pk: int):
+    from account.models import IGBusinessAccount
+
+    try:
+        business_account = IGBusinessAccount.objects.select_related('access_token').get(pk=business_account_pk)
+        return backfill_inbox_for_account(business_account)
+    except IGBusinessAccount.DoesNotExist:
+        logger.error(f"IGBusinessAccount with id {business_account_pk} does not exist.")
+    except GraphRateLimitExceeded as e:
+        raise self.retry(exc=e, countdown=e.retry_after)
+    except GraphRetryLater as e:
+        raise self.retry(exc=e, countdown=e.retry_after)
+    except GraphAPIError as e:
+        logger.error(f"Error backfilling inbox for business account {business_account_pk}: {str(e)}")
+
+
+def queue_inbox_backfill(business_account) -> None:
+    """
+    Start the inbox backfill unless one was queued within the last hour, so
+    a failed backfill is retried at most hourly.
+    """
+    try:
+        queued = cache.add(f'inbox-backfill:{business_account.pk}', 1, 3600)
+    except Exception as e:
+        logger.warning(f"Could not check for a queued inbox backfill: {e}")
+        queued = True
+    if queued:
+        backfill_inbox.delay(business_account.pk)
+
+
+def normalize_comment(comment: dict) -> dict:
+    # Try top-level username, then from.username, then from.name, then from.id, finally "Audience Member"
+    from_obj = comment.get('from', {}) or {}
+    username = (
+        comment.get('username') or
+        from_obj.get('username') or
+        from_obj.get('name') or
+        from_obj.get('id') or
+        "Audience Member"
+    )
+    return {
+        'id': comment.get('id'),
+        'text': comment.get('text') or '',
+        'username': username,
+        'timestamp': comment.get('timestamp'),
+    }
+
+
+def _comments_synced_key(business_account, media_id: str) -> str:
+    return f'comments:synced:{business_account.pk}:{media_id}'
+
+
+def _comments_recently_synced(business_account, media_id: str) -> bool:
+    try:
+        return bool(cache.get(_comments_synced_key(business_account, media_id)))
+    except Exception as e:
+        logger.warning(f"Comment cache state unavailable for {media_id}: {e}")
+        return False
+
+
+def sync_comments_for_media(business_account, media_id: str) -> int:
+    """
+    Refresh the MediaComment cache of one post from Graph.
+
+    New comments are scored together in a single `predict_batch` pass;
+    comments already cached keep their scores. Comments deleted on Instagram
+    are dropped when the whole list could be read (up to
+    COMMENT_SYNC_MAX_ITEMS). Returns the number of new comments.
+    """
+    from server.utils.sentiment_model import predict_batch
+    from .models import MediaComment
+
+    max_items = settings.COMMENT_SYNC_MAX_ITEMS
+    fetched = [
+        normalize_comment(c)
+        for c in iter_comments(media_id, business_account.access_token.access_token, max_items=max_items)
+    ]
+
+    cached = MediaComment.objects.filter(business_account=business_account, media_id=media_id)
+    known = set(cached.values_list('comment_id', flat=True))
+    new = [c for c in fetched if c['id'] not in known]
+
+    if new:
+        scores = predict_batch([c['text'] for c in new])
+        MediaComment.objects.bulk_create(
+            [
+                MediaComment(
+                    business_account=business_account,
+                    media_id=media_id,
+                    comment_id=c['id'],
+                    text=c['text'],
+                    username=c['username'],
+                    timestamp=_parse_graph_timestamp(c['timestamp']) if c['timestamp'] else None,
+                    sentiment=score['sentiment'],
+                    confidence=score['confidence'],
+                    sentiment_scores=score.get('sentiment_scores'),
+                )
+                for c, score in zip(new, scores)
+            ],
+            ignore_conflicts=True,
+            batch_size=500,
+        )
+
+    if len(fetched) < max_items:
+        removed = known - {c['id'] for c in fetched}
+        if removed:
+            cached.filter(comment_id__in=removed).delete()
+
+    try:
+        cache.set(_comments_synced_key(business_account, media_id), 1, settings.COMMENT_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Could not mark comments of {media_id} as synced: {e}")
+
+    logger.info(f"Cached {len(new)} new comments for media {media_id}")
+    return len(new)
+
+
+def record_webhook_comments(payload: dict) -> int:
+    """
+    Add the comments of a `comments` webhook to the MediaComment cache,
+    scored one by one with `predict_sentiment`; concurrent webhook tasks
+    share its forward passes. Posts that were never synced (no cached
+    comments and no recent sync, which may have found none) are skipped,
+    their first read syncs the whole list. Returns the number of new
+    comments.
+    """
+    from account.models import IGBusinessAccount
+    from server.utils.sentiment_model import predict_sentiment
+    from .models import MediaComment
+
+    stored = 0
+
+    for entry in payload.get('entry', []):
+        business_accounts = list(IGBusinessAccount.objects.filter(business_account_id=entry.get('id')))
+        for change in entry.get('changes', []):
+            value = change.get('value') or {}
+            media_id = (value.get('media') or {}).get('id')
+            if change.get('field') != 'comments' or not value.get('id') or not media_id:
+                continue
+
+            for business_account in business_accounts:
+                cached = MediaComment.objects.filter(business_account=business_account, media_id=media_id)
+                if cached.filter(comment_id=value['id']).exists():
+                    continue
+                if not (_comments_recently_synced(business_account, media_id) or cached.exists()):
+                    continue
+
+                comment = normalize_comment(value)
+                score = predict_sentiment(comment['text'])
+                created = MediaComment.objects.bulk_create([
+                    MediaComment(
+                        business_account=business_account,
+                        media_id=media_id,
+                        comment_id=comment['id'],
+                        text=comment['text'],
+                        username=comment['username'],
+                        timestamp=datetime.fromtimestamp(entry['time'], tz=dt_timezone.utc) if entry.get('time') else None,
+                        sentiment=score['sentiment'],
+                        confidence=score['confidence'],
+                        sentiment_scores=score.get('sentiment_scores'),
+                    ),
+                ], ignore_conflicts=True)
+                stored += len(created)
+
+    return stored
+
+
+@shared_task(bind=True, max_retries=5)
+def sync_media_comments(self, business_account_pk: int, media_id: str):
+    from account.models import IGBusinessAccount
+
+    try:
+        business_account = IGBusinessAccount.objects.select_related('access_token').get(pk=business_account_pk)
+        return sync_comments_for_media(business_account, media_id)
+    except IGBusinessAccount.DoesNotExist:
+        logger.error(f"IGBusinessAccount with id {business_account_pk} does not exist.")
+    except GraphRateLimitExceeded as e:
+        raise self.retry(exc=e, countdown=e.retry_after)
+    except GraphRetryLater as e:
+        raise self.retry(exc=e, countdown=e.retry_after)
+    except GraphAPIError as e:
+        logger.error(f"Error syncing comments for media {media_id}: {str(e)}")
+
+
+def refresh_media_comments(business_account, media_id: str) -> None:
+    """
+    Make sure a post's comment cache exists before it is read. The first
+    read syncs inline; later reads past COMMENT_CACHE_TTL get the stale cache
+    while a background refresh runs.
+    """
+    from .models import MediaComment
+
+    key = _comments_synced_key(business_account, media_id)
+    try:
+        if cache.get(key):
+            return
+        stale = MediaComment.objects.filter(business_account=business_account, media_id=media_id).exists()
+        if stale and cache.add(f'{key}:queued', 1, 300):
+            sync_media_comments.delay(business_account.pk, media_id)
+            return
+    except Exception as e:
+        logger.warning(f"Comment cache state unavailable for {media_id}: {e}")
+        stale = MediaComment.objects.filter(business_account=business_account, media_id=media_id).exists()
+
+    if not stale:
+        sync_comments_for_media(business_account, media_id)
@@ -1,3 +1,876 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import urlparse
 
-# Create your tests here.
+import requests
+from celery.exceptions import Retry
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from account.models import CustomUser, IGAccessToken, IGBusinessAccount
+from dashboard import models as dashboard_models, tasks, views
+from dashboard.models import (
+    AccountInsightPoint, Conversation, GenerationJob, InstagramMedia, InstagramPost, MediaComment, Message,
+    PostImage, PublishJob,
+)
+from server.utils import instagram_api as insta_api
+from server.utils.rate_limiter import GraphRateLimitExceeded
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'dashboard-tests'}}
+
+
+API = insta_api.API_VERSION
+
+
+class FakeGraphClient:
+    """
+    Stand-in for `instagram_api.graph_client`.
+
+    `routes` maps (method, path) to a callable taking the request's params or
+    form data and returning (status, json_body). Requests are recorded in
+    `calls` as (method, path).
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        path = urlparse(url).path
+        with self._lock:
+            self.calls.append((method, path))
+        handler = self.routes.get((method, path))
+        status, body = handler(kwargs.get('params') or kwargs.get('data') or {}) if handler else (404, {'error': {'message': 'Unknown path'}})
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers['Content-Type'] = 'application/json'
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def count(self, method, path):
+        return self.calls.count((method, path))
+
+
+def graph_timestamp(when):
+    return when.strftime('%Y-%m-%dT%H:%M:%S+0000')
+
+
+class GraphTestCase(TestCase):
+    """Routes the sync Graph client to a FakeGraphClient; retries do not sleep."""
+
+    def graph(self, routes) -> FakeGraphClient:
+        client = FakeGraphClient(routes)
+        self.enterContext(mock.patch.object(insta_api, 'graph_client', client))
+        self.enterContext(mock.patch.object(insta_api.time, 'sleep'))
+        return client
+
+
+def make_business_account(username='owner', business_account_id='biz'):
+    custom_user = CustomUser.objects.create(user=User.objects.create_user(username))
+    token = IGAccessToken.objects.create(
+        custom_user=custom_user, access_token=f'tok-{username}', expires_at=timezone.now(),
+    )
+    return IGBusinessAccount.objects.create(
+        custom_user=custom_user, business_account_id=business_account_id, username='shop', access_token=token, name='Shop',
+    )
+
+
+def scores(texts):
+    return [{'sentiment': 'Positive', 'confidence': 0.9, 'sentiment_scores': [0.05, 0.05, 0.9]} for _ in texts]
+
+
+def graph_comment(comment_id, text='nice'):
+    return {'id': comment_id, 'text': text, 'username': f'user-{comment_id}', 'timestamp': '2026-03-01T10:00:00+0000'}
+
+
+def comment_webhook(comment_id, media_id='m1', text='love it'):
+    return {'entry': [{'id': 'biz', 'time': 1760000000, 'changes': [{
+        'field': 'comments',
+        'value': {'id': comment_id, 'text': text, 'from': {'id': 'u1', 'username': 'fan'}, 'media': {'id': media_id}},
+    }]}]}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CommentCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.business_account = make_business_account()
+        self.predict_batch = self.enterContext(mock.patch('server.utils.sentiment_model.predict_batch', side_effect=scores))
+        self.enterContext(mock.patch(
+            'server.utils.sentiment_model.predict_sentiment', side_effect=lambda text: scores([text])[0],
+        ))
+
+    def sync(self, comments):
+        with mock.patch.object(tasks, 'iter_comments', return_value=iter(comments)):
+            return tasks.sync_comments_for_media(self.business_account, 'm1')
+
+    def cached_ids(self):
+        return set(MediaComment.objects.filter(media_id='m1').values_list('comment_id', flat=True))
+
+    def test_webhook_comment_is_added_to_a_post_synced_with_no_comments(self):
+        self.sync([])
+
+        self.assertEqual(tasks.record_webhook_comments(comment_webhook('c1')), 1)
+        self.assertEqual(self.cached_ids(), {'c1'})
+
+    def test_webhook_comment_on_a_never_synced_post_is_left_to_the_first_read(self):
+        self.assertEqual(tasks.record_webhook_comments(comment_webhook('c1')), 0)
+        self.assertEqual(self.cached_ids(), set())
+
+    def test_redelivered_webhook_comment_is_stored_once(self):
+        self.sync([graph_comment('c0')])
+
+        tasks.record_webhook_comments(comment_webhook('c1'))
+        tasks.record_webhook_comments(comment_webhook('c1'))
+
+        self.assertEqual(MediaComment.objects.filter(comment_id='c1').count(), 1)
+
+    def test_sync_scores_only_new_comments_and_drops_deleted_ones(self):
+        self.sync([graph_comment('c1', 'first'), graph_comment('c2', 'second')])
+        self.predict_batch.reset_mock()
+
+        self.assertEqual(self.sync([graph_comment('c2', 'second'), graph_comment('c3', 'third')]), 1)
+
+        self.predict_batch.assert_called_once_with(['third'])
+        self.assertEqual(self.cached_ids(), {'c2', 'c3'})
+
+    @override_settings(COMMENT_SYNC_MAX_ITEMS=2)
+    def test_truncated_sync_keeps_comments_it_did_not_reach(self):
+        self.sync([graph_comment('c1')])
+
+        self.sync([graph_comment('c2'), graph_comment('c3')])
+
+        self.assertEqual(self.cached_ids(), {'c1', 'c2', 'c3'})
+
+    def test_first_read_syncs_inline(self):
+        with mock.patch.object(tasks, 'iter_comments', return_value=iter([graph_comment('c1')])), \
+                mock.patch.object(tasks.sync_media_comments, 'delay') as delay:
+            tasks.refresh_media_comments(self.business_account, 'm1')
+
+        self.assertEqual(self.cached_ids(), {'c1'})
+        delay.assert_not_called()
+
+    def test_recently_synced_post_is_not_refreshed(self):
+        self.sync([graph_comment('c1')])
+
+        with mock.patch.object(tasks, 'iter_comments') as iter_comments, \
+                mock.patch.object(tasks.sync_media_comments, 'delay') as delay:
+            tasks.refresh_media_comments(self.business_account, 'm1')
+
+        iter_comments.assert_not_called()
+        delay.assert_not_called()
+
+    def test_stale_cache_is_served_while_one_background_refresh_runs(self):
+        self.sync([graph_comment('c1')])
+        # The synced marker expired.
+        cache.delete(tasks._comments_synced_key(self.business_account, 'm1'))
+
+        with mock.patch.object(tasks, 'iter_comments') as iter_comments, \
+                mock.patch.object(tasks.sync_media_comments, 'delay') as delay:
+            tasks.refresh_media_comments(self.business_account, 'm1')
+            tasks.refresh_media_comments(self.business_account, 'm1')
+
+        iter_comments.assert_not_called()
+        delay.assert_called_once_with(self.business_account.pk, 'm1')
+
+
+class QueueGenerationJobTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('creator')
+        self.delay = self.enterContext(mock.patch.object(views.run_generation_job, 'delay'))
+
+    def queue(self, prompt='a red bicycle'):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            job = views._queue_generation_job(self.user, GenerationJob.POST, prompt)
+        return job, callbacks
+
+    def test_task_is_sent_once_the_job_is_committed(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            job = views._queue_generation_job(self.user, GenerationJob.POST, 'a red bicycle')
+            self.delay.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.delay.assert_called_once_with(str(job.id))
+
+    def test_unfinished_job_for_the_same_prompt_is_reused(self):
+        first, _ = self.queue()
+        second, callbacks = self.queue()
+
+        self.assertEqual(second.id, first.id)
+        self.assertEqual(callbacks, [])
+        self.delay.assert_called_once()
+
+    def test_stale_job_is_failed_and_replaced(self):
+        stale, _ = self.queue()
+        GenerationJob.objects.filter(id=stale.id).update(updated_at=timezone.now() - timedelta(hours=1))
+
+        job, _ = self.queue()
+
+        stale.refresh_from_db()
+        self.assertNotEqual(job.id, stale.id)
+        self.assertEqual(stale.status, GenerationJob.FAILED)
+        self.assertIn('No progress', stale.error)
+        self.assertEqual(self.delay.call_count, 2)
+
+    def test_finished_job_is_not_reused(self):
+        first, _ = self.queue()
+        GenerationJob.objects.filter(id=first.id).update(status=GenerationJob.STORED)
+
+        job, _ = self.queue()
+
+        self.assertNotEqual(job.id, first.id)
+
+
+def sequence(*responses):
+    """Route handler answering with each response in turn, then repeating the last one."""
+    remaining = list(responses)
+
+    def handler(params):
+        return remaining.pop(0) if len(remaining) > 1 else remaining[0]
+    return handler
+
+
+class PublishJobTests(GraphTestCase):
+
+    def setUp(self):
+        self.business_account = make_business_account()
+        self.post = InstagramPost.objects.create(business_account=self.business_account, caption='Summer sale')
+
+    def make_job(self, **fields):
+        fields.setdefault('items', [{'media_type': 'IMAGE', 'url': 'https://cdn.example.com/a.jpg'}])
+        return PublishJob.objects.create(post=self.post, **fields)
+
+    def publish_routes(self, container_status='FINISHED', publish=(200, {'id': 'media'})):
+        return {
+            ('POST', f'/{API}/biz/media'): lambda p: (200, {'id': 'container'}),
+            ('GET', f'/{API}/container'): container_status if callable(container_status)
+            else lambda p: (200, {'status_code': container_status}),
+            ('POST', f'/{API}/biz/media_publish'): publish if callable(publish) else lambda p: publish,
+            ('GET', f'/{API}/media'): lambda p: (200, {'permalink': 'https://www.instagram.com/p/abc/'}),
+        }
+
+    def test_image_job_is_published(self):
+        graph = self.graph(self.publish_routes())
+        job = self.make_job()
+
+        self.assertIsNone(tasks.advance_publish_job(job))
+
+        job.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual((job.status, job.creation_id, job.media_id), (PublishJob.PUBLISHED, 'container', 'media'))
+        self.assertTrue(job.publish_attempted)
+        self.assertEqual((self.post.is_posted, self.post.post_id, self.post.short_code), (True, 'media', 'abc'))
+        self.assertEqual(graph.count('POST', f'/{API}/biz/media_publish'), 1)
+
+    def test_processing_container_defers_and_resumes_with_the_same_container(self):
+        graph = self.graph(self.publish_routes(container_status=sequence(
+            (200, {'status_code': 'IN_PROGRESS'}), (200, {'status_code': 'FINISHED'}),
+        )))
+        job = self.make_job()
+
+        delay = tasks.advance_publish_job(job)
+
+        job.refresh_from_db()
+        self.assertGreater(delay, 0)
+        self.assertEqual((job.status, job.creation_id, job.poll_attempts), (PublishJob.PROCESSING, 'container', 1))
+        self.assertFalse(job.publish_attempted)
+
+        self.assertIsNone(tasks.advance_publish_job(job))
+        self.assertEqual(graph.count('POST', f'/{API}/biz/media'), 1)
+        self.assertEqual(graph.count('POST', f'/{API}/biz/media_publish'), 1)
+
+    def test_publish_with_lost_response_is_not_repeated(self):
+        graph = self.graph({
+            **self.publish_routes(
+                container_status=sequence((200, {'status_code': 'FINISHED'}), (200, {'status_code': 'PUBLISHED'})),
+                # The publish went through but the response was lost as a 503.
+                publish=(503, {'error': {'message': 'Service unavailable', 'code': 2}}),
+            ),
+            ('GET', f'/{API}/biz/media'): lambda p: (200, {'data': [
+                {'id': 'media', 'caption': 'Summer sale', 'timestamp': graph_timestamp(timezone.now() + timedelta(minutes=1))},
+                {'id': 'last-year', 'caption': 'Summer sale', 'timestamp': graph_timestamp(timezone.now() - timedelta(days=365))},
+            ]}),
+        })
+        job = self.make_job()
+
+        self.assertIsNone(tasks.advance_publish_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.media_id), (PublishJob.PUBLISHED, 'media'))
+        self.assertEqual(graph.count('POST', f'/{API}/biz/media_publish'), 1)
+
+    def test_resumed_job_checks_the_container_before_publishing(self):
+        graph = self.graph({
+            **self.publish_routes(container_status='PUBLISHED'),
+            ('GET', f'/{API}/biz/media'): lambda p: (200, {'data': [
+                {'id': 'media', 'caption': 'Summer sale', 'timestamp': graph_timestamp(timezone.now() + timedelta(minutes=1))},
+            ]}),
+        })
+        # The worker died after sending the publish request.
+        job = self.make_job(creation_id='container', status=PublishJob.PUBLISHING, publish_attempted=True)
+
+        self.assertIsNone(tasks.advance_publish_job(job))
+
+        self.assertEqual(graph.count('POST', f'/{API}/biz/media_publish'), 0)
+        self.assertEqual(PublishJob.objects.get(id=job.id).status, PublishJob.PUBLISHED)
+
+    def test_resumed_job_fails_when_its_media_cannot_be_told_apart(self):
+        published = graph_timestamp(timezone.now() + timedelta(minutes=1))
+        self.graph({
+            **self.publish_routes(container_status='PUBLISHED'),
+            ('GET', f'/{API}/biz/media'): lambda p: (200, {'data': [
+                {'id': 'media', 'caption': 'Summer sale', 'timestamp': published},
+                {'id': 'other', 'caption': 'Summer sale', 'timestamp': published},
+            ]}),
+        })
+        job = self.make_job(creation_id='container', status=PublishJob.PUBLISHING, publish_attempted=True)
+
+        with self.assertLogs('base', 'ERROR'):
+            self.assertEqual(tasks.run_publish_job(str(job.id)), PublishJob.FAILED)
+
+        self.assertIsNone(PublishJob.objects.get(id=job.id).media_id)
+        self.assertIsNone(InstagramPost.objects.get(id=self.post.id).post_id)
+
+    def test_carousel_item_ids_are_kept_when_one_item_fails(self):
+        def create(params):
+            if params.get('image_url', '').endswith('b.jpg'):
+                return 400, {'error': {'message': 'Invalid image', 'code': 100}}
+            return 200, {'id': f"item-{params['image_url'][-5]}"}
+
+        self.graph({('POST', f'/{API}/biz/media'): create})
+        job = self.make_job(media_type=PublishJob.CAROUSEL, items=[
+            {'media_type': 'IMAGE', 'url': 'https://cdn.example.com/a.jpg'},
+            {'media_type': 'IMAGE', 'url': 'https://cdn.example.com/b.jpg'},
+        ])
+
+        with self.assertRaises(tasks.PublishJobFailed):
+            tasks.advance_publish_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual([item.get('creation_id') for item in job.items], ['item-a', None])
+
+    def test_run_publish_job_requeues_while_media_is_processing(self):
+        self.graph(self.publish_routes(container_status='IN_PROGRESS'))
+        job = self.make_job()
+
+        with self.assertRaises(Retry):
+            tasks.run_publish_job(str(job.id))
+
+        self.assertEqual(PublishJob.objects.get(id=job.id).status, PublishJob.PROCESSING)
+
+    def test_run_publish_job_defers_on_rate_limit(self):
+        job = self.make_job()
+
+        with mock.patch.object(tasks, 'advance_publish_job', side_effect=GraphRateLimitExceeded(30, 'app')), \
+                mock.patch.object(tasks.run_publish_job, 'retry', side_effect=Retry) as retry:
+            with self.assertRaises(Retry):
+                tasks.run_publish_job(str(job.id))
+
+        retry.assert_called_once_with(countdown=30)
+
+    def test_run_publish_job_marks_failed_container_as_failed(self):
+        self.graph(self.publish_routes(container_status='ERROR'))
+        job = self.make_job()
+
+        self.assertEqual(tasks.run_publish_job(str(job.id)), PublishJob.FAILED)
+
+        job.refresh_from_db()
+        self.assertIn('ERROR', job.error)
+        self.assertFalse(InstagramPost.objects.get(id=self.post.id).is_posted)
+
+    def test_finished_job_is_not_run_again(self):
+        graph = self.graph({})
+        job = self.make_job(status=PublishJob.PUBLISHED)
+
+        self.assertEqual(tasks.run_publish_job(str(job.id)), PublishJob.PUBLISHED)
+        self.assertEqual(graph.calls, [])
+
+
+class QueuePublishTests(TestCase):
+
+    def setUp(self):
+        image = PostImage.objects.create(image_url='https://cdn.example.com/a.jpg')
+        self.post = InstagramPost.objects.create(business_account=make_business_account(), caption='Hi', media=image)
+        self.task = self.enterContext(mock.patch.object(dashboard_models, 'run_publish_job'))
+
+    def test_post_without_schedule_is_published_now(self):
+        job = self.post.queue_publish()
+
+        self.assertEqual(job.items, [{'media_type': 'IMAGE', 'url': 'https://cdn.example.com/a.jpg'}])
+        self.assertEqual(job.status, PublishJob.QUEUED)
+        self.task.delay.assert_called_once_with(str(job.id))
+        self.task.apply_async.assert_not_called()
+
+    def test_scheduled_post_is_published_at_its_time(self):
+        self.post.scheduled_time = timezone.now() + timedelta(hours=2)
+
+        job = self.post.queue_publish(media_type=PublishJob.REELS, items=[{'media_type': 'VIDEO', 'url': 'https://cdn.example.com/v.mp4'}])
+
+        self.task.apply_async.assert_called_once_with(args=[str(job.id)], eta=self.post.scheduled_time)
+        self.task.delay.assert_not_called()
+        self.assertEqual(job.media_type, PublishJob.REELS)
+
+
+def graph_media(media_id, age, likes=0):
+    return {
+        'id': media_id, 'caption': media_id, 'media_type': 'IMAGE', 'like_count': likes, 'comments_count': 0,
+        'timestamp': graph_timestamp(timezone.now() - age),
+    }
+
+
+@override_settings(MEDIA_SYNC_REFRESH_DAYS=7)
+class MediaSyncTests(TestCase):
+
+    def setUp(self):
+        self.business_account = make_business_account()
+
+    def sync(self, media, max_items=None):
+        """Run a sync against Graph listing `media`; returns (rows written, ids Graph was paged through)."""
+        read = []
+
+        def iter_posts(business_account_id, access_token, max_items=None):
+            for item in media[:max_items]:
+                read.append(item['id'])
+                yield item
+
+        with mock.patch.object(tasks, 'iter_posts', iter_posts):
+            return tasks.sync_media_for_account(self.business_account, max_items=max_items), read
+
+    def mirrored_ids(self):
+        return set(InstagramMedia.objects.values_list('media_id', flat=True))
+
+    def test_first_sync_mirrors_every_post(self):
+        written, _ = self.sync([graph_media('new', timedelta(hours=1), likes=3), graph_media('old', timedelta(days=400))])
+
+        self.assertEqual(written, 2)
+        self.assertEqual(list(InstagramMedia.objects.values_list('media_id', 'like_count')), [('new', 3), ('old', 0)])
+
+    def test_sync_stops_at_mirrored_posts_outside_the_refresh_window(self):
+        self.sync([
+            graph_media('recent', timedelta(days=2), likes=1),
+            graph_media('older', timedelta(days=20), likes=1),
+            graph_media('oldest', timedelta(days=40), likes=1),
+        ])
+
+        written, read = self.sync([
+            graph_media('new', timedelta(hours=1)),
+            graph_media('recent', timedelta(days=2), likes=9),
+            graph_media('older', timedelta(days=20), likes=9),
+            graph_media('oldest', timedelta(days=40), likes=9),
+        ])
+
+        self.assertEqual(written, 2)
+        self.assertEqual(read, ['new', 'recent', 'older'])
+        self.assertEqual(
+            dict(InstagramMedia.objects.values_list('media_id', 'like_count')),
+            {'new': 0, 'recent': 9, 'older': 1, 'oldest': 1},
+        )
+        self.assertEqual(InstagramMedia.objects.count(), 4)
+
+    def test_media_deleted_within_the_walked_window_is_dropped(self):
+        self.sync([
+            graph_media('recent', timedelta(days=2)),
+            graph_media('deleted', timedelta(days=3)),
+            graph_media('older', timedelta(days=20)),
+        ])
+
+        # 'older' is never read again, so it stays even though Graph no longer lists it.
+        self.sync([graph_media('new', timedelta(hours=1)), graph_media('recent', timedelta(days=2))])
+
+        self.assertEqual(self.mirrored_ids(), {'new', 'recent', 'older'})
+
+    @override_settings(MEDIA_SYNC_RECONCILE_INTERVAL=3600)
+    def test_periodic_full_walk_drops_old_deleted_media(self):
+        self.sync([graph_media('recent', timedelta(days=2)), graph_media('older', timedelta(days=20))])
+        self.business_account.media_reconciled_at = timezone.now() - timedelta(hours=2)
+
+        _, read = self.sync([graph_media('recent', timedelta(days=2)), graph_media('oldest', timedelta(days=40))])
+
+        self.assertEqual(read, ['recent', 'oldest'])
+        self.assertEqual(self.mirrored_ids(), {'recent', 'oldest'})
+        self.business_account.refresh_from_db()
+        self.assertGreater(self.business_account.media_reconciled_at, timezone.now() - timedelta(minutes=1))
+
+    def test_capped_first_sync_leaves_the_rest_to_a_full_walk(self):
+        media = [graph_media(f'm{n}', timedelta(days=n)) for n in range(1, 30, 4)]
+
+        self.assertEqual(self.sync(media, max_items=3)[0], 3)
+        self.business_account.refresh_from_db()
+        self.assertIsNotNone(self.business_account.media_synced_at)
+        self.assertIsNone(self.business_account.media_reconciled_at)
+
+        # Not stopped by the refresh window: older media was never mirrored.
+        _, read = self.sync(media)
+        self.assertEqual(len(read), len(media))
+        self.assertEqual(InstagramMedia.objects.count(), len(media))
+
+    def test_rate_limited_sync_is_retried_later(self):
+        with mock.patch.object(tasks, 'iter_posts', side_effect=GraphRateLimitExceeded(120, 'app')), \
+                mock.patch.object(tasks.sync_instagram_media, 'retry', side_effect=Retry) as retry:
+            with self.assertRaises(Retry):
+                tasks.sync_instagram_media(self.business_account.pk)
+
+        self.assertEqual(retry.call_args.kwargs['countdown'], 120)
+
+
+@override_settings(INSIGHT_REFRESH_DAYS=2, INSIGHT_REFRESH_INTERVAL=3600)
+class InsightBackfillTests(TestCase):
+
+    def setUp(self):
+        self.business_account = make_business_account()
+        self.today = timezone.now().date()
+        self.enterContext(mock.patch.object(tasks, 'DAILY_INSIGHT_METRICS', {'reach': 730}))
+
+    def day(self, days_ago):
+        return self.today - timedelta(days=days_ago)
+
+    def store(self, first, last, fetched_ago=timedelta(0)):
+        """Store reach points for the days `first` to `last` days ago."""
+        AccountInsightPoint.objects.bulk_create([
+            AccountInsightPoint(business_account=self.business_account, metric='reach', date=self.day(days_ago), value=1)
+            for days_ago in range(first, last - 1, -1)
+        ])
+        AccountInsightPoint.objects.filter(date__range=(self.day(first), self.day(last))).update(
+            fetched_at=timezone.now() - fetched_ago,
+        )
+
+    def test_empty_store_is_split_into_api_windows(self):
+        with mock.patch.object(tasks, 'DAILY_INSIGHT_METRICS', {'reach': 730, 'follower_count': 30}):
+            windows = tasks.missing_insight_windows(self.business_account, self.day(45), self.today)
+
+        self.assertEqual(dict(windows), {
+            (self.day(45), self.day(16)): ['reach'],
+            (self.day(15), self.today): ['reach'],
+            # follower_count is only served for the last 30 days.
+            (self.day(30), self.day(1)): ['follower_count'],
+            (self.today, self.today): ['follower_count'],
+        })
+
+    def test_only_gaps_and_the_stale_recent_tail_are_fetched(self):
+        self.store(10, 6)
+        self.store(4, 4)
+        self.store(3, 0, fetched_ago=timedelta(hours=2))
+
+        windows = tasks.missing_insight_windows(self.business_account, self.day(10), self.today)
+
+        self.assertEqual(dict(windows), {
+            (self.day(5), self.day(5)): ['reach'],
+            (self.day(2), self.today): ['reach'],
+        })
+
+    def test_recently_fetched_tail_is_not_fetched_again(self):
+        self.store(10, 0, fetched_ago=timedelta(minutes=5))
+
+        self.assertEqual(dict(tasks.missing_insight_windows(self.business_account, self.day(10), self.today)), {})
+
+    def test_backfill_stores_fetched_windows_and_retries_failed_ones(self):
+        requested = []
+
+        async def fetch_window(business_account_id, access_token, metrics, start, end):
+            requested.append((start, end))
+            if start == self.day(40):
+                raise requests.ConnectionError('connection reset')
+            return [('reach', self.day(3), 30), ('reach', self.day(2), 20)]
+
+        with mock.patch.object(tasks.async_insta_api, 'fetch_daily_insights_window', fetch_window):
+            with self.assertLogs('base', 'WARNING'):
+                written = tasks.backfill_account_insights(self.business_account, self.day(40), self.today)
+
+            self.assertEqual(written, 11)
+            values = dict(AccountInsightPoint.objects.values_list('date', 'value'))
+            self.assertEqual((values[self.day(3)], values[self.day(2)], values[self.today]), (30, 20, None))
+
+            requested.clear()
+            with self.assertLogs('base', 'WARNING'):
+                tasks.backfill_account_insights(self.business_account, self.day(40), self.today)
+
+        self.assertEqual(requested, [(self.day(40), self.day(11))])
+
+
+def graph_conversation_page(*ids, next_page=None):
+    page = {'data': [{'id': conversation_id, 'updated_time': '2025-01-01T00:00:00+0000'} for conversation_id in ids]}
+    if next_page:
+        page['paging'] = {'next': f'{insta_api.HOST_URL}{API}/biz/conversations?after={next_page}'}
+    return 200, page
+
+
+GRAPH_ERROR = (400, {'error': {'message': 'Invalid OAuth access token', 'code': 190}})
+
+
+class ConversationStreamTests(GraphTestCase):
+
+    def setUp(self):
+        self.business_account = make_business_account()
+        self.client = APIClient()
+        self.client.force_authenticate(self.business_account.custom_user.user)
+        self.enterContext(mock.patch.object(views, 'queue_inbox_backfill'))
+
+    def stream(self):
+        response = self.client.get('/dashboard/instagram/conversations/', {'stream': 'true', 'limit': 2})
+        if not response.streaming:
+            return response, None
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        return response, [json.loads(line) for line in lines]
+
+    def test_graph_pages_are_streamed_as_they_arrive(self):
+        self.graph({('GET', f'/{API}/biz/conversations'): sequence(
+            graph_conversation_page('c1', 'c2', next_page='p2'),
+            graph_conversation_page('c3'),
+        )})
+
+        response, lines = self.stream()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([[c['id'] for c in line['conversations']] for line in lines[:-1]], [['c1', 'c2'], ['c3']])
+        self.assertEqual(lines[-1], {'done': True, 'count': 3})
+
+    def test_gzip_clients_get_each_page_as_its_own_chunk(self):
+        self.graph({('GET', f'/{API}/biz/conversations'): sequence(
+            graph_conversation_page('c1', 'c2', next_page='p2'),
+            graph_conversation_page('c3'),
+        )})
+
+        response = self.client.get(
+            '/dashboard/instagram/conversations/', {'stream': 'true', 'limit': 2}, HTTP_ACCEPT_ENCODING='gzip',
+        )
+        chunks = iter(response.streaming_content)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual([c['id'] for c in json.loads(next(chunks))['conversations']], ['c1', 'c2'])
+        self.assertEqual(len(list(chunks)), 2)
+
+    def test_failing_first_page_is_an_error_response(self):
+        self.graph({('GET', f'/{API}/biz/conversations'): lambda p: GRAPH_ERROR})
+
+        with self.assertLogs('base', 'ERROR'):
+            response, _ = self.stream()
+
+        self.assertEqual(response.status_code, 502)
+
+    def test_failure_after_the_first_page_ends_the_stream_with_an_error_line(self):
+        self.graph({('GET', f'/{API}/biz/conversations'): sequence(
+            graph_conversation_page('c1', 'c2', next_page='p2'),
+            GRAPH_ERROR,
+        )})
+
+        with self.assertLogs('base', 'ERROR'):
+            response, lines = self.stream()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[-1], {'error': 'Failed to fetch conversations from Instagram API', 'count': 2})
+
+    def test_backfilled_inbox_is_streamed_from_the_database(self):
+        graph = self.graph({})
+        self.business_account.inbox_backfilled_at = timezone.now()
+        self.business_account.save()
+        now = timezone.now()
+        for n in range(3):
+            Conversation.objects.create(
+                business_account=self.business_account, conversation_id=f'c{n}', participant_id=f'p{n}',
+                updated_time=now - timedelta(minutes=n),
+            )
+
+        _, lines = self.stream()
+
+        self.assertEqual([[c['id'] for c in line['conversations']] for line in lines[:-1]], [['c0', 'c1'], ['c2']])
+        self.assertEqual(lines[-1], {'done': True, 'count': 3})
+        self.assertEqual(graph.calls, [])
+
+
+class InboxCursorTests(TestCase):
+
+    def setUp(self):
+        self.business_account = make_business_account()
+        self.business_account.inbox_backfilled_at = timezone.now()
+        self.business_account.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.business_account.custom_user.user)
+        self.now = timezone.now()
+
+    def walk(self, url, params, key, link):
+        """Follow `paging[link]` from the first page; returns the ids seen, page by page."""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([item['id'] for item in response.data[key]])
+            next_url = response.data['paging'][link]
+            if not next_url:
+                return pages, response
+            response = self.client.get(next_url)
+
+    def test_conversation_pages_cover_ties_exactly_once(self):
+        # c1 to c3 share a timestamp, so only the id tie-breaker separates them.
+        for n, age in enumerate([0, 5, 5, 5, 9]):
+            Conversation.objects.create(
+                business_account=self.business_account, conversation_id=f'c{n}', participant_id=f'p{n}',
+                updated_time=self.now - timedelta(minutes=age),
+            )
+
+        pages, last = self.walk('/dashboard/instagram/conversations/', {'paginated': 'true', 'limit': 2}, 'conversations', 'next')
+
+        self.assertEqual(pages, [['c0', 'c3'], ['c2', 'c1'], ['c4']])
+        self.assertIsNotNone(last.data['paging']['previous'])
+
+        previous = self.client.get(last.data['paging']['previous'])
+        self.assertEqual([c['id'] for c in previous.data['conversations']], ['c2', 'c1'])
+
+    def test_message_pages_run_oldest_to_newest_within_a_page(self):
+        conversation = Conversation.objects.create(
+            business_account=self.business_account, conversation_id='thread', participant_id='fan', updated_time=self.now,
+        )
+        for n in range(5):
+            Message.objects.create(
+                conversation=conversation, message_id=f'm{n}', from_id='fan', created_time=self.now - timedelta(minutes=5 - n),
+            )
+
+        pages, last = self.walk('/dashboard/instagram/conversations/thread/messages/', {'limit': 2}, 'messages', 'next')
+
+        self.assertEqual(pages, [['m3', 'm4'], ['m1', 'm2'], ['m0']])
+        newer, _ = self.walk(last.data['paging']['previous'], {}, 'messages', 'previous')
+        self.assertEqual(newer, [['m1', 'm2'], ['m3', 'm4']])
+
+    def test_new_messages_do_not_shift_older_pages(self):
+        conversation = Conversation.objects.create(
+            business_account=self.business_account, conversation_id='thread', participant_id='fan', updated_time=self.now,
+        )
+        for n in range(4):
+            Message.objects.create(
+                conversation=conversation, message_id=f'm{n}', from_id='fan', created_time=self.now - timedelta(minutes=5 - n),
+            )
+        first = self.client.get('/dashboard/instagram/conversations/thread/messages/', {'limit': 2})
+
+        Message.objects.create(conversation=conversation, message_id='new', from_id='fan', created_time=self.now)
+        older = self.client.get(first.data['paging']['next'])
+
+        self.assertEqual([m['id'] for m in older.data['messages']], ['m0', 'm1'])
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get('/dashboard/instagram/conversations/', {'paginated': 'true', 'after': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(DASHBOARD_SECTION_TIMEOUT=0.3)
+class DashboardOverviewTests(TestCase):
+
+    def setUp(self):
+        self.business_account = make_business_account()
+        self.client = APIClient()
+        self.client.force_authenticate(self.business_account.custom_user.user)
+        # Lets a section hang until the test is over.
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        # Sections run in worker threads, which cannot see this test's uncommitted rows.
+        self.enterContext(mock.patch.object(views, '_mirrored_media', return_value=InstagramMedia.objects.none()))
+
+    def test_sections_share_one_deadline(self):
+        def slow():
+            time.sleep(0.2)
+            return 'done'
+
+        started = time.perf_counter()
+        results, meta = views._load_sections({'a': slow, 'b': slow, 'hung': self.release.wait}, timeout=0.3)
+
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(results, {'a': 'done', 'b': 'done', 'hung': None})
+        self.assertEqual({name: m['status'] for name, m in meta.items()}, {'a': 'ok', 'b': 'ok', 'hung': 'timeout'})
+
+    def test_failing_and_hung_sections_do_not_fail_the_overview(self):
+        with mock.patch.object(views, 'get_business_account', side_effect=lambda token: self.release.wait()), \
+                mock.patch.object(views, '_account_insights', side_effect=RuntimeError('Graph is down')), \
+                self.assertLogs('base', 'ERROR'):
+            response = self.client.get('/dashboard/overview/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['profile'], response.data['posts'], response.data['insights']), (None, [], None))
+        sections = response.data['meta']['sections']
+        self.assertEqual({name: m['status'] for name, m in sections.items()}, {'profile': 'timeout', 'posts': 'ok', 'insights': 'error'})
+        self.assertEqual(sections['insights']['error'], 'Graph is down')
+
+    def test_unchanged_overview_is_not_modified(self):
+        with mock.patch.object(views, 'get_business_account', return_value={'username': 'shop'}), \
+                mock.patch.object(views, '_account_insights', return_value=[]):
+            first = self.client.get('/dashboard/overview/')
+            second = self.client.get('/dashboard/overview/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(first.data['profile'], {'username': 'shop'})
+        self.assertEqual(second.status_code, 304)
+
+
+class MirroredMediaTests(TestCase):
+
+    def setUp(self):
+        self.business_account = make_business_account()
+        self.client = APIClient()
+        self.client.force_authenticate(self.business_account.custom_user.user)
+        self.delay = self.enterContext(mock.patch.object(views.sync_instagram_media, 'delay'))
+
+    def test_first_visit_syncs_one_page_inline_and_queues_the_rest(self):
+        with mock.patch.object(tasks, 'iter_posts', return_value=iter([graph_media('new', timedelta(hours=1))])) as iter_posts:
+            response = self.client.get('/dashboard/instagram/posts/')
+
+        self.assertEqual([post['id'] for post in response.data['posts']], ['new'])
+        self.assertEqual(iter_posts.call_args.kwargs['max_items'], insta_api.PAGE_SIZE)
+        self.delay.assert_called_once_with(self.business_account.pk)
+
+    @override_settings(MEDIA_SYNC_INTERVAL=600)
+    def test_account_without_media_is_not_synced_inline_again(self):
+        with mock.patch.object(tasks, 'iter_posts', return_value=iter([])) as iter_posts:
+            self.client.get('/dashboard/instagram/posts/')
+            response = self.client.get('/dashboard/instagram/posts/')
+
+        self.assertEqual(response.data['count'], 0)
+        iter_posts.assert_called_once()
+        self.assertEqual(self.delay.call_count, 1)
+
+
+class InsightRangeTests(TestCase):
+
+    def setUp(self):
+        self.business_account = make_business_account()
+        self.client = APIClient()
+        self.client.force_authenticate(self.business_account.custom_user.user)
+        self.fetch_groups = self.enterContext(mock.patch.object(
+            views.async_insta_api, 'fetch_user_insights', mock.AsyncMock(return_value={}),
+        ))
+
+    def test_long_range_for_other_periods_is_rejected(self):
+        response = self.client.get('/dashboard/instagram/insights/', {'period': 'week', 'since': '2025-01-01', 'until': '2025-03-01'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('30 days', response.data['error'])
+        self.fetch_groups.assert_not_called()
+
+    def test_range_within_the_limit_is_fetched_as_asked(self):
+        response = self.client.get('/dashboard/instagram/insights/', {'period': 'week', 'since': '2025-01-01', 'until': '2025-01-31'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.fetch_groups.call_args.kwargs['since'], '2025-01-01')
+
+    def test_long_daily_range_fetches_the_other_metrics_for_its_last_window(self):
+        today = timezone.now().date()
+
+        with mock.patch.object(views, 'backfill_account_insights'):
+            response = self.client.get('/dashboard/instagram/insights/', {'since': (today - timedelta(days=90)).isoformat()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.fetch_groups.call_args.kwargs['since'], (today - timedelta(days=30)).isoformat())
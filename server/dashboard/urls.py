@@ -4,12 +4,16 @@ from dashboard.views import (
     generate_image, 
     generate_post, 
     publish_post, 
+    get_publish_job,
+    get_generation_job,
     get_post,
     fetch_user_instagram_profile,
     get_all_instagram_posts,
     get_post_details,
+    get_instagram_posts_bulk,
     get_instagram_insights,
     get_instagram_post_insights,
+    get_dashboard_overview,
     get_instagram_post_comments,
     get_sentiment_score,
     get_sentiment_score_bulk,
@@ -17,6 +21,18 @@ from dashboard.views import (
     get_instagram_conversation_messages,
     reply_to_instagram_conversation,
 )
+from django.conf import settings
+
+# Under ASGI the read-only Graph proxies are served by their async versions.
+if settings.ASYNC_PROXY_VIEWS:
+    from dashboard.async_views import (
+        fetch_user_instagram_profile,
+        get_all_instagram_posts,
+        get_post_details,
+        get_instagram_insights,
+        get_instagram_post_comments,
+        get_instagram_conversations,
+    )
 
 urlpatterns = [
     # Post Generation APIs
@@ -24,13 +40,19 @@ urlpatterns = [
     path('generate_image/', generate_image, name='generate_image'),
     path('generate_post/', generate_post, name='generate_post'),
     path('publish_post/', publish_post, name='publish_post'),
+    path('publish_jobs/<uuid:job_id>/', get_publish_job, name='get_publish_job'),
+    path('generation_jobs/<uuid:job_id>/', get_generation_job, name='get_generation_job'),
     
     # Post Management APIs
     path('post/<str:short_code>/', get_post, name='get_post'),
     
+    # Dashboard landing page (profile + posts + insights)
+    path('overview/', get_dashboard_overview, name='get_dashboard_overview'),
+
     # Instagram Profile & Posts APIs
     path('instagram/profile/', fetch_user_instagram_profile, name='fetch_instagram_profile'),
     path('instagram/posts/', get_all_instagram_posts, name='get_all_instagram_posts'),
+    path('instagram/posts/bulk/', get_instagram_posts_bulk, name='get_instagram_posts_bulk'),
     path('instagram/post/<str:media_id>/', get_post_details, name='get_post_details'),
     
     # Instagram Insights APIs
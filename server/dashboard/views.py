@@ -6,19 +6,58 @@ from rest_framework.permissions import IsAuthenticated
 
 
 from account.models import IGBusinessAccount
-from .models import PostImage, InstagramPost 
+from account.resolver import get_business_accounts, resolve_business_account
+from .models import GenerationJob, PostImage, InstagramPost, InstagramMedia, MediaComment, PublishJob
+from .serializer import (
+    ConversationSerializer,
+    GenerationJobSerializer,
+    InstagramMediaSerializer,
+    MediaCommentSerializer,
+    MessageSerializer,
+    PublishJobSerializer,
+)
+from .tasks import (
+    backfill_account_insights,
+    daily_insight_series,
+    run_generation_job,
+    queue_inbox_backfill,
+    refresh_media_comments,
+    sync_instagram_media,
+    sync_media_for_account,
+)
+from server.utils.renderers import ORJSONRenderer
 from server.utils.logger import logger
-from server.utils.llm_api_calls import expand_prompt, generate_image as generate_image_ai, generate_caption as generate_caption_ai
+from server.utils.llm_api_calls import generate_caption as generate_caption_ai
 from server.utils.sentiment_model import predict_batch, predict_sentiment as analyze_sentiment
 import server.utils.instagram_api as insta_api
-
-
-from io import BytesIO
-from datetime import datetime
-from django.core.files.base import ContentFile
+import server.utils.async_instagram_api as async_insta_api
+from server.utils.graph_client import run_concurrently
+from server.utils.graph_cache import get_business_account, aget_business_account
+
+
+import json
+import hashlib
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from itertools import chain
+from urllib.parse import urlparse
+from datetime import date, datetime, timedelta
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
 
 
+# For GET endpoints that clients poll: browsers may keep the response but must
+# revalidate it every time. ConditionalGetMiddleware then answers 304 while the
+# ETag (or Last-Modified) still matches, so unchanged data is not re-sent.
+revalidate = cache_control(private=True, no_cache=True)
+
 
 @api_view(['POST'])
 @csrf_exempt
@@ -51,32 +90,55 @@ def get_sentiment_score_bulk(request) -> Response:
         return Response({"error": str(e)}, status=500)
 
 
-def generate_post_assets(user_short_prompt: str):
-    print("Expanding prompt...")
-    expanded_prompt = expand_prompt(user_short_prompt)
-    print("Expanded Prompt:", expanded_prompt)
-
-    print("\nGenerating image...")
-    image = generate_image_ai(expanded_prompt)
-    print("Image generated.")
-
-    print("\nGenerating caption...")
-    caption = generate_caption_ai(expanded_prompt, user_short_prompt)
-    print("Caption generated:", caption)
-
-    return expanded_prompt, caption, image
-
+def _queue_generation_job(user, kind: str, prompt: str):
+    """
+    Queue a GenerationJob, or return the user's unfinished job for the same
+    prompt so a double submit or a reload does not start another generation.
 
+    An unfinished job that has not moved for GENERATION_JOB_STALE_MINUTES
+    lost its task (e.g. a worker was killed); it is marked failed and a new
+    job is queued instead.
+    """
+    unfinished = (
+        GenerationJob.objects
+        .filter(user=user, kind=kind, prompt=prompt)
+        .exclude(status__in=[GenerationJob.STORED, GenerationJob.FAILED])
+    )
+    now = timezone.now()
+    stale_before = now - timedelta(minutes=settings.GENERATION_JOB_STALE_MINUTES)
+    unfinished.filter(updated_at__lt=stale_before).update(
+        status=GenerationJob.FAILED,
+        error=f'No progress for {settings.GENERATION_JOB_STALE_MINUTES} minutes',
+        updated_at=now,
+    )
+
+    job = unfinished.order_by('-created_at').first()
+    if job is None:
+        job = GenerationJob.objects.create(user=user, kind=kind, prompt=prompt)
+        job_id = str(job.id)
+        # The worker must not look the job up before its row is committed.
+        transaction.on_commit(lambda: run_generation_job.delay(job_id))
+    return job
+
+
+def _generation_job_response(job) -> Response:
+    return Response({
+        'message': 'Generation queued',
+        'job_id': str(job.id),
+        'status': job.status,
+    }, status=202)
+
+
+@revalidate
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def fetch_user_instagram_profile(request) -> Response:
     """Fetch the Instagram Business Account profile details for the authenticated user."""
     try:
-        custom_user = request.user.customuser
-        business_account = IGBusinessAccount.objects.get(custom_user=custom_user)
+        business_account = resolve_business_account(request)
         access_token = business_account.access_token.access_token
 
-        profile_data = insta_api.fetch_business_account(access_token)
+        profile_data = get_business_account(access_token)
 
         return Response({"profile": profile_data}, status=200)
     
@@ -109,19 +171,17 @@ def generate_caption(request) -> Response:
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generate_image(request) -> Response:
-    """Generate an image using LLM based on the expanded prompt."""
+    """
+    Queue image generation (expand the prompt, then generate the image) and
+    return the job id at once; poll `generation_jobs/<job_id>/` for the result.
+    """
     try:
         short_prompt = request.data.get('prompt', '')
         if not short_prompt:
             return Response({"error": "Prompt is required."}, status=400)
-        
-        expanded_prompt = expand_prompt(short_prompt)
-        image = generate_image_ai(expanded_prompt)
 
-        # Save image to PostImage model
-        post_image = PostImage.objects.create(image=image)
-
-        return Response({"image_url": post_image.image.url})
+        job = _queue_generation_job(request.user, GenerationJob.IMAGE, short_prompt)
+        return _generation_job_response(job)
     except Exception as e:
         logger.error(f"Error generating image: {str(e)}")
         return Response({"error": str(e)}, status=500)
@@ -130,81 +190,160 @@ def generate_image(request) -> Response:
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generate_post(request) -> Response:
+    """
+    Queue post generation (expanded prompt, image and caption) and return the
+    job id at once; poll `generation_jobs/<job_id>/` for progress and result.
+    """
     try:
-        data = request.data
+        prompt = request.data.get('prompt', '')
+        if not prompt:
+            return Response({"error": "Prompt is required."}, status=400)
 
-        prompt = data.get('prompt', '')
-        expanded_prompt, caption, image = generate_post_assets(prompt)
+        job = _queue_generation_job(request.user, GenerationJob.POST, prompt)
+        logger.info(f"Queued post generation job {job.id} for user account {request.user.username}")
+        return _generation_job_response(job)
+    except Exception as e:
+        logger.error(f"Error generating post: {str(e)}")
+        return Response({'error': str(e)}, status=500)
 
-        # Convert PIL Image to Django-compatible file
-        img_io = BytesIO()
-        image.save(img_io, format='WEBP', quality=85)  # or 'PNG', 'JPEG'
-        img_io.seek(0)
-        
-        image_file = ContentFile(img_io.getvalue(), name=f'generated_{prompt[:30]}.webp')
-        
 
-        image = PostImage.objects.create(
-            image=image_file,
-        )
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_generation_job(request, job_id):
+    """
+    Use this to poll a generation job. `status` is the last finished stage
+    (queued, expanded, image, caption, stored or failed); outputs appear as
+    soon as their stage is done.
+    """
+    try:
+        job = GenerationJob.objects.select_related('image').get(id=job_id, user=request.user)
+        return Response(GenerationJobSerializer(job).data, status=200)
+
+    except GenerationJob.DoesNotExist:
+        return Response({'error': 'Generation job not found'}, status=404)
 
-        logger.info(f"Generated post for user account {request.user.username}")
-        return Response({
-            'expanded_prompt': expanded_prompt,
-            'caption': caption,
-            'image_url': image.image.url,
-        }, status=201)
     except Exception as e:
-        logger.error(f"Error generating post: {str(e)}")
+        logger.error(f"Error fetching generation job {job_id}: {e}")
         return Response({'error': str(e)}, status=500)
 
 
+VIDEO_EXTENSIONS = ('.mp4', '.mov')
+
+
+def _carousel_item(url: str) -> dict:
+    path = urlparse(url).path.lower()
+    return {'media_type': 'VIDEO' if path.endswith(VIDEO_EXTENSIONS) else 'IMAGE', 'url': url}
+
+
 @api_view(['POST'])
 @parser_classes([MultiPartParser, FormParser])
 @permission_classes([IsAuthenticated])
 def publish_post(request):
+    """
+    Queue a post for publishing and return its publish job id right away.
+
+    The container creation, media processing and publish steps run in the
+    `run_publish_job` worker; poll `publish_jobs/<job_id>/` for progress.
+    """
     try:
         caption = request.data.get('caption', None)
         image_url = request.data.get('image_url', None)   
         image = request.FILES.get('image', None)
+        media_type = (request.data.get('media_type') or PublishJob.IMAGE).upper()
         scheduled_time = request.data.get('scheduled_time', None) # ISO format string, e.g. "2024-12-31T23:59:00Z"
         scheduled_time = datetime.fromisoformat(scheduled_time) if scheduled_time else None
-        print("Before converting to UTC:", scheduled_time)
-        print(image)
         #convert from local to utc
         if scheduled_time:
             scheduled_time = scheduled_time.astimezone(pytz.UTC)
-        print("After converting to UTC:", scheduled_time)
 
-        if image:
-            post_image = PostImage.objects.create(image=image)
-        elif image_url:
-            post_image = PostImage.objects.create(image_url=image_url)
+        post_image = None
+        items = None
+        cover_url = None
+
+        if media_type == PublishJob.IMAGE:
+            if image:
+                try:
+                    post_image = PostImage.store_images([image.read()])[0]
+                except ValueError as e:
+                    return Response({'error': str(e)}, status=400)
+            elif image_url:
+                post_image = PostImage.objects.create(image_url=image_url)
+            else:
+                return Response({'error': 'Image file or URL is required'}, status=400)
+
+        elif media_type in ('VIDEO', PublishJob.REELS):
+            # Graph only publishes single videos as reels.
+            media_type = PublishJob.REELS
+            video_url = request.data.get('video_url', None)
+            if not video_url:
+                return Response({'error': 'video_url is required'}, status=400)
+            items = [{'media_type': 'VIDEO', 'url': video_url}]
+            cover_url = request.data.get('cover_url', None)
+
+        elif media_type == PublishJob.CAROUSEL:
+            try:
+                uploaded = PostImage.store_images([f.read() for f in request.FILES.getlist('images')])
+            except ValueError as e:
+                return Response({'error': str(e)}, status=400)
+            items = [{'media_type': 'IMAGE', 'url': p.public_url} for p in uploaded]
+            items += [_carousel_item(url) for url in request.data.getlist('media_urls')]
+            if not 2 <= len(items) <= insta_api.CAROUSEL_MAX_ITEMS:
+                return Response({'error': f'A carousel needs between 2 and {insta_api.CAROUSEL_MAX_ITEMS} items'}, status=400)
+            post_image = uploaded[0] if uploaded else None
+
         else:
-            return Response({'error': 'Image file or URL is required'}, status=400)
-        
-        business_account = IGBusinessAccount.objects.get(custom_user=request.user.customuser)
+            return Response({'error': 'media_type must be one of IMAGE, VIDEO, REELS, CAROUSEL'}, status=400)
+
+        business_account = resolve_business_account(request)
         post = InstagramPost.objects.create(
             business_account=business_account,
             caption=caption,
             media=post_image,
             scheduled_time=scheduled_time
         )
-        post_link, media_id = post.publish_to_instagram(request=request)
+        job = post.queue_publish(media_type=media_type, items=items, cover_url=cover_url)
 
-        if post_link == -1:
-            return Response({'message': 'Post scheduled successfully', 'scheduled_time': scheduled_time}, status=200)
+        if scheduled_time and scheduled_time > timezone.now():
+            message = 'Post scheduled successfully'
+        else:
+            message = 'Post queued for publishing'
 
-        return Response({'message': 'Post published successfully', 'post_link': post_link, 'media_id': media_id}, status=200)
+        return Response({
+            'message': message,
+            'job_id': str(job.id),
+            'status': job.status,
+            'scheduled_time': scheduled_time,
+        }, status=202)
 
-    except InstagramPost.DoesNotExist:
-        return Response({'error': 'Post not found'}, status=404)
+    except IGBusinessAccount.DoesNotExist:
+        return Response({'error': 'Instagram Business Account not found'}, status=404)
 
     except Exception as e:
         logger.error(f"Error publishing post: {e}")
         return Response({'error': str(e)}, status=500)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_publish_job(request, job_id):
+    """
+    Use this to poll the progress of a publish job.
+    """
+    try:
+        job = PublishJob.objects.select_related('post').get(
+            id=job_id,
+            post__business_account__custom_user__user=request.user,
+        )
+        return Response(PublishJobSerializer(job).data, status=200)
+
+    except PublishJob.DoesNotExist:
+        return Response({'error': 'Publish job not found'}, status=404)
+
+    except Exception as e:
+        logger.error(f"Error fetching publish job {job_id}: {e}")
+        return Response({'error': str(e)}, status=500)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_post(request, short_code):
@@ -212,9 +351,9 @@ def get_post(request, short_code):
     Use this to fetch instagram post created by our system.
     """
     try:
-        post = InstagramPost.objects.get(short_code=short_code)
-        
-        if post.business_account != request.user.ig_business_account:
+        post = InstagramPost.objects.select_related('business_account', 'media').get(short_code=short_code)
+
+        if post.business_account not in get_business_accounts(request):
             return Response({'error': 'Unauthorized access'}, status=403)
         response_data = {
             'business_account': post.business_account.name,
@@ -234,21 +373,102 @@ def get_post(request, short_code):
         return Response({'error': str(e)}, status=500)
 
 
+def _media_synced_at(business_account) -> datetime | None:
+    # Read fresh: the resolved account may come from the per-process cache.
+    return IGBusinessAccount.objects.filter(pk=business_account.pk).values_list('media_synced_at', flat=True).first()
+
+
+def _mirrored_media(business_account):
+    """
+    The account's InstagramMedia rows. The first visit mirrors the newest
+    page inline and queues the rest; later visits queue a refresh if stale.
+    """
+    media = InstagramMedia.objects.filter(business_account=business_account)
+
+    last_synced = _media_synced_at(business_account)
+    if last_synced is None:
+        # First visit: mirror one page inline so the page is not empty.
+        sync_media_for_account(business_account, max_items=insta_api.PAGE_SIZE)
+        sync_instagram_media.delay(business_account.pk)
+    elif timezone.now() - last_synced > timedelta(seconds=settings.MEDIA_SYNC_INTERVAL):
+        sync_instagram_media.delay(business_account.pk)
+
+    return media
+
+
+def _filter_media(media, params) -> tuple:
+    """
+    Apply the posts list filters, ordering and paging parameters.
+
+    Returns (queryset, offset, limit). Raises ValueError for invalid parameters.
+    """
+    media_type = params.get('media_type')
+    since = params.get('since')
+    until = params.get('until')
+    search = params.get('search')
+
+    if media_type:
+        media = media.filter(media_type=media_type.upper())
+    if since:
+        media = media.filter(timestamp__date__gte=since)
+    if until:
+        media = media.filter(timestamp__date__lte=until)
+    if search:
+        media = media.filter(caption__icontains=search)
+
+    ordering = params.get('ordering', '-timestamp')
+    if ordering.lstrip('-') not in ('timestamp', 'like_count', 'comments_count'):
+        raise ValueError('ordering must be one of timestamp, like_count, comments_count (optionally prefixed with -)')
+    media = media.order_by(ordering, '-timestamp')
+
+    try:
+        limit = max(1, min(int(params.get('limit', 100)), 500))
+        offset = max(0, int(params.get('offset', 0)))
+    except (TypeError, ValueError):
+        raise ValueError('limit and offset must be integers')
+
+    return media, offset, limit
+
+
+def _media_last_modified(business_account) -> datetime | None:
+    """When the account's media mirror was last synced (which may have dropped deleted media)."""
+    return _media_synced_at(business_account)
+
+
+def _set_last_modified(response, when: datetime | None) -> None:
+    if when is not None:
+        response['Last-Modified'] = http_date(when.timestamp())
+
+
+@revalidate
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_all_instagram_posts(request):
     """
     Use this to fetch all instagram posts of a user.
+
+    Served from the local InstagramMedia mirror. Supports filtering
+    (`media_type`, `since`, `until`, `search`), sorting (`ordering`) and
+    pagination (`limit`, `offset`).
     """
     try:
-        custom_user = request.user.customuser
-        print(custom_user)
-        business_account = IGBusinessAccount.objects.get(custom_user=custom_user)
-        business_account_id = business_account.business_account_id
-        access_token = business_account.access_token.access_token
+        business_account = resolve_business_account(request)
 
-        posts = insta_api.fetch_all_posts(business_account_id, access_token)
-        return Response({'posts': posts}, status=200)
+        try:
+            media, offset, limit = _filter_media(_mirrored_media(business_account), request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        count = media.count()
+        posts = InstagramMediaSerializer(media[offset:offset + limit], many=True).data
+
+        response = Response({
+            'posts': posts,
+            'count': count,
+            'next_offset': offset + limit if offset + limit < count else None,
+        }, status=200)
+        _set_last_modified(response, _media_last_modified(business_account))
+        return response
     
     except IGBusinessAccount.DoesNotExist:
         return Response({'error': 'Instagram Business Account not found'}, status=404)
@@ -258,12 +478,12 @@ def get_all_instagram_posts(request):
         return Response({'error': str(e)}, status=500)
     
 
+@revalidate
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_post_details(request, media_id):
     try:
-        custom_user = request.user.customuser
-        business_account = IGBusinessAccount.objects.get(custom_user=custom_user)
+        business_account = resolve_business_account(request)
         access_token = business_account.access_token.access_token
 
         post_details = insta_api.fetch_post_details(media_id, access_token)
@@ -277,19 +497,100 @@ def get_post_details(request, media_id):
         return Response({'error': str(e)}, status=500)
 
 
+@revalidate
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_instagram_insights(request):
+def get_instagram_posts_bulk(request):
+    """
+    Fetch details, insights and comments for several posts at once using
+    Graph batch requests instead of three calls per post.
+    """
     try:
-        custom_user = request.user.customuser
-        business_account = IGBusinessAccount.objects.get(custom_user=custom_user)
-        business_account_id = business_account.business_account_id
+        media_ids = [m.strip() for m in request.query_params.get('ids', '').split(',') if m.strip()]
+        if not media_ids:
+            return Response({'error': 'ids query parameter is required'}, status=400)
+
+        include = request.query_params.get('include')
+        include = tuple(p.strip() for p in include.split(',')) if include else ('details', 'insights', 'comments')
+
+        business_account = resolve_business_account(request)
         access_token = business_account.access_token.access_token
+
+        posts = insta_api.fetch_media_bundle(media_ids, access_token, include=include)
+        return Response({'posts': posts}, status=200)
+
+    except IGBusinessAccount.DoesNotExist:
+        return Response({'error': 'Instagram Business Account not found'}, status=404)
+
+    except Exception as e:
+        logger.error(f"Error fetching Instagram posts in bulk: {e}")
+        return Response({'error': str(e)}, status=500)
+
+
+# Account metrics that are not kept in the local daily insight store.
+NON_DAILY_INSIGHT_METRICS = [m for m in insta_api.USER_INSIGHT_METRICS if m not in insta_api.DAILY_INSIGHT_METRICS]
+
+
+def _daily_insight_range(since: str | None, until: str | None) -> tuple[date, date]:
+    """The [since, until] dates of a daily insights request. Raises ValueError if invalid."""
+    try:
+        until_date = date.fromisoformat(until) if until else timezone.now().date()
+        since_date = date.fromisoformat(since) if since else until_date - timedelta(days=7)
+    except ValueError:
+        raise ValueError('since and until must be dates in YYYY-MM-DD format')
+
+    since_date = max(since_date, timezone.now().date() - timedelta(days=insta_api.INSIGHT_MAX_LOOKBACK_DAYS))
+    if since_date > until_date:
+        raise ValueError('since must not be after until')
+    return since_date, until_date
+
+
+def _totals_since(since_date: date, until_date: date) -> date:
+    """Start of the range the non-daily metrics are fetched for: Graph serves at most its last INSIGHT_WINDOW_DAYS."""
+    return max(since_date, until_date - timedelta(days=insta_api.INSIGHT_WINDOW_DAYS))
+
+
+def _account_insights(business_account, since: str | None, until: str | None, period: str = 'day') -> list:
+    """
+    Account insights for [since, until]. Raises ValueError for a malformed or
+    reversed range, or for periods other than `day` a range longer than
+    INSIGHT_WINDOW_DAYS.
+    """
+    business_account_id = business_account.business_account_id
+    access_token = business_account.access_token.access_token
+
+    if period != 'day':
+        return insta_api.get_all_instagram_user_insights(business_account_id, access_token, since, until, period)
+
+    # Daily time series are answered from the local insight store; Graph
+    # is only asked for the days the store does not have yet.
+    since_date, until_date = _daily_insight_range(since, until)
+
+    backfill_account_insights(business_account, since_date, until_date)
+    insights = daily_insight_series(business_account, since_date, until_date)
+
+    insights += insta_api.get_all_instagram_user_insights(
+        business_account_id, access_token, _totals_since(since_date, until_date).isoformat(), until_date.isoformat(), period,
+        metrics=NON_DAILY_INSIGHT_METRICS,
+    )
+    return insights
+
+
+@revalidate
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_instagram_insights(request):
+    try:
+        business_account = resolve_business_account(request)
         period = request.query_params.get('period', 'day')
         since = request.query_params.get('since', None)
         until = request.query_params.get('until', None)
 
-        insights = insta_api.get_all_instagram_user_insights(business_account_id, access_token, since, until, period)
+        try:
+            insights = _account_insights(business_account, since, until, period)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
         return Response({'insights': insights}, status=200)
     
     except IGBusinessAccount.DoesNotExist:
@@ -300,12 +601,121 @@ def get_instagram_insights(request):
         return Response({'error': str(e)}, status=500)
     
 
+# Threads that load the sections of the dashboard overview side by side.
+_overview_executor = ThreadPoolExecutor(
+    max_workers=settings.DASHBOARD_OVERVIEW_WORKERS,
+    thread_name_prefix='dashboard-overview',
+)
+
+
+def _run_section(loader):
+    started = time.perf_counter()
+    try:
+        return loader(), time.perf_counter() - started
+    finally:
+        # Worker threads outlive the request, so return their connection now.
+        connection.close()
+
+
+def _load_sections(loaders: dict, timeout: float) -> tuple[dict, dict]:
+    """
+    Run each loader in the overview pool and wait up to `timeout` seconds for
+    it, measured from when they all started.
+
+    Returns ({section: result or None}, {section: timing metadata}). A section
+    that fails or runs out of time is reported in its metadata instead of
+    failing the others. A section that times out keeps running in the
+    background; what it fetches still lands in the caches and local stores.
+    """
+    started = time.perf_counter()
+    futures = {name: _overview_executor.submit(_run_section, loader) for name, loader in loaders.items()}
+
+    results, meta = {}, {}
+    for name, future in futures.items():
+        remaining = max(0.0, timeout - (time.perf_counter() - started))
+        try:
+            results[name], elapsed = future.result(timeout=remaining)
+            meta[name] = {'status': 'ok', 'elapsed_ms': round(elapsed * 1000)}
+        except FutureTimeoutError:
+            results[name] = None
+            meta[name] = {'status': 'timeout', 'elapsed_ms': round((time.perf_counter() - started) * 1000)}
+        except Exception as e:
+            logger.error(f"Error loading dashboard overview section {name}: {e}")
+            results[name] = None
+            meta[name] = {
+                'status': 'error',
+                'elapsed_ms': round((time.perf_counter() - started) * 1000),
+                'error': str(e),
+            }
+
+    return results, meta
+
+
+def _data_etag(data) -> str:
+    return quote_etag(hashlib.md5(ORJSONRenderer().render(data), usedforsecurity=False).hexdigest())
+
+
+@revalidate
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_dashboard_overview(request):
+    """
+    Profile, recent posts and account insights in one response.
+
+    The three sections load concurrently, each limited to
+    DASHBOARD_SECTION_TIMEOUT seconds. A section that fails or times out is
+    returned as null and the rest of the payload is still served; `meta`
+    carries per-section status and timing.
+    """
+    try:
+        started = time.perf_counter()
+
+        business_account = resolve_business_account(request)
+        access_token = business_account.access_token.access_token
+
+        period = request.query_params.get('period', 'day')
+        since = request.query_params.get('since', None)
+        until = request.query_params.get('until', None)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 100)), 500))
+        except (TypeError, ValueError):
+            return Response({'error': 'limit must be an integer'}, status=400)
+
+        def load_posts():
+            media = _mirrored_media(business_account).order_by('-timestamp')
+            return InstagramMediaSerializer(media[:limit], many=True).data
+
+        sections, section_meta = _load_sections({
+            'profile': lambda: get_business_account(access_token),
+            'posts': load_posts,
+            'insights': lambda: _account_insights(business_account, since, until, period),
+        }, settings.DASHBOARD_SECTION_TIMEOUT)
+
+        response = Response({
+            **sections,
+            'meta': {
+                'elapsed_ms': round((time.perf_counter() - started) * 1000),
+                'sections': section_meta,
+            },
+        }, status=200)
+        # Timings differ on every call; tag only the data so an unchanged overview still gets 304.
+        response['ETag'] = _data_etag([sections, {name: meta['status'] for name, meta in section_meta.items()}])
+        return response
+
+    except IGBusinessAccount.DoesNotExist:
+        return Response({'error': 'Instagram Business Account not found'}, status=404)
+
+    except Exception as e:
+        logger.error(f"Error fetching dashboard overview: {e}")
+        return Response({'error': str(e)}, status=500)
+
+
+@revalidate
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_instagram_post_insights(request, media_id):
     try:
-        custom_user = request.user.customuser
-        business_account = IGBusinessAccount.objects.get(custom_user=custom_user)
+        business_account = resolve_business_account(request)
         access_token = business_account.access_token.access_token
 
         insights = insta_api.fetch_post_insights(media_id, access_token)
@@ -319,34 +729,25 @@ def get_instagram_post_insights(request, media_id):
         return Response({'error': str(e)}, status=500)
     
 
+@revalidate
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_instagram_post_comments(request, media_id):
+    """
+    Comments of a post with their sentiment, served from the MediaComment
+    cache. Only comments that are new since the last refresh get scored.
+    """
     try:
-        custom_user = request.user.customuser
-        business_account = IGBusinessAccount.objects.get(custom_user=custom_user)
-        access_token = business_account.access_token.access_token
-        raw_comments = insta_api.fetch_comments(media_id, access_token)
-        
-        normalized = []
-        for x in raw_comments:
-            # Try top-level username, then from.username, then from.name, then from.id, finally "Audience Member"
-            from_obj = x.get('from', {}) or {}
-            uname = (
-                x.get('username') or 
-                from_obj.get('username') or 
-                from_obj.get('name') or 
-                from_obj.get('id') or
-                "Audience Member"
-            )
-            normalized.append({
-                'id': x.get('id'),
-                'text': x.get('text'),
-                'username': uname,
-                'timestamp': x.get('timestamp')
-            })
-
-        return Response({'comments': normalized}, status=200)
+        business_account = resolve_business_account(request)
+
+        try:
+            refresh_media_comments(business_account, media_id)
+        except insta_api.GraphAPIError as e:
+            logger.error(str(e))
+            return Response({'error': 'Failed to fetch comments from Instagram API'}, status=502)
+
+        comments = MediaComment.objects.filter(business_account=business_account, media_id=media_id)
+        return Response({'comments': MediaCommentSerializer(comments, many=True).data}, status=200)
     
     except IGBusinessAccount.DoesNotExist:
         return Response({'error': 'Instagram Business Account not found'}, status=404)
@@ -356,16 +757,143 @@ def get_instagram_post_comments(request, media_id):
         return Response({'error': str(e)}, status=500)
 
 
+def _encode_cursor(timestamp: datetime, pk: int) -> str:
+    return urlsafe_b64encode(f'{timestamp.isoformat()}|{pk}'.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Raises ValueError for malformed cursors."""
+    timestamp, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(timestamp), int(pk)
+
+
+def _keyset_page(queryset, field: str, limit: int, before: str | None = None, after: str | None = None):
+    """
+    One page of `queryset`, newest first by (`field`, id). `after` continues
+    to older rows, `before` goes back to newer ones, like Graph cursors.
+
+    Returns (rows newest first, has_older, has_newer).
+    """
+    if before:
+        timestamp, pk = _decode_cursor(before)
+        newer = queryset.filter(Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk}))
+        rows = list(newer.order_by(field, 'id')[:limit + 1])
+        return rows[:limit][::-1], True, len(rows) > limit
+
+    if after:
+        timestamp, pk = _decode_cursor(after)
+        queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk}))
+    rows = list(queryset.order_by(f'-{field}', '-id')[:limit + 1])
+    return rows[:limit], len(rows) > limit, bool(after)
+
+
+def _page_url(request, **cursor) -> str:
+    query = request.query_params.copy()
+    query.pop('before', None)
+    query.pop('after', None)
+    query.update(cursor)
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def _keyset_paging(request, rows, field: str, has_older: bool, has_newer: bool) -> dict:
+    before = _encode_cursor(getattr(rows[0], field), rows[0].pk) if rows else None
+    after = _encode_cursor(getattr(rows[-1], field), rows[-1].pk) if rows else None
+    return {
+        'cursors': {'before': before, 'after': after},
+        'next': _page_url(request, after=after) if has_older and after else None,
+        'previous': _page_url(request, before=before) if has_newer and before else None,
+    }
+
+
+def _local_conversation(business_account, conversation_id: str):
+    """Find a stored thread by its Graph id, or by local id for webhook-only threads."""
+    conversations = business_account.conversations.all()
+    conversation = conversations.filter(conversation_id=conversation_id).first()
+    if conversation is None and conversation_id.isdigit():
+        conversation = conversations.filter(pk=conversation_id).first()
+    return conversation
+
+
+def _local_conversation_pages(conversations, page_size: int):
+    page = []
+    for conversation in conversations.iterator(chunk_size=page_size):
+        page.append(conversation)
+        if len(page) == page_size:
+            yield ConversationSerializer(page, many=True).data
+            page = []
+    if page:
+        yield ConversationSerializer(page, many=True).data
+
+
+def _local_conversations_response(request, business_account, limit: int, paginated: bool, stream: bool):
+    conversations = business_account.conversations.all()
+
+    if paginated:
+        try:
+            rows, has_older, has_newer = _keyset_page(
+                conversations, 'updated_time', limit,
+                before=request.query_params.get('before'),
+                after=request.query_params.get('after'),
+            )
+        except ValueError:
+            return Response({'error': 'Invalid pagination cursor'}, status=400)
+
+        return Response({
+            'conversations': ConversationSerializer(rows, many=True).data,
+            'paging': _keyset_paging(request, rows, 'updated_time', has_older, has_newer),
+        }, status=200)
+
+    if stream:
+        response = StreamingHttpResponse(
+            _ndjson_conversation_pages(_local_conversation_pages(conversations, limit)),
+            content_type='application/x-ndjson',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    all_conversations = ConversationSerializer(conversations, many=True).data
+    return Response({
+        'conversations': all_conversations,
+        'count': len(all_conversations),
+        'paging': None,
+    }, status=200)
+
+
+def _ndjson_conversation_pages(pages):
+    """
+    Serialize conversation pages as newline-delimited JSON, one line per
+    Graph page as soon as it arrives, then a closing `done` (or `error`) line.
+    """
+    count = 0
+    try:
+        for page in pages:
+            count += len(page)
+            yield json.dumps({'conversations': page}) + '\n'
+    except insta_api.GraphAPIError as e:
+        logger.error(str(e))
+        yield json.dumps({'error': 'Failed to fetch conversations from Instagram API', 'count': count}) + '\n'
+        return
+
+    yield json.dumps({'done': True, 'count': count}) + '\n'
+
+
+@revalidate
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_instagram_conversations(request):
     """
     Fetch a paginated list of conversations for the authenticated user's
     Instagram business account.
+
+    With `stream=true` (and `paginated` off) the full list is streamed as
+    NDJSON, one page per line, instead of being buffered.
+
+    Once the account's inbox has been backfilled, everything is served from
+    the local Conversation store without calling Graph.
     """
     try:
-        custom_user = request.user.customuser
-        business_account = IGBusinessAccount.objects.get(custom_user=custom_user)
+        business_account = resolve_business_account(request)
 
         business_account_id = business_account.business_account_id
         access_token = business_account.access_token.access_token
@@ -379,6 +907,13 @@ def get_instagram_conversations(request):
             limit = 50
 
         paginated = str(request.query_params.get('paginated', 'false')).lower() == 'true'
+        stream = str(request.query_params.get('stream', 'false')).lower() == 'true'
+
+        # Served from the local inbox once it has been backfilled; until
+        # then Graph answers while the backfill runs.
+        if business_account.inbox_backfilled_at:
+            return _local_conversations_response(request, business_account, max(1, min(limit, 100)), paginated, stream)
+        queue_inbox_backfill(business_account)
 
         if paginated:
             after = request.query_params.get('after')
@@ -406,28 +941,38 @@ def get_instagram_conversations(request):
                 status=200,
             )
 
-        all_conversations = []
-        after_cursor = None
-        # Safety cap to avoid infinite loop on malformed pagination responses.
+        # Safety cap to avoid walking forever on malformed pagination responses.
         max_pages = 100
 
-        for _ in range(max_pages):
-            data = insta_api.fetch_conversations(
-                business_account_id=business_account_id,
-                access_token=access_token,
-                limit=limit,
-                after=after_cursor,
-            )
+        pages = insta_api.iter_conversation_pages(
+            business_account_id=business_account_id,
+            access_token=access_token,
+            limit=limit,
+            max_items=max(1, min(limit, 100)) * max_pages,
+        )
 
-            if data is None:
+        if stream:
+            # Fetch the first page up front so a failing Graph call still
+            # gets a proper error status instead of a broken stream.
+            try:
+                first_page = next(pages)
+            except insta_api.GraphAPIError as e:
+                logger.error(str(e))
                 return Response({'error': 'Failed to fetch conversations from Instagram API'}, status=502)
 
-            all_conversations.extend(data.get('data', []))
-            paging = data.get('paging', {})
-            after_cursor = (paging.get('cursors') or {}).get('after')
+            response = StreamingHttpResponse(
+                _ndjson_conversation_pages(chain([first_page], pages)),
+                content_type='application/x-ndjson',
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
 
-            if not paging.get('next') or not after_cursor:
-                break
+        try:
+            all_conversations = list(chain.from_iterable(pages))
+        except insta_api.GraphAPIError as e:
+            logger.error(str(e))
+            return Response({'error': 'Failed to fetch conversations from Instagram API'}, status=502)
 
         return Response(
             {
@@ -446,6 +991,7 @@ def get_instagram_conversations(request):
         return Response({'error': str(e)}, status=500)
 
 
+@revalidate
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_instagram_conversation_messages(request, conversation_id):
@@ -453,8 +999,7 @@ def get_instagram_conversation_messages(request, conversation_id):
     Fetch a paginated list of messages for a specific conversation.
     """
     try:
-        custom_user = request.user.customuser
-        business_account = IGBusinessAccount.objects.get(custom_user=custom_user)
+        business_account = resolve_business_account(request)
 
         business_account_id = business_account.business_account_id
         access_token = business_account.access_token.access_token
@@ -470,15 +1015,39 @@ def get_instagram_conversation_messages(request, conversation_id):
         before = request.query_params.get('before')
         after = request.query_params.get('after')
 
-        data = insta_api.fetch_conversation_messages(
-            conversation_id=conversation_id,
-            access_token=access_token,
-            limit=limit,
-            before=before,
-            after=after,
-        )
+        if business_account.inbox_backfilled_at:
+            conversation = _local_conversation(business_account, conversation_id)
+            if conversation is None:
+                return Response({'error': 'Conversation not found'}, status=404)
+
+            try:
+                rows, has_older, has_newer = _keyset_page(
+                    conversation.messages.all(), 'created_time', max(1, min(limit, 100)), before=before, after=after,
+                )
+            except ValueError:
+                return Response({'error': 'Invalid pagination cursor'}, status=400)
+
+            return Response(
+                {
+                    'conversation_id': conversation_id,
+                    # Oldest to newest, like the Graph-backed response below.
+                    'messages': MessageSerializer(rows[::-1], many=True).data,
+                    'paging': _keyset_paging(request, rows, 'created_time', has_older, has_newer),
+                },
+                status=200,
+            )
+        queue_inbox_backfill(business_account)
 
-        me = insta_api.fetch_business_account(access_token)
+        data, me = run_concurrently(
+            async_insta_api.fetch_conversation_messages(
+                conversation_id=conversation_id,
+                access_token=access_token,
+                limit=limit,
+                before=before,
+                after=after,
+            ),
+            aget_business_account(access_token),
+        )
 
         if data is None or me is None:
             return Response({'error': 'Failed to fetch data from Instagram API'}, status=502)
@@ -546,8 +1115,7 @@ def reply_to_instagram_conversation(request, conversation_id):
         if not text or not str(text).strip():
             return Response({'error': 'message is required'}, status=400)
 
-        custom_user = request.user.customuser
-        business_account = IGBusinessAccount.objects.get(custom_user=custom_user)
+        business_account = resolve_business_account(request)
 
         business_account_id = business_account.business_account_id
         access_token = business_account.access_token.access_token
@@ -555,23 +1123,30 @@ def reply_to_instagram_conversation(request, conversation_id):
         if not business_account_id:
             return Response({'error': 'Instagram Business Account ID not found'}, status=400)
 
-        conversation_data = insta_api.fetch_conversation_participants(
-            conversation_id=conversation_id,
-            access_token=access_token,
-        )
-        me = insta_api.fetch_business_account(access_token)
-
+        conversation = None
+        if business_account.inbox_backfilled_at:
+            conversation = _local_conversation(business_account, conversation_id)
 
+        if conversation is not None:
+            recipient = {'id': conversation.participant_id, 'username': conversation.participant_username}
+        else:
+            conversation_data, me = run_concurrently(
+                async_insta_api.fetch_conversation_participants(
+                    conversation_id=conversation_id,
+                    access_token=access_token,
+                ),
+                aget_business_account(access_token),
+            )
 
-        if conversation_data is None:
-            return Response({'error': 'Failed to fetch conversation participants'}, status=502)
+            if conversation_data is None or me is None:
+                return Response({'error': 'Failed to fetch conversation participants'}, status=502)
 
-        participants = (conversation_data.get('participants') or {}).get('data', [])
-        recipient = None
-        for participant in participants:
-            if str(participant.get('username')) != str(me.get('username')):
-                recipient = participant
-                break
+            participants = (conversation_data.get('participants') or {}).get('data', [])
+            recipient = None
+            for participant in participants:
+                if str(participant.get('username')) != str(me.get('username')):
+                    recipient = participant
+                    break
 
         if not recipient:
             return Response({'error': 'Unable to determine conversation recipient'}, status=400)
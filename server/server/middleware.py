@@ -0,0 +1,15 @@
+from django.middleware.gzip import GZipMiddleware
+
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves streaming responses alone.
+
+    Gzip only flushes once the whole stream has been compressed, so a
+    compressed NDJSON stream would reach the client in one chunk at the end.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.get('Content-Type', '').startswith('application/x-ndjson'):
+            return response
+        return super().process_response(request, response)
@@ -50,6 +50,66 @@ CELERY_TASK_SERIALIZER = 'json'
 # Optional but recommended
 CELERY_RESULT_BACKEND = 'django-db'
 
+# Shared cache (Graph object cache in server.utils.graph_cache, sentiment scores in server.utils.sentiment_cache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv("CACHE_REDIS_URL", default=CELERY_BROKER_URL),
+        'OPTIONS': {
+            'socket_connect_timeout': 0.25,
+            'socket_timeout': 0.5,
+        },
+    }
+}
+
+# Local Instagram media mirror (see dashboard.tasks.sync_instagram_media)
+MEDIA_SYNC_INTERVAL = int(os.getenv("MEDIA_SYNC_INTERVAL", default=600))  # seconds
+MEDIA_SYNC_REFRESH_DAYS = int(os.getenv("MEDIA_SYNC_REFRESH_DAYS", default=7))
+# Walk the whole media list this often to drop media deleted on Instagram.
+MEDIA_SYNC_RECONCILE_INTERVAL = int(os.getenv("MEDIA_SYNC_RECONCILE_INTERVAL", default=24 * 60 * 60))  # seconds
+
+# Local daily account insight store (see dashboard.tasks.backfill_account_insights)
+INSIGHT_BACKFILL_DAYS = int(os.getenv("INSIGHT_BACKFILL_DAYS", default=90))
+INSIGHT_BACKFILL_INTERVAL = int(os.getenv("INSIGHT_BACKFILL_INTERVAL", default=6 * 60 * 60))  # seconds
+INSIGHT_REFRESH_DAYS = int(os.getenv("INSIGHT_REFRESH_DAYS", default=2))
+INSIGHT_REFRESH_INTERVAL = int(os.getenv("INSIGHT_REFRESH_INTERVAL", default=3600))  # seconds
+
+# Local DM inbox (see dashboard.tasks.backfill_inbox): messages copied per
+# thread by the one-time Graph backfill; webhooks add everything after that.
+INBOX_BACKFILL_MAX_MESSAGES = int(os.getenv("INBOX_BACKFILL_MAX_MESSAGES", default=500))
+
+# Per-post comment cache with sentiment (see dashboard.tasks.sync_comments_for_media)
+COMMENT_CACHE_TTL = int(os.getenv("COMMENT_CACHE_TTL", default=300))  # seconds
+COMMENT_SYNC_MAX_ITEMS = int(os.getenv("COMMENT_SYNC_MAX_ITEMS", default=5000))
+
+# AI generation jobs (see dashboard.views._queue_generation_job): an unfinished
+# job that has not progressed for this long is considered lost and replaced.
+GENERATION_JOB_STALE_MINUTES = int(os.getenv("GENERATION_JOB_STALE_MINUTES", default=15))
+
+# Aggregated dashboard overview (see dashboard.views.get_dashboard_overview)
+DASHBOARD_SECTION_TIMEOUT = float(os.getenv("DASHBOARD_SECTION_TIMEOUT", default=8))  # seconds
+DASHBOARD_OVERVIEW_WORKERS = int(os.getenv("DASHBOARD_OVERVIEW_WORKERS", default=12))
+
+# Serve the read-only Instagram proxy endpoints with async views (see dashboard.async_views).
+# Only worth turning on when running under an ASGI server such as uvicorn.
+ASYNC_PROXY_VIEWS = os.getenv("ASYNC_PROXY_VIEWS", default="False").lower() == "true"
+
+# Per-process cache of each user's business accounts and tokens (see
+# account.resolver). 0 disables it; keep it short, other processes only see
+# account edits once it expires.
+BUSINESS_ACCOUNT_CACHE_TTL = int(os.getenv("BUSINESS_ACCOUNT_CACHE_TTL", default=0))  # seconds
+
+CELERY_BEAT_SCHEDULE = {
+    'sync-instagram-media': {
+        'task': 'dashboard.tasks.sync_all_instagram_media',
+        'schedule': MEDIA_SYNC_INTERVAL,
+    },
+    'backfill-instagram-insights': {
+        'task': 'dashboard.tasks.backfill_all_instagram_insights',
+        'schedule': INSIGHT_BACKFILL_INTERVAL,
+    },
+}
+
 PUBLIC_URL = os.getenv("PUBLIC_URL", default="http://localhost:8000")
 WEBHOOK_VERIFY_TOKEN = os.getenv("WEBHOOK_VERIFY_TOKEN")
 MODEL_ENDPOINT = os.getenv("MODEL_ENDPOINT", default="http://localhost:11434")
@@ -124,6 +184,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compress responses (streams excepted), then answer unchanged GETs with 304 (ETag / Last-Modified).
+    'server.middleware.StreamingAwareGZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -185,7 +248,11 @@ AUTH_PASSWORD_VALIDATORS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'server.utils.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
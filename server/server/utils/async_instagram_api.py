@@ -0,0 +1,782 @@
+"""
+Async variant of `instagram_api`.
+
+Every function mirrors its sync namesake (same name, arguments and return
+value) but is a coroutine running on a pooled `httpx.AsyncClient`, so several
+Graph calls can be in flight at once:
+
+    from server.utils import async_instagram_api as async_insta_api
+    from server.utils.graph_client import run_concurrently
+
+    messages, me = run_concurrently(
+        async_insta_api.fetch_conversation_messages(conversation_id, access_token),
+        async_insta_api.fetch_business_account(access_token),
+    )
+"""
+import asyncio
+import os
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Any, AsyncIterator, Dict
+
+import httpx
+
+from .graph_client import AsyncGraphClient
+from .instagram_api import (
+    API_VERSION,
+    HOST_URL,
+    BUSINESS_ACCOUNT_FIELDS,
+    OTHER_ACCOUNT_FIELDS,
+    PROFILE_FIELDS,
+    POST_FIELDS,
+    POST_DETAIL_FIELDS,
+    COMMENT_FIELDS,
+    CONVERSATION_FIELDS,
+    MESSAGE_FIELDS,
+    POST_INSIGHT_METRICS,
+    INSIGHT_METRIC_GROUPS,
+    PAGE_SIZE,
+    PUBLISH_RETRY_POLICY,
+    READ_RETRY_POLICY,
+    WRITE_RETRY_POLICY,
+    GraphAPIError,
+    RetryPolicy,
+    retry_after_seconds,
+    graph_rate_limiter,
+    parse_daily_insight_points,
+    is_invalid_metric_error,
+    _check_insight_range,
+    _match_published_media,
+)
+from .graph_cache import aget_business_account, graph_object_cache
+from .logger import logger
+from .rate_limiter import GraphRateLimitExceeded
+
+
+async_graph_client = AsyncGraphClient(rate_limiter=graph_rate_limiter)
+
+
+async def fetch_business_account(access_token: str):
+    url = f'{HOST_URL}me'
+    params = {
+        'fields': BUSINESS_ACCOUNT_FIELDS,
+        'access_token': access_token
+    }
+
+    response = await async_graph_client.get(url, params=params)
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        logger.error(f'Error fetching account ID: {response.status_code} - {response.text}')
+        return None
+
+
+async def fetch_others_accounts(access_token: str, account_id: str):
+    url = f'{HOST_URL}{account_id}'
+    params = {
+        'fields': OTHER_ACCOUNT_FIELDS,
+        'access_token': access_token
+    }
+
+    response = await async_graph_client.get(url, params=params)
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        logger.error(f'Error fetching other business accounts: {response.status_code} - {response.text}')
+        return None
+
+
+async def request_with_retry(policy: RetryPolicy, stage: str, method: str, url: str, **kwargs):
+    """
+    Async variant of `instagram_api.request_with_retry`.
+
+    Returns the final response (successful or not). Exceptions that the policy
+    does not retry, or that persist past the last attempt, propagate. Retries
+    always sleep: coroutines run on the event loop, never as the Celery task
+    itself, so there is no task to defer.
+    """
+    for attempt in range(policy.max_attempts):
+        response = None
+        try:
+            response = await async_graph_client.request(method, url, **kwargs)
+            if not policy.should_retry_response(response):
+                return response
+            logger.warning(f'Retryable Graph error on {stage}: {response.status_code} - {response.text}')
+        except GraphRateLimitExceeded:
+            raise
+        except httpx.HTTPError as e:
+            if not policy.should_retry_exception(e) or attempt == policy.max_attempts - 1:
+                raise
+            logger.warning(f'Retryable Graph exception on {stage}: {e}')
+
+        if attempt == policy.max_attempts - 1:
+            break
+
+        delay = policy.backoff(attempt, retry_after_seconds(response))
+        if delay > policy.max_delay:
+            break
+        await asyncio.sleep(delay)
+
+    return response
+
+
+async def generate_creation_object(image_url: str, caption: str, access_token: str, business_account_id: str, api_version: str = API_VERSION):
+    url = f'{HOST_URL}{api_version}/{business_account_id}/media'
+    payload = {
+        'image_url': image_url,
+        'caption': caption,
+        'access_token': access_token
+    }
+
+    response = await request_with_retry(WRITE_RETRY_POLICY, 'create_container', 'POST', url, data=payload)
+
+    if response.status_code == 200:
+        return response.json().get('id')
+    else:
+        logger.error(f'Error generating creation object: {response.status_code} - {response.text}')
+        return None
+
+
+async def fetch_container_status(creation_id: str, access_token: str, api_version: str = API_VERSION):
+    url = f'{HOST_URL}{api_version}/{creation_id}'
+    params = {
+        'fields': 'status_code',
+        'access_token': access_token
+    }
+
+    response = await request_with_retry(READ_RETRY_POLICY, 'container_status', 'GET', url, params=params)
+
+    if response.status_code == 200:
+        return response.json().get('status_code')
+    else:
+        logger.error(f'Error fetching container status: {response.status_code} - {response.text}')
+        return None
+
+
+async def _find_published_media(
+    caption: str | None,
+    business_account_id: str,
+    access_token: str,
+    published_after: datetime | None,
+    api_version: str = API_VERSION,
+):
+    """Async variant of `instagram_api._find_published_media`."""
+    url = f'{HOST_URL}{api_version}/{business_account_id}/media'
+    params = {
+        'fields': 'id,caption,timestamp',
+        'limit': 10,
+        'access_token': access_token
+    }
+
+    response = await request_with_retry(READ_RETRY_POLICY, 'find_published_media', 'GET', url, params=params)
+    if response.status_code != 200:
+        return None
+
+    return _match_published_media(response.json().get('data', []), caption, published_after)
+
+
+async def publish_creation(
+    creation_id: str,
+    access_token: str,
+    business_account_id: str,
+    retry_policy: RetryPolicy = PUBLISH_RETRY_POLICY,
+    api_version: str = API_VERSION,
+    caption: str | None = None,
+    resumed: bool = False,
+    published_after: datetime | None = None,
+):
+    """
+    Async variant of `instagram_api.publish_creation`. Repeat attempts (and
+    the first one when `resumed`) first check the container so an earlier
+    successful attempt is never repeated.
+    """
+    publish_url = f'{HOST_URL}{api_version}/{business_account_id}/media_publish'
+    publish_payload = {
+        'creation_id': creation_id,
+        'access_token': access_token
+    }
+
+    publish_response = None
+    for attempt in range(retry_policy.max_attempts):
+        if (attempt > 0 or resumed) and await fetch_container_status(creation_id, access_token) == 'PUBLISHED':
+            logger.warning(f'Container {creation_id} was already published by an earlier attempt.')
+            return await _find_published_media(caption, business_account_id, access_token, published_after)
+
+        publish_response = None
+        try:
+            publish_response = await async_graph_client.post(publish_url, data=publish_payload)
+            if publish_response.status_code == 200:
+                logger.info('Media published successfully!')
+                return publish_response.json().get('id')
+
+            if not retry_policy.should_retry_response(publish_response):
+                break
+            logger.warning(f'Error publishing media: {publish_response.status_code} - {publish_response.text}')
+        except GraphRateLimitExceeded:
+            raise
+        except httpx.HTTPError as e:
+            if not retry_policy.should_retry_exception(e):
+                raise
+            logger.warning(f'Exception publishing media: {e}')
+
+        if attempt == retry_policy.max_attempts - 1:
+            break
+
+        delay = retry_policy.backoff(attempt, retry_after_seconds(publish_response))
+        if delay > retry_policy.max_delay:
+            break
+        await asyncio.sleep(delay)
+
+    if publish_response is not None:
+        logger.error(f'Error publishing media: {publish_response.status_code} - {publish_response.text}')
+    else:
+        logger.error(f'Error publishing media: container {creation_id} could not be published.')
+    return None
+
+
+async def get_post_permalink(media_id: str, access_token: str, api_version: str = API_VERSION):
+    url = f'{HOST_URL}{api_version}/{media_id}'
+    params = {
+        'fields': 'permalink',
+        'access_token': access_token
+    }
+
+    response = await request_with_retry(READ_RETRY_POLICY, 'permalink', 'GET', url, params=params)
+
+    if response.status_code == 200:
+        return response.json().get('permalink')
+    else:
+        logger.error(f'Error fetching post permalink: {response.status_code} - {response.text}')
+        return None
+
+
+async def create_and_publish_post(
+    image_url: str,
+    caption: str,
+    access_token: str,
+    business_account_id: str,
+    creation_id: str | None = None,
+    published_after: datetime | None = None,
+):
+    """
+    Async variant of `instagram_api.create_and_publish_post`: pass the
+    `creation_id` of an earlier attempt (and when it was created as
+    `published_after`) to publish that container instead of creating a new one.
+    """
+    resumed = bool(creation_id)
+    if not creation_id:
+        published_after = published_after or datetime.now(dt_timezone.utc)
+        creation_id = await generate_creation_object(image_url, caption, access_token, business_account_id)
+    if not creation_id:
+        return None, None
+
+    media_id = await publish_creation(
+        creation_id, access_token, business_account_id,
+        caption=caption, resumed=resumed, published_after=published_after,
+    )
+    if media_id:
+        permalink = await get_post_permalink(media_id, access_token)
+        if permalink:
+            logger.info(f'Post published successfully! View it at: {permalink}')
+            return permalink, media_id
+    return None, None
+
+
+async def fetch_long_lived_token(code: str, api_version: str = API_VERSION) -> str:
+    short_lived_token_url = 'https://api.instagram.com/oauth/access_token'
+    long_lived_token_url = f'{HOST_URL}{api_version}/access_token'
+
+    client_secret = os.getenv('INSTAGRAM_CLIENT_SECRET')
+
+    payload = {
+        'client_id': os.getenv('INSTAGRAM_CLIENT_ID'),
+        'client_secret': client_secret,
+        'grant_type': 'authorization_code',
+        'redirect_uri': os.getenv('INSTAGRAM_REDIRECT_URI'),
+        'code': code
+    }
+
+    response = await async_graph_client.post(short_lived_token_url, data=payload)
+
+    if not response.status_code == 200:
+        logger.error(f'Error fetching short-lived token: {response.status_code} - {response.text}')
+        return None
+
+    long_lived_payload = {
+        'grant_type': 'ig_exchange',
+        'client_secret': client_secret,
+        'access_token': response.json().get('access_token')
+    }
+
+    response = await async_graph_client.post(long_lived_token_url, data=long_lived_payload)
+
+    if response.status_code == 200:
+        return response.json().get('access_token')
+    else:
+        logger.error(f'Error fetching long-lived token: {response.status_code} - {response.text}')
+        return None
+
+
+async def fetch_all_posts(business_account_id: str, access_token: str, api_version: str = API_VERSION, max_items: int | None = None):
+    try:
+        return [post async for post in iter_posts(business_account_id, access_token, max_items=max_items, api_version=api_version)]
+    except GraphAPIError as e:
+        logger.error(str(e))
+        return None
+
+
+async def fetch_post_details(media_id: str, access_token: str, api_version: str = API_VERSION):
+    url = f'{HOST_URL}{api_version}/{media_id}'
+    params = {
+        'fields': POST_DETAIL_FIELDS,
+        'access_token': access_token
+    }
+
+    response = await async_graph_client.get(url, params=params)
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        logger.error(f'Error fetching post details: {response.status_code} - {response.text}')
+        return None
+
+
+async def fetch_comments(media_id: str, access_token: str, api_version: str = API_VERSION, max_items: int | None = None):
+    try:
+        return [comment async for comment in iter_comments(media_id, access_token, max_items=max_items, api_version=api_version)]
+    except GraphAPIError as e:
+        logger.error(str(e))
+        return None
+
+
+async def fetch_post_insights(media_id: str, access_token: str, api_version: str = API_VERSION):
+    url = f'{HOST_URL}{api_version}/{media_id}/insights'
+    params = {
+        'metric': ','.join(POST_INSIGHT_METRICS),
+        'access_token': access_token
+    }
+
+    response = await async_graph_client.get(url, params=params)
+
+    if response.status_code == 200:
+        return response.json().get('data', [])
+    else:
+        logger.error(f'Error fetching post insights: {response.status_code} - {response.text}')
+        return None
+
+
+def _json_or_none(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+async def fetch_insight_group(
+    user_id: str,
+    access_token: str,
+    group: str,
+    account_type: str | None = None,
+    only: set[str] | None = None,
+    api_version: str = API_VERSION,
+    **params,
+) -> list[Dict[str, Any]] | None:
+    """
+    Fetch one INSIGHT_METRIC_GROUPS group, asking only for the metrics Graph
+    supports for this account type (optionally narrowed to `only`).
+
+    The supported metrics are learned once per account type, group and
+    period: when Graph rejects the group because of an unsupported metric,
+    each metric is retried on its own (concurrently), the accepted ones are
+    cached, and their responses are returned as the result. Later calls go
+    straight to a single request with the cached metrics.
+
+    Returns the raw `data` entries, or None if the group could not be fetched.
+    """
+    url = f'{HOST_URL}{api_version}/{user_id}/insights'
+    group_metrics, group_params = INSIGHT_METRIC_GROUPS[group]
+    request_params = {**params, **group_params, 'access_token': access_token}
+
+    cache_name = f"{account_type or 'unknown'}:{group}:{request_params.get('period')}"
+    supported = await asyncio.to_thread(graph_object_cache.get_value, 'insight_metrics', cache_name)
+
+    metrics = [m for m in (group_metrics if supported is None else supported) if not only or m in only]
+    if not metrics:
+        return []
+
+    response = await async_graph_client.get(url, params={**request_params, 'metric': ','.join(metrics)})
+    if response.status_code == 200:
+        return response.json().get('data', [])
+
+    if not is_invalid_metric_error(_json_or_none(response)):
+        logger.error(f'Error fetching {group} insights: {response.status_code} - {response.text}')
+        return None
+
+    responses = await asyncio.gather(*(
+        async_graph_client.get(url, params={**request_params, 'metric': metric})
+        for metric in metrics
+    ))
+
+    data, accepted, rejected = [], [], []
+    for metric, metric_response in zip(metrics, responses):
+        if metric_response.status_code == 200:
+            accepted.append(metric)
+            data.extend(metric_response.json().get('data', []))
+        elif is_invalid_metric_error(_json_or_none(metric_response)):
+            rejected.append(metric)
+
+    # Only remember the result if every metric gave a clear answer and at
+    # least one worked; "everything rejected" usually means bad parameters.
+    # Metrics outside `only` were not probed and stay candidates.
+    if accepted and len(accepted) + len(rejected) == len(metrics):
+        candidates = group_metrics if supported is None else supported
+        await asyncio.to_thread(
+            graph_object_cache.set_value, 'insight_metrics', cache_name,
+            [m for m in candidates if m not in rejected],
+        )
+        logger.info(f'Unsupported {group} insight metrics for {account_type} accounts: {rejected}')
+
+    return data
+
+
+async def fetch_user_insights(
+    user_id: str,
+    access_token: str,
+    groups: list[str] | None = None,
+    metrics: list[str] | None = None,
+    account_type: str | None = None,
+    api_version: str = API_VERSION,
+    **params,
+) -> Dict[str, list[Dict[str, Any]] | None]:
+    """
+    Fetch several insight groups concurrently. Returns {group: data or None}.
+
+    `metrics` narrows the request; groups without any requested metric are
+    skipped. The account type is looked up (cached) when not given.
+    """
+    only = set(metrics) if metrics else None
+    groups = [
+        group for group in (groups or INSIGHT_METRIC_GROUPS)
+        if not only or only.intersection(INSIGHT_METRIC_GROUPS[group][0])
+    ]
+
+    if account_type is None:
+        account = await aget_business_account(access_token)
+        account_type = (account or {}).get('account_type')
+
+    results = await asyncio.gather(*(
+        fetch_insight_group(user_id, access_token, group, account_type=account_type, only=only, api_version=api_version, **params)
+        for group in groups
+    ))
+    return dict(zip(groups, results))
+
+
+async def fetch_account_and_audience_insights(user_id: str, access_token: str, api_version: str = API_VERSION, duration='week'):
+    groups = await fetch_user_insights(user_id, access_token, api_version=api_version, period=duration)
+
+    account_groups = [data for group, data in groups.items() if group != 'demographics' and data is not None]
+    if account_groups:
+        account_metrics = {e.get('name'): e.get('values') or e.get('total_value') or e.get('value') for data in account_groups for e in data}
+    else:
+        account_metrics = None
+
+    if groups.get('demographics') is None:
+        demographics = None
+        logger.warning('Could not fetch demographics')
+    else:
+        demographics = {e.get('name'): e.get('values') or e.get('total_value') or e.get('value') for e in groups['demographics']}
+
+    return {
+        'account_metrics': account_metrics,
+        'demographics': demographics
+    }
+
+
+async def reply_to_message(recipient_id: str, message: str, access_token: str, business_account_id: str, api_version: str = API_VERSION):
+    url = f'{HOST_URL}{api_version}/{business_account_id}/messages'
+    payload = {
+        'recipient': {'id': recipient_id},
+        'message': {'text': message},
+        'access_token': access_token
+    }
+    try:
+        resp = await async_graph_client.post(url, json=payload)
+        if resp.status_code == 200:
+            logger.info(f"Replied to {recipient_id} with message: {message}")
+            return True
+        else:
+            logger.error(f"Error replying to message: {resp.status_code} - {resp.text}")
+            return False
+    except GraphRateLimitExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Exception while replying to message: {str(e)}")
+        return False
+
+
+async def fetch_profile_info(business_account_id: str, access_token: str, api_version: str = API_VERSION):
+    url = f'{HOST_URL}{api_version}/{business_account_id}'
+    params = {
+        'fields': PROFILE_FIELDS,
+        'access_token': access_token
+    }
+
+    response = await async_graph_client.get(url, params=params)
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        logger.error(f'Error fetching profile info: {response.status_code} - {response.text}')
+        return None
+
+
+async def fetch_conversations(
+    business_account_id: str,
+    access_token: str,
+    limit: int = 20,
+    after: str | None = None,
+    api_version: str = API_VERSION,
+):
+    """
+    Fetch a page of Instagram DM conversations for a business account.
+    """
+    url = f'{HOST_URL}{api_version}/{business_account_id}/conversations'
+    params = {
+        'fields': CONVERSATION_FIELDS,
+        'limit': max(1, min(limit, 100)),
+        'access_token': access_token,
+    }
+
+    if after:
+        params['after'] = after
+
+    response = await async_graph_client.get(url, params=params)
+
+    if response.status_code == 200:
+        return response.json()
+
+    logger.error(f'Error fetching conversations: {response.status_code} - {response.text}')
+    return None
+
+
+async def fetch_conversation_messages(
+    conversation_id: str,
+    access_token: str,
+    limit: int = 20,
+    before: str | None = None,
+    after: str | None = None,
+    api_version: str = API_VERSION,
+):
+    """
+    Fetch a page of messages for a specific Instagram DM conversation.
+    """
+    url = f'{HOST_URL}{api_version}/{conversation_id}/messages'
+    params = {
+        'fields': MESSAGE_FIELDS,
+        'limit': max(1, min(limit, 100)),
+        'access_token': access_token,
+    }
+
+    if before:
+        params['before'] = before
+    if after:
+        params['after'] = after
+
+    response = await async_graph_client.get(url, params=params)
+
+    if response.status_code == 200:
+        return response.json()
+
+    logger.error(f'Error fetching conversation messages: {response.status_code} - {response.text}')
+    return None
+
+
+async def fetch_conversation_participants(
+    conversation_id: str,
+    access_token: str,
+    api_version: str = API_VERSION,
+):
+    """
+    Fetch participants for a conversation. Useful to determine reply recipient.
+    """
+    url = f'{HOST_URL}{api_version}/{conversation_id}'
+    params = {
+        'fields': CONVERSATION_FIELDS,
+        'access_token': access_token,
+    }
+
+    response = await async_graph_client.get(url, params=params)
+
+    if response.status_code == 200:
+        return response.json()
+
+    logger.error(f'Error fetching conversation participants: {response.status_code} - {response.text}')
+    return None
+
+
+async def _fetch_page(stage: str, url: str, params: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    response = await request_with_retry(READ_RETRY_POLICY, stage, 'GET', url, params=params)
+    if response.status_code != 200:
+        raise GraphAPIError(stage, response.status_code, response.text)
+    return response.json()
+
+
+async def iter_pages(
+    stage: str,
+    url: str,
+    params: Dict[str, Any] | None = None,
+    max_items: int | None = None,
+) -> AsyncIterator[list[Dict[str, Any]]]:
+    """
+    Async variant of `instagram_api.iter_pages`. The next page is requested
+    as soon as the current one arrives.
+    """
+    remaining = max_items
+    pending = None
+
+    try:
+        page = await _fetch_page(stage, url, params)
+        while True:
+            data = page.get('data', [])
+            if remaining is not None:
+                data = data[:remaining]
+                remaining -= len(data)
+
+            next_url = (page.get('paging') or {}).get('next')
+            has_more = bool(next_url and data and (remaining is None or remaining > 0))
+
+            if has_more:
+                pending = asyncio.ensure_future(_fetch_page(stage, next_url))
+
+            yield data
+
+            if not has_more:
+                return
+
+            page = await pending
+            pending = None
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def iter_posts(
+    business_account_id: str,
+    access_token: str,
+    max_items: int | None = None,
+    page_size: int = PAGE_SIZE,
+    api_version: str = API_VERSION,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Async variant of `instagram_api.iter_posts`."""
+    url = f'{HOST_URL}{api_version}/{business_account_id}/media'
+    params = {
+        'fields': POST_FIELDS,
+        'limit': min(page_size, max_items) if max_items else page_size,
+        'access_token': access_token
+    }
+    async for page in iter_pages('posts', url, params, max_items=max_items):
+        for post in page:
+            yield post
+
+
+async def iter_comments(
+    media_id: str,
+    access_token: str,
+    max_items: int | None = None,
+    page_size: int = PAGE_SIZE,
+    api_version: str = API_VERSION,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Async variant of `instagram_api.iter_comments`."""
+    url = f'{HOST_URL}{api_version}/{media_id}/comments'
+    params = {
+        'fields': COMMENT_FIELDS,
+        'limit': min(page_size, max_items) if max_items else page_size,
+        'access_token': access_token
+    }
+    async for page in iter_pages('comments', url, params, max_items=max_items):
+        for comment in page:
+            yield comment
+
+
+def iter_conversation_pages(
+    business_account_id: str,
+    access_token: str,
+    limit: int = 20,
+    max_items: int | None = None,
+    api_version: str = API_VERSION,
+) -> AsyncIterator[list[Dict[str, Any]]]:
+    """Async variant of `instagram_api.iter_conversation_pages`."""
+    url = f'{HOST_URL}{api_version}/{business_account_id}/conversations'
+    params = {
+        'fields': CONVERSATION_FIELDS,
+        'limit': max(1, min(limit, 100)),
+        'access_token': access_token,
+    }
+    return iter_pages('conversations', url, params, max_items=max_items)
+
+
+async def fetch_daily_insights_window(
+    user_id: str,
+    access_token: str,
+    metrics: list[str],
+    start: date,
+    end: date,
+    api_version: str = API_VERSION,
+) -> list[tuple[str, date, Any]] | None:
+    """
+    Async variant of `instagram_api.fetch_daily_insights_window`.
+    """
+    url = f'{HOST_URL}{api_version}/{user_id}/insights'
+    params = {
+        'metric': ','.join(metrics),
+        'period': 'day',
+        'since': start.isoformat(),
+        'until': (end + timedelta(days=1)).isoformat(),
+        'access_token': access_token,
+    }
+
+    response = await async_graph_client.get(url, params=params)
+
+    if response.status_code == 200:
+        return parse_daily_insight_points(response.json().get('data', []), start, end)
+    else:
+        logger.error(f'Error fetching daily insights: {response.status_code} - {response.text}')
+        return None
+
+
+async def get_all_instagram_user_insights(
+    user_id: str,
+    access_token: str,
+    since: str | None = None,
+    until: str | None = None,
+    period: str | None = "day",
+    api_version: str = API_VERSION,
+    metrics: list[str] | None = None,
+) -> list[Dict[str, Any]]:
+    """
+    Async variant of `instagram_api.get_all_instagram_user_insights`.
+    """
+    results: list[Dict[str, Any]] = []
+
+    if not until:
+        until = datetime.now().date().isoformat()
+    if not since:
+        since = (datetime.now().date() - timedelta(days=7)).isoformat()
+
+    _check_insight_range(since, until)
+
+    groups = await fetch_user_insights(
+        user_id, access_token, metrics=metrics, api_version=api_version,
+        period=period, since=since, until=until,
+    )
+
+    for data in groups.values():
+        for metric_data in data or []:
+            metric_name = metric_data.get("name")
+            if metric_name:
+                results.append({
+                    metric_name: metric_data
+                })
+
+    return results
@@ -0,0 +1,286 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .logger import logger
+from .utility_functions import hash_text
+
+
+CACHE_ALIAS = os.getenv('META_CACHE_ALIAS', 'default')
+LOCAL_MAXSIZE = int(os.getenv('META_CACHE_LOCAL_MAXSIZE', 1024))
+
+# The in-process tier cannot see invalidations made by other processes, so its
+# entries never outlive this many seconds regardless of the object's TTL.
+LOCAL_MAX_TTL = float(os.getenv('META_CACHE_LOCAL_MAX_TTL', 60))
+
+# Per-object TTLs in seconds. The business account (id, username) almost never
+# changes; the profile carries follower/media counts, so it is kept shorter.
+OBJECT_TTLS = {
+    'business_account': int(os.getenv('META_CACHE_TTL_BUSINESS_ACCOUNT', 3600)),
+    'profile': int(os.getenv('META_CACHE_TTL_PROFILE', 300)),
+    # Which insight metrics Graph accepts for an account type; changes only with API versions.
+    'insight_metrics': int(os.getenv('META_CACHE_TTL_INSIGHT_METRICS', 7 * 24 * 3600)),
+}
+
+KEY_PREFIX = 'graph:object'
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU with a per-entry expiry."""
+
+    def __init__(self, maxsize: int = LOCAL_MAXSIZE):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class TwoTierCache:
+    """
+    An in-process LRU in front of the shared Django cache (Redis).
+
+    If the shared cache is unreachable or Django is not configured, the cache
+    degrades to the in-process tier for 30 seconds instead of failing the
+    request.
+    """
+
+    name = 'Cache'
+
+    def __init__(self, alias: str = CACHE_ALIAS, local: LRUCache | None = None, shared=None):
+        self.alias = alias
+        self.local = local or LRUCache()
+        self._shared_cache = shared
+        self._unavailable_until = 0.0
+
+    def _shared(self):
+        if time.monotonic() < self._unavailable_until:
+            return None
+        if self._shared_cache is None:
+            from django.core.cache import caches
+            self._shared_cache = caches[self.alias]
+        return self._shared_cache
+
+    def _shared_down(self, e: Exception) -> None:
+        if time.monotonic() >= self._unavailable_until:
+            logger.warning(f'{self.name} falling back to in-process tier for 30s: {e}')
+        self._unavailable_until = time.monotonic() + 30
+
+    def _shared_get(self, key: str):
+        try:
+            shared = self._shared()
+            return _MISSING if shared is None else shared.get(key, _MISSING)
+        except Exception as e:
+            self._shared_down(e)
+            return _MISSING
+
+    def _shared_set(self, key: str, value, ttl: int) -> None:
+        try:
+            shared = self._shared()
+            if shared is not None:
+                shared.set(key, value, ttl)
+        except Exception as e:
+            self._shared_down(e)
+
+    def _shared_delete(self, key: str) -> None:
+        try:
+            shared = self._shared()
+            if shared is not None:
+                shared.delete(key)
+        except Exception as e:
+            self._shared_down(e)
+
+    def _shared_get_many(self, keys: list[str]) -> dict:
+        """Values found for `keys`, in one round trip."""
+        try:
+            shared = self._shared()
+            return {} if shared is None else shared.get_many(keys)
+        except Exception as e:
+            self._shared_down(e)
+            return {}
+
+    def _shared_set_many(self, values: dict, ttl: int) -> None:
+        try:
+            shared = self._shared()
+            if shared is not None:
+                shared.set_many(values, ttl)
+        except Exception as e:
+            self._shared_down(e)
+
+
+class GraphObjectCache(TwoTierCache):
+    """
+    Two-tier read-through cache for slow-changing Graph objects.
+
+    Lookups check an in-process LRU first, then the shared Django cache
+    (Redis), and only then call Graph. Keys are built from the object kind, a
+    hash of the access token (so tokens never reach the cache backend) and the
+    object id. Failed fetches (None) are not cached.
+    """
+
+    name = 'Graph object cache'
+
+    def __init__(
+        self,
+        alias: str = CACHE_ALIAS,
+        ttls: dict[str, int] | None = None,
+        local: LRUCache | None = None,
+        shared=None,
+    ):
+        super().__init__(alias, local, shared)
+        self.ttls = ttls or OBJECT_TTLS
+
+    @staticmethod
+    def key(kind: str, access_token: str, object_id: str = 'me') -> str:
+        return f'{KEY_PREFIX}:{kind}:{hash_text(access_token)}:{object_id}'
+
+    def _local_ttl(self, kind: str) -> float:
+        return min(self.ttls[kind], LOCAL_MAX_TTL)
+
+    def get_or_fetch(self, kind: str, access_token: str, object_id: str, fetch):
+        key = self.key(kind, access_token, object_id)
+
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+
+        value = self._shared_get(key)
+        if value is not _MISSING:
+            self.local.set(key, value, self._local_ttl(kind))
+            return value
+
+        value = fetch()
+        if value is not None:
+            self.local.set(key, value, self._local_ttl(kind))
+            self._shared_set(key, value, self.ttls[kind])
+        return value
+
+    async def aget_or_fetch(self, kind: str, access_token: str, object_id: str, fetch):
+        """Async variant; `fetch` is a zero-argument coroutine function."""
+        key = self.key(kind, access_token, object_id)
+
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+
+        value = await asyncio.to_thread(self._shared_get, key)
+        if value is not _MISSING:
+            self.local.set(key, value, self._local_ttl(kind))
+            return value
+
+        value = await fetch()
+        if value is not None:
+            self.local.set(key, value, self._local_ttl(kind))
+            await asyncio.to_thread(self._shared_set, key, value, self.ttls[kind])
+        return value
+
+    def get_value(self, kind: str, name: str):
+        """Look up an entry that is not scoped to an access token. Returns None if absent."""
+        key = f'{KEY_PREFIX}:{kind}:{name}'
+
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+
+        value = self._shared_get(key)
+        if value is _MISSING:
+            return None
+        self.local.set(key, value, self._local_ttl(kind))
+        return value
+
+    def set_value(self, kind: str, name: str, value) -> None:
+        key = f'{KEY_PREFIX}:{kind}:{name}'
+        self.local.set(key, value, self._local_ttl(kind))
+        self._shared_set(key, value, self.ttls[kind])
+
+    def invalidate(self, kind: str, access_token: str, object_id: str = 'me') -> None:
+        key = self.key(kind, access_token, object_id)
+        self.local.delete(key)
+        self._shared_delete(key)
+
+
+graph_object_cache = GraphObjectCache()
+
+
+def get_business_account(access_token: str):
+    """Cached `instagram_api.fetch_business_account`."""
+    from . import instagram_api as insta_api
+
+    return graph_object_cache.get_or_fetch(
+        'business_account', access_token, 'me',
+        lambda: insta_api.fetch_business_account(access_token),
+    )
+
+
+async def aget_business_account(access_token: str):
+    """Cached `async_instagram_api.fetch_business_account`."""
+    from . import async_instagram_api as async_insta_api
+
+    return await graph_object_cache.aget_or_fetch(
+        'business_account', access_token, 'me',
+        lambda: async_insta_api.fetch_business_account(access_token),
+    )
+
+
+def get_profile_info(business_account_id: str, access_token: str):
+    """Cached `instagram_api.fetch_profile_info`."""
+    from . import instagram_api as insta_api
+
+    return graph_object_cache.get_or_fetch(
+        'profile', access_token, business_account_id,
+        lambda: insta_api.fetch_profile_info(business_account_id, access_token),
+    )
+
+
+async def aget_profile_info(business_account_id: str, access_token: str):
+    """Cached `async_instagram_api.fetch_profile_info`."""
+    from . import async_instagram_api as async_insta_api
+
+    return await graph_object_cache.aget_or_fetch(
+        'profile', access_token, business_account_id,
+        lambda: async_insta_api.fetch_profile_info(business_account_id, access_token),
+    )
+
+
+def invalidate_business_account(access_token: str) -> None:
+    graph_object_cache.invalidate('business_account', access_token, 'me')
+
+
+def invalidate_profile(business_account_id: str, access_token: str) -> None:
+    graph_object_cache.invalidate('profile', access_token, business_account_id)
+
+
+def invalidate_account(access_token: str, business_account_id: str | None = None) -> None:
+    """Drop everything cached for an account, e.g. after it is edited, removed or re-authorised."""
+    invalidate_business_account(access_token)
+    if business_account_id:
+        invalidate_profile(business_account_id, access_token)
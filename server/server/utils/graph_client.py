@@ -0,0 +1,282 @@
+import asyncio
+import itertools
+import math
+import os
+import threading
+import weakref
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .logger import logger
+from .rate_limiter import GraphRateLimiter, GraphRateLimitExceeded, account_key_for
+
+
+CONNECT_TIMEOUT = float(os.getenv('META_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.getenv('META_READ_TIMEOUT', 30))
+POOL_CONNECTIONS = int(os.getenv('META_POOL_CONNECTIONS', 10))
+POOL_MAXSIZE = int(os.getenv('META_POOL_MAXSIZE', 20))
+# The async client carries every in-flight Graph call of an ASGI worker, so it
+# needs room for all of them rather than a thread's share.
+ASYNC_MAX_CONNECTIONS = int(os.getenv('META_ASYNC_MAX_CONNECTIONS', 100))
+# httpcore rescans every connection of a pool whenever a request starts or
+# ends, so the CPU cost per request grows with the pool size. The async
+# connections are therefore spread over several pools of at most this size.
+ASYNC_POOL_SIZE = int(os.getenv('META_ASYNC_POOL_SIZE', 20))
+
+
+def _access_token_of(url: str, kwargs: dict) -> str | None:
+    for key in ('params', 'data', 'json'):
+        value = kwargs.get(key)
+        if isinstance(value, dict) and value.get('access_token'):
+            return value['access_token']
+    # Pagination links (`paging.next`) carry the token in the query string.
+    return (parse_qs(urlparse(url).query).get('access_token') or [None])[0]
+
+
+def _error_payload(response):
+    if response.status_code < 400:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def parse_host_pool_sizes(raw: str | None) -> dict[str, int]:
+    """
+    Parse `META_HOST_POOL_SIZES` ("https://graph.instagram.com/=32,https://api.instagram.com/=4")
+    into a {url_prefix: pool_maxsize} mapping. Malformed entries are skipped.
+    """
+    sizes: dict[str, int] = {}
+    if not raw:
+        return sizes
+
+    for entry in raw.split(','):
+        prefix, _, size = entry.strip().rpartition('=')
+        if not prefix:
+            continue
+        try:
+            sizes[prefix] = int(size)
+        except ValueError:
+            logger.warning(f'Ignoring invalid pool size entry: {entry}')
+    return sizes
+
+
+class GraphClient:
+    """
+    Shared keep-alive HTTP client for the Instagram Graph API.
+
+    Wraps a single `requests.Session` whose connection pools are reused across
+    threads, so repeated calls to graph.instagram.com skip the TCP+TLS handshake.
+    Every request gets a (connect, read) timeout unless the caller passes one.
+
+    The session is rebuilt after a fork, since Celery prefork workers must not
+    share sockets inherited from the parent process.
+
+    When a `GraphRateLimiter` is given, every request first takes a token for
+    the calling account (identified by its access token) and reports the
+    response's usage headers back to the limiter.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        pool_connections: int = POOL_CONNECTIONS,
+        pool_maxsize: int = POOL_MAXSIZE,
+        host_pool_sizes: dict[str, int] | None = None,
+        rate_limiter: GraphRateLimiter | None = None,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.rate_limiter = rate_limiter
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.host_pool_sizes = host_pool_sizes or {}
+
+        self._lock = threading.Lock()
+        self._session: requests.Session | None = None
+        self._pid: int | None = None
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+
+        default_adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount('https://', default_adapter)
+        session.mount('http://', default_adapter)
+
+        # More specific prefixes take precedence over the scheme-wide adapter.
+        for prefix, maxsize in self.host_pool_sizes.items():
+            session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=maxsize))
+
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    self._session = self._build_session()
+                    self._pid = pid
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+
+        if self.rate_limiter is None:
+            return self.session.request(method, url, **kwargs)
+
+        account_key = account_key_for(_access_token_of(url, kwargs))
+        self.rate_limiter.acquire(account_key)
+        response = self.session.request(method, url, **kwargs)
+        self.rate_limiter.record(account_key, response.status_code, response.headers, _error_payload(response))
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+
+class AsyncGraphClient:
+    """
+    Async counterpart of `GraphClient`, backed by pooled `httpx.AsyncClient`s.
+
+    Up to `max_connections` connections are split across clients of at most
+    `pool_size` connections each, and requests are handed to them in turn.
+
+    An `httpx.AsyncClient` is bound to the event loop it was first used on, so
+    one set of clients is kept per running loop. Sync callers should go through
+    `run_concurrently`, which drives coroutines on a long-lived background loop
+    and therefore keeps its connections alive between calls.
+
+    Rate limiting works as in `GraphClient`, except that waiting for a token
+    does not block the event loop.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_connections: int = ASYNC_MAX_CONNECTIONS,
+        pool_size: int = ASYNC_POOL_SIZE,
+        rate_limiter: GraphRateLimiter | None = None,
+    ):
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.rate_limiter = rate_limiter
+        self.pools = math.ceil(max_connections / max(1, min(pool_size, max_connections)))
+        per_pool = math.ceil(max_connections / self.pools)
+        self.limits = httpx.Limits(max_connections=per_pool, max_keepalive_connections=per_pool)
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._turn = itertools.count()
+        # Loading the CA bundle is the slow part of creating a client, so the pools share one context.
+        self._ssl_context = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            clients = self._clients[loop] = [None] * self.pools
+
+        index = next(self._turn) % self.pools
+        client = clients[index]
+        if client is None or client.is_closed:
+            if self._ssl_context is None:
+                self._ssl_context = httpx.create_ssl_context()
+            client = clients[index] = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, verify=self._ssl_context)
+        return client
+
+    async def _acquire(self, account_key: str) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.rate_limiter.max_wait
+
+        while True:
+            wait = await asyncio.to_thread(self.rate_limiter.reserve, account_key)
+            if wait <= 0:
+                return
+            if loop.time() + wait > deadline:
+                raise GraphRateLimitExceeded(wait, account_key)
+            await asyncio.sleep(wait)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self.rate_limiter is None:
+            return await self.client.request(method, url, **kwargs)
+
+        account_key = account_key_for(_access_token_of(url, kwargs))
+        await self._acquire(account_key)
+        response = await self.client.request(method, url, **kwargs)
+        await asyncio.to_thread(
+            self.rate_limiter.record, account_key, response.status_code, response.headers, _error_payload(response)
+        )
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('DELETE', url, **kwargs)
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        for client in self._clients.pop(loop, None) or []:
+            if client is not None:
+                await client.aclose()
+
+
+class _BackgroundLoop:
+    """A daemon thread running one event loop for the lifetime of the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pid: int | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        pid = os.getpid()
+        if self._loop is None or self._pid != pid:
+            with self._lock:
+                if self._loop is None or self._pid != pid:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name='graph-client-loop', daemon=True).start()
+                    self._loop = loop
+                    self._pid = pid
+        return self._loop
+
+    def run(self, coro, timeout: float | None = None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+
+_background_loop = _BackgroundLoop()
+
+
+def run_concurrently(*aws, return_exceptions: bool = False, timeout: float | None = None) -> list:
+    """
+    Run coroutines concurrently from synchronous code (views, Celery tasks) and
+    return their results in order.
+
+    Must not be called from inside a running event loop; `await asyncio.gather`
+    there instead.
+    """
+    async def _gather():
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+
+    return _background_loop.run(_gather(), timeout)
@@ -0,0 +1,159 @@
+"""
+Turns generated and uploaded images into files Instagram accepts.
+
+Every source image is normalised into a JPEG that meets the Graph content
+publishing limits (aspect ratio, width, file size) plus a small thumbnail for
+the dashboard. Both are named after the SHA-256 of the source bytes, so the
+same upload or the same generated image is only processed and stored once
+(see dashboard.models.PostImage.store_images).
+
+Decoding, resizing and JPEG encoding release the GIL in Pillow, so a batch of
+images (a carousel) is processed side by side on a small thread pool.
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# Graph content publishing limits for feed images.
+MAX_FILE_BYTES = 8 * 1024 * 1024
+MIN_ASPECT_RATIO = 4 / 5
+MAX_ASPECT_RATIO = 1.91
+MIN_WIDTH = 320
+MAX_WIDTH = 1440
+
+# Uploads larger than this are refused before they are decoded.
+MAX_SOURCE_BYTES = int(os.getenv('IMAGE_MAX_SOURCE_BYTES', 30 * 1024 * 1024))
+# Refuse anything that would decode to more pixels than this (decompression bombs).
+MAX_SOURCE_PIXELS = 64_000_000
+
+THUMBNAIL_SIZE = 320
+JPEG_QUALITY = 90
+# Qualities tried in order until the JPEG fits in MAX_FILE_BYTES.
+JPEG_FALLBACK_QUALITIES = (85, 80, 70, 60)
+
+_image_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('IMAGE_PIPELINE_WORKERS', os.cpu_count() or 2)),
+    thread_name_prefix='image-pipeline',
+)
+
+
+class ImageValidationError(ValueError):
+    """The source is not an image, or cannot be made into one Instagram accepts."""
+
+
+@dataclass(frozen=True)
+class ProcessedImage:
+    digest: str
+    jpeg: bytes
+    thumbnail: bytes
+    width: int
+    height: int
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def check_instagram_image(width: int, height: int, size: int) -> None:
+    """Raise ImageValidationError unless Graph would accept a JPEG of this size."""
+    ratio = width / height if height else 0
+    if not MIN_ASPECT_RATIO - 0.005 <= ratio <= MAX_ASPECT_RATIO + 0.005:
+        raise ImageValidationError(f'Aspect ratio {width}x{height} is outside 4:5 to 1.91:1')
+    if not MIN_WIDTH <= width <= MAX_WIDTH:
+        raise ImageValidationError(f'Width {width}px is outside {MIN_WIDTH}-{MAX_WIDTH}px')
+    if size > MAX_FILE_BYTES:
+        raise ImageValidationError(f'JPEG is {size} bytes, more than the {MAX_FILE_BYTES} byte limit')
+
+
+def _open(data: bytes) -> Image.Image:
+    if len(data) > MAX_SOURCE_BYTES:
+        raise ImageValidationError(f'Image is {len(data)} bytes, more than the {MAX_SOURCE_BYTES} byte limit')
+    try:
+        image = Image.open(BytesIO(data))
+        if image.width * image.height > MAX_SOURCE_PIXELS:
+            raise ImageValidationError(f'Image is {image.width}x{image.height}, too many pixels')
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ImageValidationError(f'Not a readable image: {e}') from e
+
+    # Bake in the EXIF orientation; Instagram ignores it.
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Flatten transparency onto white instead of letting it turn black.
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _fit_aspect_ratio(image: Image.Image) -> Image.Image:
+    """Center-crop to the nearest aspect ratio Instagram allows."""
+    width, height = image.size
+    ratio = width / height
+    if ratio < MIN_ASPECT_RATIO:
+        new_height = round(width / MIN_ASPECT_RATIO)
+        top = (height - new_height) // 2
+        return image.crop((0, top, width, top + new_height))
+    if ratio > MAX_ASPECT_RATIO:
+        new_width = round(height * MAX_ASPECT_RATIO)
+        left = (width - new_width) // 2
+        return image.crop((left, 0, left + new_width, height))
+    return image
+
+
+def _fit_width(image: Image.Image) -> Image.Image:
+    width, height = image.size
+    target = min(max(width, MIN_WIDTH), MAX_WIDTH)
+    if target == width:
+        return image
+    return image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    out = BytesIO()
+    image.save(out, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def process_image(data: bytes) -> ProcessedImage:
+    """Build the Instagram JPEG and the thumbnail for one source image."""
+    digest = content_hash(data)
+    image = _fit_width(_fit_aspect_ratio(_open(data)))
+
+    jpeg = _encode_jpeg(image, JPEG_QUALITY)
+    for quality in JPEG_FALLBACK_QUALITIES:
+        if len(jpeg) <= MAX_FILE_BYTES:
+            break
+        jpeg = _encode_jpeg(image, quality)
+    check_instagram_image(image.width, image.height, len(jpeg))
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+
+    return ProcessedImage(
+        digest=digest,
+        jpeg=jpeg,
+        thumbnail=_encode_jpeg(thumbnail, 80),
+        width=image.width,
+        height=image.height,
+    )
+
+
+def process_images(sources: list[bytes]) -> list[ProcessedImage]:
+    """`process_image` for several sources at once, in input order."""
+    if len(sources) <= 1:
+        return [process_image(data) for data in sources]
+    return list(_image_executor.map(process_image, sources))
+
+
+def image_bytes(image: Image.Image) -> bytes:
+    """Losslessly serialise a generated PIL image so it can be hashed and processed."""
+    out = BytesIO()
+    image.save(out, format='PNG', compress_level=1)
+    return out.getvalue()
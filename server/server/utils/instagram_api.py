@@ -1,27 +1,460 @@
 import os
-
-from celery import shared_task
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain
+from urllib.parse import urlencode
+
+import httpx
+import requests
+from celery import current_task, shared_task
 
 from .logger import logger
-import requests
+from .graph_client import GraphClient, parse_host_pool_sizes, run_concurrently
+from .rate_limiter import GraphRateLimitExceeded, graph_rate_limiter_from_env
 
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 import time
 
 
 HOST_URL = os.getenv('META_HOST_URL', 'https://graph.instagram.com/')
 API_VERSION = os.getenv('META_API_VERSION', 'v24.0')
 
+# Shared by the sync and async clients so both draw from the same buckets.
+graph_rate_limiter = graph_rate_limiter_from_env()
+
+# Shared keep-alive client; every Graph call below goes through it.
+graph_client = GraphClient(
+    host_pool_sizes=parse_host_pool_sizes(os.getenv('META_HOST_POOL_SIZES')),
+    rate_limiter=graph_rate_limiter,
+)
+
+# Field / metric lists shared with the async variant in async_instagram_api.py
+BUSINESS_ACCOUNT_FIELDS = 'id,name,biography,website,follows_count,followers_count,media_count,username,account_type'
+OTHER_ACCOUNT_FIELDS = 'id,username'
+PROFILE_FIELDS = 'id,username,account_type,media_count'
+POST_FIELDS = 'id,caption,media_type,media_url,permalink,thumbnail_url,timestamp,like_count,comments_count'
+POST_DETAIL_FIELDS = 'id,caption,media_type,media_url,permalink,thumbnail_url,timestamp,comments_count,like_count,media_product_type,owner,shortcode,is_shared_to_feed,username'
+COMMENT_FIELDS = 'id,text,username,timestamp,from'
+CONVERSATION_FIELDS = 'id,participants,updated_time'
+MESSAGE_FIELDS = 'id,message,from,to,created_time'
+
+POST_INSIGHT_METRICS = [
+    'comments',
+    'follows',
+    'likes',
+    'profile_activity',
+    'profile_visits',
+    'reach',
+    'saved',
+    'shares',
+    'total_interactions',
+    'views',
+]
+
+USER_INSIGHT_METRICS = [
+    'reach',
+    'follower_count',
+    'website_clicks',
+    'profile_views',
+    'online_followers',
+    'accounts_engaged',
+    'total_interactions',
+    'likes',
+    'comments',
+    'shares',
+    'saves',
+    'replies',
+    'engaged_audience_demographics',
+    'reached_audience_demographics',
+    'follower_demographics',
+    'follows_and_unfollows',
+    'profile_links_taps',
+    'views',
+    'threads_likes',
+    'threads_replies',
+    'reposts',
+    'quotes',
+    'threads_followers',
+    'threads_follower_demographics',
+    'content_views',
+    'threads_views',
+    'threads_clicks',
+    'threads_reposts',
+]
+
+DEMOGRAPHIC_METRICS = [
+    'follower_demographics',
+    'reached_audience_demographics',
+    'engaged_audience_demographics',
+]
+
+# USER_INSIGHT_METRICS grouped by how Graph wants them requested. Graph
+# rejects a whole call if one metric in it is unsupported for the account, so
+# each group is requested on its own and only with the metrics known to work
+# (see async_instagram_api.fetch_insight_group). Values are
+# (metrics, params that override the caller's).
+INSIGHT_METRIC_GROUPS = {
+    'time_series': (['reach', 'follower_count'], {}),
+    'online_followers': (['online_followers'], {'period': 'lifetime'}),
+    'engagement': (
+        [
+            'website_clicks',
+            'profile_views',
+            'accounts_engaged',
+            'total_interactions',
+            'likes',
+            'comments',
+            'shares',
+            'saves',
+            'replies',
+            'follows_and_unfollows',
+            'profile_links_taps',
+            'views',
+            'content_views',
+        ],
+        {'metric_type': 'total_value'},
+    ),
+    'demographics': (DEMOGRAPHIC_METRICS, {'metric_type': 'total_value'}),
+    # Only served for accounts linked to a Threads profile.
+    'threads': (
+        [
+            'threads_likes',
+            'threads_replies',
+            'reposts',
+            'quotes',
+            'threads_followers',
+            'threads_follower_demographics',
+            'threads_views',
+            'threads_clicks',
+            'threads_reposts',
+        ],
+        {},
+    ),
+}
+
+
+def is_invalid_metric_error(payload) -> bool:
+    """True if a Graph error payload says a requested metric is not supported."""
+    if not isinstance(payload, dict):
+        return False
+    error = payload.get('error') or {}
+    return error.get('code') == 100 and 'metric' in str(error.get('message', '')).lower()
+
+
+# Account metrics available as a daily time series, mapped to how many days
+# back Graph serves them. These are mirrored into the local insight store.
+DAILY_INSIGHT_METRICS = {
+    'reach': 730,
+    'follower_count': 30,
+}
+
+# Graph rejects account insight requests spanning more than 30 days, or
+# reaching back further than two years.
+INSIGHT_WINDOW_DAYS = 30
+INSIGHT_MAX_LOOKBACK_DAYS = 730
+
+# Maximum number of sub-requests the Graph batch endpoint accepts per call.
+GRAPH_BATCH_LIMIT = 50
+
+# Page size requested from list edges (media, comments) when walking every page.
+PAGE_SIZE = int(os.getenv('META_PAGE_SIZE', 50))
+
+# Graph allows at most this many items in one carousel.
+CAROUSEL_MAX_ITEMS = 10
+
+# Threads that fetch the next page while the caller is still consuming the current one.
+_prefetch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('META_PREFETCH_WORKERS', 8)),
+    thread_name_prefix='graph-prefetch',
+)
+
+# Threads that create carousel item containers side by side.
+_container_executor = ThreadPoolExecutor(
+    max_workers=CAROUSEL_MAX_ITEMS,
+    thread_name_prefix='graph-carousel',
+)
+
+
+class GraphAPIError(Exception):
+    """A Graph request inside a multi-request walk (e.g. pagination) failed."""
+
+    def __init__(self, stage: str, status_code: int, text: str):
+        self.stage = stage
+        self.status_code = status_code
+        self.text = text
+        super().__init__(f'Error fetching {stage}: {status_code} - {text}')
+
+
+class GraphRetryLater(Exception):
+    """
+    Raised instead of sleeping when a retryable Graph failure happens inside a
+    Celery task; the task should re-schedule itself after `retry_after` seconds.
+    """
+
+    def __init__(self, retry_after: float, stage: str, creation_id: str | None = None):
+        self.retry_after = retry_after
+        self.stage = stage
+        self.creation_id = creation_id
+        super().__init__(f'Graph call "{stage}" failed transiently, retry in {retry_after:.1f}s')
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Declarative retry policy for a Graph call.
+
+    Delays grow exponentially from `base_delay` (capped at `max_delay`) with full
+    jitter, and a Retry-After header always wins if it asks for longer.
+
+    `idempotent` decides what counts as safe to repeat. Idempotent calls (reads)
+    retry on timeouts and connection errors too. Non-idempotent calls (creating
+    a container) only retry when Graph provably did not act on the request:
+    the connection was never established, or Graph answered with a throttling
+    or transient error.
+    """
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    idempotent: bool = True
+    retry_statuses: frozenset[int] = field(default_factory=lambda: frozenset({429, 500, 502, 503, 504}))
+    # 1/2: unknown / temporarily unavailable, 4/17/32/613: throttled, 9007: media not ready yet
+    retry_error_codes: frozenset[int] = field(default_factory=lambda: frozenset({1, 2, 4, 17, 32, 613, 9007}))
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    def should_retry_response(self, response) -> bool:
+        if response.status_code < 400:
+            return False
+        try:
+            error = response.json().get('error') or {}
+        except (ValueError, AttributeError):
+            error = {}
+        if error.get('is_transient') or error.get('code') in self.retry_error_codes:
+            return True
+        # A bare 5xx may have been processed, so only idempotent calls repeat it.
+        return self.idempotent and response.status_code in self.retry_statuses
+
+    def should_retry_exception(self, exc: Exception) -> bool:
+        # Covers both the sync (requests) and async (httpx) clients.
+        if isinstance(exc, (requests.exceptions.ConnectTimeout, httpx.ConnectTimeout)):
+            return True
+        return self.idempotent and isinstance(exc, (
+            requests.exceptions.Timeout,
+            requests.exceptions.ConnectionError,
+            httpx.TimeoutException,
+            httpx.TransportError,
+        ))
+
+
+READ_RETRY_POLICY = RetryPolicy()
+WRITE_RETRY_POLICY = RetryPolicy(idempotent=False)
+# Publishing is made idempotent by checking the container first, see publish_creation.
+PUBLISH_RETRY_POLICY = RetryPolicy(max_attempts=5, base_delay=2.0)
+# Polling a container until Graph has finished processing its media. Videos
+# can take minutes, so this allows roughly half an hour in total.
+CONTAINER_POLL_POLICY = RetryPolicy(
+    max_attempts=int(os.getenv('META_CONTAINER_POLL_ATTEMPTS', 40)),
+    base_delay=5.0,
+    max_delay=60.0,
+)
+
+
+def retry_after_seconds(response) -> float | None:
+    value = response.headers.get('Retry-After') if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _in_celery_task() -> bool:
+    return bool(current_task) and not current_task.request.called_directly
+
+
+def request_with_retry(policy: RetryPolicy, stage: str, method: str, url: str, **kwargs):
+    """
+    Send a Graph request under `policy`.
+
+    Returns the final response (successful or not). Exceptions that the policy
+    does not retry, or that persist past the last attempt, propagate. Inside a
+    Celery task a retryable failure raises GraphRetryLater instead of sleeping.
+    """
+    for attempt in range(policy.max_attempts):
+        response = None
+        try:
+            response = graph_client.request(method, url, **kwargs)
+            if not policy.should_retry_response(response):
+                return response
+            logger.warning(f'Retryable Graph error on {stage}: {response.status_code} - {response.text}')
+        except GraphRateLimitExceeded:
+            raise
+        except requests.exceptions.RequestException as e:
+            if not policy.should_retry_exception(e) or attempt == policy.max_attempts - 1:
+                raise
+            logger.warning(f'Retryable Graph exception on {stage}: {e}')
+
+        if attempt == policy.max_attempts - 1:
+            break
+
+        delay = policy.backoff(attempt, retry_after_seconds(response))
+        if _in_celery_task():
+            raise GraphRetryLater(delay, stage)
+        if delay > policy.max_delay:
+            break
+        time.sleep(delay)
+
+    return response
+
+def _fetch_page(stage: str, url: str, params: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    response = request_with_retry(READ_RETRY_POLICY, stage, 'GET', url, params=params)
+    if response.status_code != 200:
+        raise GraphAPIError(stage, response.status_code, response.text)
+    return response.json()
+
+
+def iter_pages(
+    stage: str,
+    url: str,
+    params: Dict[str, Any] | None = None,
+    max_items: int | None = None,
+    prefetch: bool = True,
+) -> Iterator[list[Dict[str, Any]]]:
+    """
+    Walk a Graph list edge page by page, following `paging.next`, and yield
+    each page's `data` list.
+
+    With `prefetch` the next page is requested in the background as soon as
+    the current one arrives, so network time overlaps with the caller's work.
+    `max_items` caps the total number of items yielded (and therefore pages
+    fetched). Raises GraphAPIError if any page fails.
+    """
+    remaining = max_items
+    pending = None
+
+    try:
+        page = _fetch_page(stage, url, params)
+        while True:
+            data = page.get('data', [])
+            if remaining is not None:
+                data = data[:remaining]
+                remaining -= len(data)
+
+            next_url = (page.get('paging') or {}).get('next')
+            has_more = bool(next_url and data and (remaining is None or remaining > 0))
+
+            if has_more and prefetch:
+                pending = _prefetch_executor.submit(_fetch_page, stage, next_url)
+
+            yield data
+
+            if not has_more:
+                return
+
+            page = pending.result() if pending else _fetch_page(stage, next_url)
+            pending = None
+    finally:
+        # The caller stopped early; drop the page we were fetching for it.
+        if pending is not None:
+            pending.cancel()
+
+
+def iter_posts(
+    business_account_id: str,
+    access_token: str,
+    max_items: int | None = None,
+    page_size: int = PAGE_SIZE,
+    api_version: str = API_VERSION,
+) -> Iterator[Dict[str, Any]]:
+    """Yield every media object of the account, newest first."""
+    url = f'{HOST_URL}{api_version}/{business_account_id}/media'
+    params = {
+        'fields': POST_FIELDS,
+        'limit': min(page_size, max_items) if max_items else page_size,
+        'access_token': access_token
+    }
+    return chain.from_iterable(iter_pages('posts', url, params, max_items=max_items))
+
+
+def iter_comments(
+    media_id: str,
+    access_token: str,
+    max_items: int | None = None,
+    page_size: int = PAGE_SIZE,
+    api_version: str = API_VERSION,
+) -> Iterator[Dict[str, Any]]:
+    """Yield every top-level comment on a media object."""
+    url = f'{HOST_URL}{api_version}/{media_id}/comments'
+    params = {
+        'fields': COMMENT_FIELDS,
+        'limit': min(page_size, max_items) if max_items else page_size,
+        'access_token': access_token
+    }
+    return chain.from_iterable(iter_pages('comments', url, params, max_items=max_items))
+
+
+def iter_conversation_pages(
+    business_account_id: str,
+    access_token: str,
+    limit: int = 20,
+    max_items: int | None = None,
+    api_version: str = API_VERSION,
+) -> Iterator[list[Dict[str, Any]]]:
+    """Yield the account's DM conversations one page at a time."""
+    url = f'{HOST_URL}{api_version}/{business_account_id}/conversations'
+    params = {
+        'fields': CONVERSATION_FIELDS,
+        'limit': max(1, min(limit, 100)),
+        'access_token': access_token,
+    }
+    return iter_pages('conversations', url, params, max_items=max_items)
+
+
+def iter_conversations(
+    business_account_id: str,
+    access_token: str,
+    limit: int = 20,
+    max_items: int | None = None,
+    api_version: str = API_VERSION,
+) -> Iterator[Dict[str, Any]]:
+    """Yield every DM conversation of the account."""
+    return chain.from_iterable(
+        iter_conversation_pages(business_account_id, access_token, limit, max_items, api_version)
+    )
+
+
+def iter_conversation_messages(
+    conversation_id: str,
+    access_token: str,
+    max_items: int | None = None,
+    page_size: int = 100,
+    api_version: str = API_VERSION,
+) -> Iterator[Dict[str, Any]]:
+    """Yield the messages of a DM conversation, newest first."""
+    url = f'{HOST_URL}{api_version}/{conversation_id}/messages'
+    params = {
+        'fields': MESSAGE_FIELDS,
+        'limit': min(page_size, max_items, 100) if max_items else min(page_size, 100),
+        'access_token': access_token,
+    }
+    return chain.from_iterable(iter_pages('messages', url, params, max_items=max_items))
+
+
 def fetch_business_account(access_token: str):
     url = f'{HOST_URL}me'
     params = {
-        'fields': 'id,name,biography,website,follows_count,followers_count,media_count,username,account_type',
+        'fields': BUSINESS_ACCOUNT_FIELDS,
         'access_token': access_token
     }
 
-    response = requests.get(url, params=params)
+    response = graph_client.get(url, params=params)
 
     if response.status_code == 200:
         data = response.json()
@@ -34,11 +467,11 @@ def fetch_business_account(access_token: str):
 def fetch_others_accounts(access_token: str, account_id: str):
     url = f'{HOST_URL}{account_id}'
     params = {
-        'fields': 'id,username',
+        'fields': OTHER_ACCOUNT_FIELDS,
         'access_token': access_token
     }
 
-    response = requests.get(url, params=params)
+    response = graph_client.get(url, params=params)
 
     if response.status_code == 200:
         data = response.json()
@@ -48,15 +481,46 @@ def fetch_others_accounts(access_token: str, account_id: str):
         return None
 
 
-def generate_creation_object(image_url: str, caption: str, access_token: str, business_account_id: str, api_version: str = API_VERSION):
+def create_media_container(
+    business_account_id: str,
+    access_token: str,
+    image_url: str | None = None,
+    video_url: str | None = None,
+    media_type: str | None = None,
+    caption: str | None = None,
+    is_carousel_item: bool = False,
+    children: list[str] | None = None,
+    cover_url: str | None = None,
+    api_version: str = API_VERSION,
+):
+    """
+    Create a media container and return its creation id.
+
+    - Image: `image_url`
+    - Reel: `media_type='REELS'`, `video_url` and optionally `cover_url`
+    - Carousel item: `is_carousel_item=True` with `image_url`, or `media_type='VIDEO'` and `video_url`
+    - Carousel: `media_type='CAROUSEL'` and the `children` creation ids
+    """
     url = f'{HOST_URL}{api_version}/{business_account_id}/media'
     payload = {
-        'image_url': image_url,
-        'caption': caption,
         'access_token': access_token
     }
-
-    response = requests.post(url, data=payload)
+    if image_url:
+        payload['image_url'] = image_url
+    if video_url:
+        payload['video_url'] = video_url
+    if media_type:
+        payload['media_type'] = media_type
+    if caption is not None and not is_carousel_item:
+        payload['caption'] = caption
+    if is_carousel_item:
+        payload['is_carousel_item'] = 'true'
+    if children:
+        payload['children'] = ','.join(children)
+    if cover_url:
+        payload['cover_url'] = cover_url
+
+    response = request_with_retry(WRITE_RETRY_POLICY, 'create_container', 'POST', url, data=payload)
 
     if response.status_code == 200:
         data = response.json()
@@ -64,41 +528,198 @@ def generate_creation_object(image_url: str, caption: str, access_token: str, bu
         return creation_id
     else:
         logger.error(f'Error generating creation object: {response.status_code} - {response.text}')
-        return None 
+        return None
+
+
+def generate_creation_object(image_url: str, caption: str, access_token: str, business_account_id: str, api_version: str = API_VERSION):
+    return create_media_container(business_account_id, access_token, image_url=image_url, caption=caption, api_version=api_version)
+
+
+def fetch_container_status(creation_id: str, access_token: str, api_version: str = API_VERSION):
+    """
+    Return the container's `status_code` (EXPIRED, ERROR, FINISHED, IN_PROGRESS
+    or PUBLISHED), or None if it could not be read.
+    """
+    url = f'{HOST_URL}{api_version}/{creation_id}'
+    params = {
+        'fields': 'status_code',
+        'access_token': access_token
+    }
+
+    response = request_with_retry(READ_RETRY_POLICY, 'container_status', 'GET', url, params=params)
+
+    if response.status_code == 200:
+        return response.json().get('status_code')
+    else:
+        logger.error(f'Error fetching container status: {response.status_code} - {response.text}')
+        return None
+
+
+def create_carousel_item_containers(items: list[Dict[str, str]], access_token: str, business_account_id: str) -> list[str | None]:
+    """
+    Create the item containers of a carousel in parallel.
+
+    `items` are dicts with a `media_type` ('IMAGE' or 'VIDEO') and a `url`.
+    Returns the creation ids in order, None for items that failed. If Graph
+    rate-limits any item the others still complete, and the
+    GraphRateLimitExceeded raised afterwards carries the ids created so far
+    as `creation_ids`.
+    """
+    def create(item):
+        if item['media_type'] == 'VIDEO':
+            return create_media_container(business_account_id, access_token, video_url=item['url'], media_type='VIDEO', is_carousel_item=True)
+        return create_media_container(business_account_id, access_token, image_url=item['url'], is_carousel_item=True)
+
+    futures = [_container_executor.submit(create, item) for item in items]
+
+    creation_ids = []
+    rate_limited = None
+    for future in futures:
+        try:
+            creation_ids.append(future.result())
+        except GraphRateLimitExceeded as e:
+            creation_ids.append(None)
+            rate_limited = e
+
+    if rate_limited is not None:
+        rate_limited.creation_ids = creation_ids
+        raise rate_limited
+    return creation_ids
+
+
+def fetch_container_statuses(creation_ids: list[str], access_token: str, api_version: str = API_VERSION) -> Dict[str, str | None]:
+    """Read the `status_code` of many containers in one batch call. Unreadable ones map to None."""
+    sub_requests = [
+        {'method': 'GET', 'relative_url': f'{api_version}/{creation_id}?fields=status_code'}
+        for creation_id in creation_ids
+    ]
+    statuses = {}
+    for creation_id, result in zip(creation_ids, batch_request(sub_requests, access_token)):
+        if result and result['code'] == 200 and result['body']:
+            statuses[creation_id] = result['body'].get('status_code')
+        else:
+            statuses[creation_id] = None
+    return statuses
+
+
+def _match_published_media(media: list[Dict[str, Any]], caption: str | None, published_after: datetime | None) -> str | None:
+    """
+    Id of the one post in `media` with `caption` that was published at or
+    after `published_after`. Returns None when there is no such post, when
+    several match, or when there is no `published_after` to check against,
+    so a wrong post is never taken for the published container.
+    """
+    if published_after is None:
+        logger.error('Could not identify the published media: its creation time is unknown.')
+        return None
+    # Graph timestamps have whole seconds.
+    since = published_after.replace(microsecond=0)
+    matches = [
+        item.get('id') for item in media
+        if (item.get('caption') or '') == (caption or '')
+        and item.get('timestamp')
+        and datetime.strptime(item['timestamp'], '%Y-%m-%dT%H:%M:%S%z') >= since
+    ]
+    if len(matches) != 1:
+        logger.error(f'Could not identify the published media: {len(matches)} recent posts match its caption.')
+        return None
+    return matches[0]
+
+
+def _find_published_media(
+    caption: str | None,
+    business_account_id: str,
+    access_token: str,
+    published_after: datetime | None,
+    api_version: str = API_VERSION,
+):
+    """Recover the media id of a container that was published by an earlier attempt."""
+    url = f'{HOST_URL}{api_version}/{business_account_id}/media'
+    params = {
+        'fields': 'id,caption,timestamp',
+        'limit': 10,
+        'access_token': access_token
+    }
+
+    response = request_with_retry(READ_RETRY_POLICY, 'find_published_media', 'GET', url, params=params)
+    if response.status_code != 200:
+        return None
 
+    return _match_published_media(response.json().get('data', []), caption, published_after)
 
-def publish_creation(creation_id: str, access_token: str, business_account_id: str, retry_count: int = 2, api_version: str = API_VERSION):
 
+def publish_creation(
+    creation_id: str,
+    access_token: str,
+    business_account_id: str,
+    retry_policy: RetryPolicy = PUBLISH_RETRY_POLICY,
+    api_version: str = API_VERSION,
+    caption: str | None = None,
+    resumed: bool = False,
+    published_after: datetime | None = None,
+):
+    """
+    Publish a media container.
+
+    Publishing is made safe to retry by checking the container before every
+    repeat attempt (and before the first one when `resumed` from an earlier
+    task run): if it is already published, the resulting media id is looked
+    up instead of publishing a second time. The lookup only accepts a post
+    with `caption` published after `published_after` (when the container
+    or its job was created), and returns None if that is ambiguous.
+    """
     publish_url = f'{HOST_URL}{api_version}/{business_account_id}/media_publish'
     publish_payload = {
         'creation_id': creation_id,
         'access_token': access_token
     }
 
-    publish_response = requests.post(publish_url, data=publish_payload)
-
-    if publish_response.status_code == 200:
-        logger.info('Media published successfully!')
-        publish_data = publish_response.json()
-        media_id = publish_data.get('id')
-        return media_id
-    else:
-        logger.warning(f'Error publishing media: {publish_response.status_code} - {publish_response.text}')
-        time.sleep(2) 
-        publish_response = requests.post(publish_url, data=publish_payload)
-        if publish_response.status_code == 200:
-            logger.info('Media published successfully on retry!')
-            publish_data = publish_response.json()
-            media_id = publish_data.get('id')
-            return media_id
-        
+    for attempt in range(retry_policy.max_attempts):
+        if (attempt > 0 or resumed) and fetch_container_status(creation_id, access_token) == 'PUBLISHED':
+            logger.warning(f'Container {creation_id} was already published by an earlier attempt.')
+            return _find_published_media(caption, business_account_id, access_token, published_after)
+
+        publish_response = None
+        try:
+            publish_response = graph_client.post(publish_url, data=publish_payload)
+            if publish_response.status_code == 200:
+                logger.info('Media published successfully!')
+                return publish_response.json().get('id')
+
+            if not retry_policy.should_retry_response(publish_response):
+                break
+            logger.warning(f'Error publishing media: {publish_response.status_code} - {publish_response.text}')
+        except GraphRateLimitExceeded:
+            raise
+        except requests.exceptions.RequestException as e:
+            if not retry_policy.should_retry_exception(e):
+                raise
+            logger.warning(f'Exception publishing media: {e}')
+
+        if attempt == retry_policy.max_attempts - 1:
+            break
+
+        delay = retry_policy.backoff(attempt, retry_after_seconds(publish_response))
+        if _in_celery_task():
+            raise GraphRetryLater(delay, 'publish', creation_id=creation_id)
+        if delay > retry_policy.max_delay:
+            break
+        time.sleep(delay)
+
+    if publish_response is not None:
         logger.error(f'Error publishing media: {publish_response.status_code} - {publish_response.text}')
-        return None
+    else:
+        logger.error(f'Error publishing media: container {creation_id} could not be published.')
+    return None
 
 
 def get_post_permalink(media_id: str, access_token: str, api_version: str = API_VERSION):
-    media_url = f'{HOST_URL}{api_version}/{media_id}?fields=permalink&access_token={access_token}'
-    media_response = requests.get(media_url)
+    media_url = f'{HOST_URL}{api_version}/{media_id}'
+    params = {
+        'fields': 'permalink',
+        'access_token': access_token
+    }
+    media_response = request_with_retry(READ_RETRY_POLICY, 'permalink', 'GET', media_url, params=params)
     if media_response.status_code == 200:
         media_data = media_response.json()
         return media_data.get('permalink')
@@ -107,15 +728,46 @@ def get_post_permalink(media_id: str, access_token: str, api_version: str = API_
         return None
 
 
-def create_and_publish_post(image_url: str, caption: str, access_token: str, business_account_id: str):
-    creation_id = generate_creation_object(image_url, caption, access_token, business_account_id)
-    if creation_id:
-        media_id = publish_creation(creation_id, access_token, business_account_id)
+def create_and_publish_post(
+    image_url: str,
+    caption: str,
+    access_token: str,
+    business_account_id: str,
+    creation_id: str | None = None,
+    published_after: datetime | None = None,
+):
+    """
+    Create a container (unless `creation_id` from an earlier attempt is given),
+    publish it and return (permalink, media_id).
+
+    Once a container exists, any deferral (GraphRetryLater, or a rate limit
+    turned into one) carries its creation id, so a re-scheduled task resumes
+    with the same container instead of creating and publishing a duplicate.
+    `published_after` is when that container (or the post) was created; it
+    defaults to now when a new container is created here.
+    """
+    resumed = bool(creation_id)
+    if not creation_id:
+        published_after = published_after or datetime.now(dt_timezone.utc)
+        creation_id = generate_creation_object(image_url, caption, access_token, business_account_id)
+    if not creation_id:
+        return None, None
+
+    try:
+        media_id = publish_creation(
+            creation_id, access_token, business_account_id,
+            caption=caption, resumed=resumed, published_after=published_after,
+        )
         if media_id:
             permalink = get_post_permalink(media_id, access_token)
             if permalink:
                 logger.info(f'Post published successfully! View it at: {permalink}')
                 return permalink, media_id
+    except GraphRetryLater as e:
+        e.creation_id = creation_id
+        raise
+    except GraphRateLimitExceeded as e:
+        raise GraphRetryLater(e.retry_after, 'publish', creation_id=creation_id) from e
     return None, None
 
 
@@ -135,7 +787,7 @@ def fetch_long_lived_token(code: str, api_version: str = API_VERSION) -> str:
         'code': code
     }
 
-    response = requests.post(short_lived_token_url, data=payload)
+    response = graph_client.post(short_lived_token_url, data=payload)
 
     if not response.status_code == 200:
         logger.error(f'Error fetching short-lived token: {response.status_code} - {response.text}')
@@ -151,7 +803,7 @@ def fetch_long_lived_token(code: str, api_version: str = API_VERSION) -> str:
         'access_token': short_lived_token
     }
 
-    response = requests.post(long_lived_token_url, data=long_lived_payload)
+    response = graph_client.post(long_lived_token_url, data=long_lived_payload)
 
     if response.status_code == 200:
         data = response.json()
@@ -161,32 +813,22 @@ def fetch_long_lived_token(code: str, api_version: str = API_VERSION) -> str:
         return None
 
 
-def fetch_all_posts(business_account_id: str, access_token: str, api_version: str = API_VERSION):
-    url = f'{HOST_URL}{api_version}/{business_account_id}/media'
-    params = {
-        'fields': 'id,caption,media_type,media_url,permalink,thumbnail_url,timestamp,like_count,comments_count',
-        'access_token': access_token
-    }
-
-    response = requests.get(url, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
-        posts = data.get('data', [])
-        return posts
-    else:
-        logger.error(f'Error fetching posts: {response.status_code} - {response.text}')
+def fetch_all_posts(business_account_id: str, access_token: str, api_version: str = API_VERSION, max_items: int | None = None):
+    try:
+        return list(iter_posts(business_account_id, access_token, max_items=max_items, api_version=api_version))
+    except GraphAPIError as e:
+        logger.error(str(e))
         return None
 
 
 def fetch_post_details(media_id: str, access_token: str, api_version: str = API_VERSION):
     url = f'{HOST_URL}{api_version}/{media_id}'
     params = {
-        'fields': 'id,caption,media_type,media_url,permalink,thumbnail_url,timestamp,comments_count,like_count,media_product_type,owner,shortcode,is_shared_to_feed,username',
+        'fields': POST_DETAIL_FIELDS,
         'access_token': access_token
     }
 
-    response = requests.get(url, params=params)
+    response = graph_client.get(url, params=params)
 
     if response.status_code == 200:
         data = response.json()
@@ -196,21 +838,11 @@ def fetch_post_details(media_id: str, access_token: str, api_version: str = API_
         return None
 
 
-def fetch_comments(media_id: str, access_token: str, api_version: str = API_VERSION):
-    url = f'{HOST_URL}{api_version}/{media_id}/comments'
-    params = {
-        'fields': 'id,text,username,timestamp,from',
-        'access_token': access_token
-    }
-
-    response = requests.get(url, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
-        comments = data.get('data', [])
-        return comments
-    else:
-        logger.error(f'Error fetching comments: {response.status_code} - {response.text}')
+def fetch_comments(media_id: str, access_token: str, api_version: str = API_VERSION, max_items: int | None = None):
+    try:
+        return list(iter_comments(media_id, access_token, max_items=max_items, api_version=api_version))
+    except GraphAPIError as e:
+        logger.error(str(e))
         return None
     
 
@@ -218,23 +850,11 @@ def fetch_post_insights(media_id: str, access_token: str, api_version: str = API
     url = f'{HOST_URL}{api_version}/{media_id}/insights'
 
     params = {
-        'metric': ','.join([
-            "comments",
-            "follows",
-            "likes",
-            "profile_activity",
-            "profile_visits",
-            "reach",
-            "saved",
-            "saved",
-            "shares",
-            "total_interactions",
-            "views"
-    ]),
-    'access_token': access_token
-}
+        'metric': ','.join(POST_INSIGHT_METRICS),
+        'access_token': access_token
+    }
     
-    response = requests.get(url, params=params)
+    response = graph_client.get(url, params=params)
 
     if response.status_code == 200:
         data = response.json().get('data', [])
@@ -245,78 +865,18 @@ def fetch_post_insights(media_id: str, access_token: str, api_version: str = API
 
 
 def fetch_account_and_audience_insights(user_id: str, access_token: str, api_version: str = API_VERSION, duration='week'):
-    base_url = f'{HOST_URL}{api_version}/{user_id}/insights'
-
-
-    params_account = {
-        'metric': ','.join([
-            'reach',
-            'follower_count',
-            'website_clicks',
-            'profile_views',
-            'online_followers',
-            'accounts_engaged',
-            'total_interactions',
-            'likes',
-            'comments',
-            'shares',
-            'saves',
-            'replies',
-            'engaged_audience_demographics',
-            'reached_audience_demographics',
-            'follower_demographics',
-            'follows_and_unfollows',
-            'profile_links_taps',
-            'views',
-            'threads_likes',
-            'threads_replies',
-            'reposts',
-            'quotes',
-            'threads_followers',
-            'threads_follower_demographics',
-            'content_views',
-            'threads_views',
-            'threads_clicks',
-            'threads_reposts',
-        ]),
-
-        'period': duration,  
-        'access_token': access_token
-    }
-
-    resp_account = requests.get(base_url, params=params_account)
-
-    if resp_account.status_code != 200:
-        logger.error(f'Error fetching account insights: {resp_account.status_code} - {resp_account.text}')
-        account_metrics = None
-    else:
-        data_acc = resp_account.json().get('data', [])
-        account_metrics = {e.get('name'): e.get('values') or e.get('value') for e in data_acc}
-
-    
-    params_demo = {
-        'metric': ','.join([
-            'follower_demographics',
-            'reached_audience_demographics',
-            'engaged_audience_demographics',
-        ]),
-        'metric_type': 'total_value',
-        'access_token': access_token,
-        'period': duration
-    }
+    """
+    Account metrics and audience demographics for `duration`.
 
-    resp_demo = requests.get(base_url, params=params_demo)
-    if resp_demo.status_code != 200:
-        demographics = None
-        logger.warning(f'Could not fetch demographics: {resp_demo.status_code} - {resp_demo.text}')
-    else:
-        data_demo = resp_demo.json().get('data', [])
-        demographics = {e.get('name'): e.get('values') or e.get('value') for e in data_demo}
+    The insight groups are requested concurrently, each with only the metrics
+    Graph supports for this account type (see
+    async_instagram_api.fetch_insight_group).
+    """
+    from . import async_instagram_api as async_insta_api
 
-    return {
-        'account_metrics': account_metrics,
-        'demographics': demographics
-    }
+    return run_concurrently(
+        async_insta_api.fetch_account_and_audience_insights(user_id, access_token, api_version, duration)
+    )[0]
 
 @shared_task
 def reply_to_message(recipient_id: str, message: str, access_token: str, business_account_id: str, api_version: str = API_VERSION):
@@ -327,7 +887,7 @@ def reply_to_message(recipient_id: str, message: str, access_token: str, busines
         'access_token': access_token
     }
     try:
-        resp = requests.post(url, json=payload)
+        resp = graph_client.post(url, json=payload)
         print(f"\nReply response: {resp.status_code} - {resp.text}")
         if resp.status_code == 200:
             logger.info(f"Replied to {recipient_id} with message: {message}")
@@ -335,6 +895,8 @@ def reply_to_message(recipient_id: str, message: str, access_token: str, busines
         else:
             logger.error(f"Error replying to message: {resp.status_code} - {resp.text}")
             return False
+    except GraphRateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Exception while replying to message: {str(e)}")
         return False
@@ -343,11 +905,11 @@ def reply_to_message(recipient_id: str, message: str, access_token: str, busines
 def fetch_profile_info(business_account_id: str, access_token: str, api_version: str = API_VERSION):
     url = f'{HOST_URL}{api_version}/{business_account_id}'
     params = {
-        'fields': 'id,username,account_type,media_count',
+        'fields': PROFILE_FIELDS,
         'access_token': access_token
     }
 
-    response = requests.get(url, params=params)
+    response = graph_client.get(url, params=params)
 
     if response.status_code == 200:
         data = response.json()
@@ -369,7 +931,7 @@ def fetch_conversations(
     """
     url = f'{HOST_URL}{api_version}/{business_account_id}/conversations'
     params = {
-        'fields': 'id,participants,updated_time',
+        'fields': CONVERSATION_FIELDS,
         'limit': max(1, min(limit, 100)),
         'access_token': access_token,
     }
@@ -377,7 +939,7 @@ def fetch_conversations(
     if after:
         params['after'] = after
 
-    response = requests.get(url, params=params)
+    response = graph_client.get(url, params=params)
 
     if response.status_code == 200:
         return response.json()
@@ -399,7 +961,7 @@ def fetch_conversation_messages(
     """
     url = f'{HOST_URL}{api_version}/{conversation_id}/messages'
     params = {
-        'fields': 'id,message,from,to,created_time',
+        'fields': MESSAGE_FIELDS,
         'limit': max(1, min(limit, 100)),
         'access_token': access_token,
     }
@@ -409,7 +971,7 @@ def fetch_conversation_messages(
     if after:
         params['after'] = after
 
-    response = requests.get(url, params=params)
+    response = graph_client.get(url, params=params)
 
     if response.status_code == 200:
         return response.json()
@@ -428,11 +990,11 @@ def fetch_conversation_participants(
     """
     url = f'{HOST_URL}{api_version}/{conversation_id}'
     params = {
-        'fields': 'id,participants,updated_time',
+        'fields': CONVERSATION_FIELDS,
         'access_token': access_token,
     }
 
-    response = requests.get(url, params=params)
+    response = graph_client.get(url, params=params)
 
     if response.status_code == 200:
         return response.json()
@@ -441,6 +1003,80 @@ def fetch_conversation_participants(
     return None
     
 
+def insight_windows(start: date, end: date, window_days: int = INSIGHT_WINDOW_DAYS) -> list[tuple[date, date]]:
+    """Split the inclusive day range [start, end] into consecutive windows of at most `window_days` days."""
+    windows = []
+    while start <= end:
+        window_end = min(end, start + timedelta(days=window_days - 1))
+        windows.append((start, window_end))
+        start = window_end + timedelta(days=1)
+    return windows
+
+
+def parse_daily_insight_points(data: list[Dict[str, Any]], start: date, end: date) -> list[tuple[str, date, Any]]:
+    """
+    Flatten a `period=day` insights response into (metric, day, value) points.
+
+    Each value's `end_time` marks the end of the day it covers, so the day is
+    the one before it. Points outside [start, end] are dropped.
+    """
+    points = []
+    for metric_data in data:
+        metric_name = metric_data.get('name')
+        for entry in metric_data.get('values') or []:
+            end_time = entry.get('end_time')
+            if not metric_name or not end_time:
+                continue
+            day = (datetime.strptime(end_time, '%Y-%m-%dT%H:%M:%S%z') - timedelta(days=1)).date()
+            if start <= day <= end:
+                points.append((metric_name, day, entry.get('value')))
+    return points
+
+
+def fetch_daily_insights_window(
+    user_id: str,
+    access_token: str,
+    metrics: list[str],
+    start: date,
+    end: date,
+    api_version: str = API_VERSION,
+) -> list[tuple[str, date, Any]] | None:
+    """
+    Fetch daily values of `metrics` for the days [start, end], which must fit
+    in one INSIGHT_WINDOW_DAYS window. Returns (metric, day, value) points, or
+    None if Graph rejected the request.
+    """
+    url = f'{HOST_URL}{api_version}/{user_id}/insights'
+    params = {
+        'metric': ','.join(metrics),
+        'period': 'day',
+        'since': start.isoformat(),
+        'until': (end + timedelta(days=1)).isoformat(),
+        'access_token': access_token,
+    }
+
+    response = request_with_retry(READ_RETRY_POLICY, 'daily_insights', 'GET', url, params=params)
+
+    if response.status_code == 200:
+        return parse_daily_insight_points(response.json().get('data', []), start, end)
+    else:
+        logger.error(f'Error fetching daily insights: {response.status_code} - {response.text}')
+        return None
+
+
+def _check_insight_range(since: str, until: str) -> None:
+    """
+    Graph serves account insights for at most INSIGHT_WINDOW_DAYS at a time,
+    and totals cannot be added up across windows, so longer ranges are refused.
+    """
+    try:
+        days = (date.fromisoformat(until) - date.fromisoformat(since)).days
+    except ValueError:
+        raise ValueError('since and until must be dates in YYYY-MM-DD format')
+    if days > INSIGHT_WINDOW_DAYS:
+        raise ValueError(f'since and until must be at most {INSIGHT_WINDOW_DAYS} days apart')
+
+
 def get_all_instagram_user_insights(
     user_id: str,
     access_token: str,
@@ -448,11 +1084,16 @@ def get_all_instagram_user_insights(
     until: str | None = None,
     period: str | None = "day",
     api_version: str = API_VERSION,
+    metrics: list[str] | None = None,
 ) -> list[Dict[str, Any]]:
     """
     Fetches all possible Instagram User Insights
     with correct metric–period mappings.
 
+    Metrics are split into INSIGHT_METRIC_GROUPS (by the parameters Graph
+    requires for them) and the groups are fetched concurrently. Metrics the
+    account type does not support are dropped instead of failing the call.
+
     Parameters
     ----------
     user_id : str | None
@@ -465,51 +1106,114 @@ def get_all_instagram_user_insights(
         ISO date (YYYY-MM-DD) for day-based metrics
     period : str | None
         Period for the insights (default is "day")
+    metrics : list[str] | None
+        Metrics to request (default is USER_INSIGHT_METRICS)
 
     Returns
     -------
     list[Dict[str, Any]]
         List of Instagram User Insights data
+
+    Raises
+    ------
+    ValueError
+        If `since` and `until` are malformed or more than INSIGHT_WINDOW_DAYS
+        days apart
     """
 
-    metrics = ["reach", "follower_count", "website_clicks", "profile_views", "online_followers", "accounts_engaged", "total_interactions", "likes", "comments", "shares", "saves", "replies", "engaged_audience_demographics", "reached_audience_demographics", "follower_demographics", "follows_and_unfollows", "profile_links_taps", "views", "threads_likes", "threads_replies", "reposts", "quotes", "threads_followers", "threads_follower_demographics", "content_views", "threads_views", "threads_clicks", "threads_reposts"]
+    from . import async_instagram_api as async_insta_api
 
-    url = f"{HOST_URL}{api_version}/{user_id}/insights"
+    return run_concurrently(
+        async_insta_api.get_all_instagram_user_insights(user_id, access_token, since, until, period, api_version, metrics)
+    )[0]
 
-    results: list[Dict[str, Any]] = []
 
-    if not until:
-        until = datetime.now().date().isoformat()
-    if not since:
-        since_date = datetime.now().date() - timedelta(days=7)
-        since = since_date.isoformat()
+def batch_request(sub_requests: list[Dict[str, Any]], access_token: str) -> list[Dict[str, Any] | None]:
+    """
+    Send many Graph sub-requests through the batch endpoint, chunked to
+    GRAPH_BATCH_LIMIT sub-requests per HTTP call.
 
-    if  datetime.fromisoformat(until) - datetime.fromisoformat(since) >= timedelta(days=730):
-        logger.warning("  The maximum allowed range between 'since' and 'until' is 730 days. Adjusting 'since' accordingly.")
-        since_date = datetime.fromisoformat(until) - timedelta(days=7)
-        since = since_date.date().isoformat()
-    
-    params = {
-        "metric": ",".join(metrics),
-        "period": period,
-        "since": since,
-        "until": until,
-        "access_token": access_token,
-    }
-    
-    response = requests.get(url, params=params)
-    data = response.json()
+    Each sub-request is a dict like
+    {'method': 'GET', 'relative_url': 'v24.0/<media_id>?fields=id,caption'}.
+
+    Returns one entry per sub-request, in the same order: a dict with the
+    sub-response `code` and decoded JSON `body`, or None if the sub-request
+    (or the whole chunk it was sent in) failed.
+    """
+    results: list[Dict[str, Any] | None] = []
+
+    for start in range(0, len(sub_requests), GRAPH_BATCH_LIMIT):
+        chunk = sub_requests[start:start + GRAPH_BATCH_LIMIT]
+        payload = {
+            'batch': json.dumps(chunk),
+            'include_headers': 'false',
+            'access_token': access_token,
+        }
+
+        response = graph_client.post(HOST_URL, data=payload)
+
+        if response.status_code != 200:
+            logger.error(f'Error sending batch request: {response.status_code} - {response.text}')
+            results.extend([None] * len(chunk))
+            continue
+
+        for sub_response in response.json():
+            # Graph returns null for sub-requests that did not complete in time.
+            if not sub_response:
+                results.append(None)
+                continue
+            try:
+                body = json.loads(sub_response.get('body') or 'null')
+            except ValueError:
+                body = None
+            results.append({'code': sub_response.get('code'), 'body': body})
 
-    if response.status_code != 200:
-        logger.error(f'Error fetching insights: {response.status_code} - {response.text}')
-        return results
-
-    for metric_data in data.get("data", []):
-        metric_name = metric_data.get("name")
-        if metric_name:
-            results.append({
-                metric_name: metric_data
-            })
-        
     return results
 
+
+MEDIA_BUNDLE_PARTS = {
+    # part name: (path suffix, query params, extract the result from the response body)
+    'details': ('', {'fields': POST_DETAIL_FIELDS}, lambda body: body),
+    'insights': ('/insights', {'metric': ','.join(POST_INSIGHT_METRICS)}, lambda body: body.get('data', [])),
+    'comments': ('/comments', {'fields': COMMENT_FIELDS}, lambda body: body.get('data', [])),
+}
+
+
+def fetch_media_bundle(
+    media_ids: list[str],
+    access_token: str,
+    include: tuple[str, ...] = ('details', 'insights', 'comments'),
+    api_version: str = API_VERSION,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Batched equivalent of calling fetch_post_details, fetch_post_insights and
+    fetch_comments for every media id.
+
+    Returns {media_id: {part: result}} where each result matches what the
+    corresponding single-object function returns, including None on error.
+    """
+    media_ids = list(dict.fromkeys(media_ids))
+    parts = [part for part in include if part in MEDIA_BUNDLE_PARTS]
+    sub_requests = []
+    keys = []
+
+    for media_id in media_ids:
+        for part in parts:
+            suffix, params, _ = MEDIA_BUNDLE_PARTS[part]
+            sub_requests.append({
+                'method': 'GET',
+                'relative_url': f'{api_version}/{media_id}{suffix}?{urlencode(params)}',
+            })
+            keys.append((media_id, part))
+
+    bundle: Dict[str, Dict[str, Any]] = {media_id: {} for media_id in media_ids}
+
+    for (media_id, part), sub_response in zip(keys, batch_request(sub_requests, access_token)):
+        extract = MEDIA_BUNDLE_PARTS[part][2]
+        if sub_response and sub_response['code'] == 200 and isinstance(sub_response['body'], dict):
+            bundle[media_id][part] = extract(sub_response['body'])
+        else:
+            logger.error(f'Error fetching {part} for media {media_id} in batch: {sub_response}')
+            bundle[media_id][part] = None
+
+    return bundle
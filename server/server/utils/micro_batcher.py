@@ -0,0 +1,92 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Sequence
+
+
+class MicroBatcher:
+    """
+    Coalesces single items submitted from many threads into batches.
+
+    The first waiting item opens a batch; it is run once `max_batch_size`
+    items have joined or `max_wait` seconds have passed, whichever comes
+    first. While a batch runs, new items queue up and go out together in the
+    next one, so batches grow with load and a lone request waits at most
+    `max_wait`.
+
+    `run_batch` gets a list of items and must return one result per item, in
+    the same order. It always runs on the batcher's worker thread, so it does
+    not need to be thread-safe. If it raises, every caller in that batch gets
+    the exception.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list], Sequence[Any]],
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        name: str = 'micro-batcher',
+    ):
+        self._run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.name = name
+        self._reset()
+        # Celery's prefork pool forks after import; the worker thread does not
+        # survive that, so children start their own.
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, item) -> Future:
+        """Queue one item; the future resolves to its result."""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((item, future))
+        return future
+
+    def run(self, item, timeout: float | None = None):
+        """Submit one item and block until its result is ready."""
+        return self.submit(item).result(timeout)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Past the deadline, still take whatever is already queued.
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self._run_batch([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f'{self.name}: got {len(results)} results for {len(batch)} items')
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -1,3 +1,4 @@
+import os
 import re
 import regex as regx
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
@@ -9,6 +10,9 @@ MODEL_NAME = "facebook/nllb-200-distilled-600M"
 tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
 model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
 
+# Segments per generate() call in nllb_translate_batch.
+NLLB_BATCH_SIZE = int(os.getenv("NLLB_BATCH_SIZE", 16))
+
 MENTION_RE = r"@\w+"
 HASHTAG_RE = r"#\w+"
 URL_RE = r"(https?://\S+|www\.\S+)"
@@ -21,8 +25,13 @@ PROTECTED_RE = regx.compile(
     flags=regx.IGNORECASE
 )
 
+def needs_translation(text: str) -> bool:
+    """Only text with Devanagari in it goes through NLLB; anything else is kept as is."""
+    return bool(text.strip()) and bool(DEVANAGARI_RE.search(text))
+
+
 def nllb_translate_nepali_deva_to_english(text: str) -> str:
-    if not text.strip():
+    if not needs_translation(text):
         return text
 
     tokenizer.src_lang = "npi_Deva"
@@ -35,6 +44,32 @@ def nllb_translate_nepali_deva_to_english(text: str) -> str:
     )
     return tokenizer.batch_decode(output, skip_special_tokens=True)[0]
 
+
+def nllb_translate_batch(texts: list[str], batch_size: int = NLLB_BATCH_SIZE) -> list[str]:
+    """
+    `nllb_translate_nepali_deva_to_english` for many texts. Each distinct text
+    that needs translating goes through NLLB once, in generate() calls of up to
+    `batch_size` texts of similar length so little of each batch is padding.
+    """
+    pending = sorted({t for t in texts if needs_translation(t)}, key=len)
+    if not pending:
+        return list(texts)
+
+    tokenizer.src_lang = "npi_Deva"
+    forced_bos_token_id = tokenizer.convert_tokens_to_ids("eng_Latn")
+
+    translated = {}
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        inputs = tokenizer(chunk, return_tensors="pt", padding=True, truncation=True)
+        output = model.generate(
+            **inputs,
+            forced_bos_token_id=forced_bos_token_id,
+        )
+        translated.update(zip(chunk, tokenizer.batch_decode(output, skip_special_tokens=True)))
+
+    return [translated.get(t, t) for t in texts]
+
 def devanagari_to_english_keep_symbols(raw_text: str) -> str:
     parts = PROTECTED_RE.split(raw_text)  # keep delimiters
     out = []
@@ -249,6 +284,25 @@ def compile_raw_to_english(raw_text: str) -> str:
 
     return english_text
 
+
+def compile_raw_to_english_batch(raw_texts: list[str]) -> list[str]:
+    """
+    `compile_raw_to_english` for many texts at once.
+
+    Romanized words are converted text by text (dictionary lookups), then the
+    Devanagari segments of all texts are translated together with
+    `nllb_translate_batch`. Texts without Nepali in them never reach NLLB.
+    """
+    # Same split as devanagari_to_english_keep_symbols: protected tokens are never translated.
+    split = [
+        [part for part in PROTECTED_RE.split(convert_romanized_nepali_to_devanagari(raw)) if part]
+        for raw in raw_texts
+    ]
+    segments = list({part for parts in split for part in parts if not PROTECTED_RE.fullmatch(part)})
+    translated = dict(zip(segments, nllb_translate_batch(segments)))
+
+    return ["".join(translated.get(part, part) for part in parts) for parts in split]
+
 def run_compile_tests():
         tests = [
             # 1) pure Devanagari Nepali
@@ -0,0 +1,275 @@
+import json
+import os
+import time
+
+import redis
+
+from .logger import logger
+from .utility_functions import hash_text
+
+
+REDIS_URL = os.getenv('META_RATE_LIMIT_REDIS_URL', os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0'))
+RATE_LIMIT_ENABLED = os.getenv('META_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+
+# Token buckets: steady rate in calls/second and burst capacity.
+APP_RATE = float(os.getenv('META_APP_RATE', 50))
+APP_BURST = float(os.getenv('META_APP_BURST', 100))
+ACCOUNT_RATE = float(os.getenv('META_ACCOUNT_RATE', 2))
+ACCOUNT_BURST = float(os.getenv('META_ACCOUNT_BURST', 20))
+
+# Usage percentages (from the Graph usage headers) at which we start slowing
+# down, and at which we stop calling altogether until the window recovers.
+SOFT_USAGE_PCT = float(os.getenv('META_SOFT_USAGE_PCT', 75))
+HARD_USAGE_PCT = float(os.getenv('META_HARD_USAGE_PCT', 95))
+BLOCK_SECONDS = float(os.getenv('META_BLOCK_SECONDS', 60))
+
+# Longest a synchronous caller will sleep for a token before giving up.
+MAX_WAIT = float(os.getenv('META_RATE_LIMIT_MAX_WAIT', 5))
+
+# Graph error codes that mean "throttled": app, user, page, and BUC limits.
+THROTTLE_ERROR_CODES = {4, 17, 32, 613, 80002}
+
+KEY_PREFIX = 'graph:ratelimit'
+
+# KEYS: app bucket, account bucket, app block, account block, app usage, account usage
+# ARGV: app rate, app burst, account rate, account burst, soft pct, hard pct
+# Returns the number of seconds to wait as a string; "0" means a token from
+# both buckets was taken.
+TOKEN_BUCKET_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local block = math.max(redis.call('PTTL', KEYS[3]), redis.call('PTTL', KEYS[4]))
+if block > 0 then
+    return tostring(block / 1000)
+end
+
+local soft = tonumber(ARGV[5])
+local hard = tonumber(ARGV[6])
+
+local function scaled_rate(rate, usage_key)
+    local usage = tonumber(redis.call('GET', usage_key) or '0')
+    if usage <= soft then
+        return rate
+    end
+    return rate * math.max(0.05, (hard - usage) / (hard - soft))
+end
+
+local function refill(key, rate, burst)
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    return math.min(burst, tokens + math.max(0, now - ts) * rate)
+end
+
+local app_rate = scaled_rate(tonumber(ARGV[1]), KEYS[5])
+local app_burst = tonumber(ARGV[2])
+local account_rate = scaled_rate(tonumber(ARGV[3]), KEYS[6])
+local account_burst = tonumber(ARGV[4])
+
+local app_tokens = refill(KEYS[1], app_rate, app_burst)
+local account_tokens = refill(KEYS[2], account_rate, account_burst)
+
+local wait = 0
+if app_tokens < 1 then
+    wait = math.max(wait, (1 - app_tokens) / app_rate)
+end
+if account_tokens < 1 then
+    wait = math.max(wait, (1 - account_tokens) / account_rate)
+end
+
+if wait == 0 then
+    app_tokens = app_tokens - 1
+    account_tokens = account_tokens - 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', app_tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(app_burst / app_rate) + 60)
+redis.call('HSET', KEYS[2], 'tokens', account_tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[2], math.ceil(account_burst / account_rate) + 60)
+
+return tostring(wait)
+"""
+
+
+class GraphRateLimitExceeded(Exception):
+    """Raised when a Graph call would have to wait longer than the caller allows."""
+
+    def __init__(self, retry_after: float, account_key: str | None = None):
+        self.retry_after = retry_after
+        self.account_key = account_key
+        super().__init__(f'Graph API rate limit reached, retry in {retry_after:.1f}s')
+
+
+def account_key_for(access_token: str | None) -> str:
+    """Per-account bucket key. Tokens map 1:1 to business accounts, so hash the token."""
+    return hash_text(access_token) if access_token else 'anonymous'
+
+
+def parse_usage_headers(headers) -> tuple[float, float, float]:
+    """
+    Read Graph usage headers.
+
+    Returns (app_usage_pct, account_usage_pct, regain_access_seconds), where the
+    percentages are the highest of call_count / total_time / total_cputime.
+    """
+    app_usage = 0.0
+    account_usage = 0.0
+    regain_seconds = 0.0
+
+    raw_app = headers.get('X-App-Usage')
+    if raw_app:
+        try:
+            usage = json.loads(raw_app)
+            app_usage = max(float(usage.get(k, 0)) for k in ('call_count', 'total_time', 'total_cputime'))
+        except (ValueError, TypeError, AttributeError):
+            logger.warning(f'Could not parse X-App-Usage header: {raw_app}')
+
+    raw_buc = headers.get('X-Business-Use-Case-Usage')
+    if raw_buc:
+        try:
+            for entries in json.loads(raw_buc).values():
+                for entry in entries:
+                    account_usage = max(
+                        account_usage,
+                        *(float(entry.get(k, 0)) for k in ('call_count', 'total_time', 'total_cputime')),
+                    )
+                    regain_seconds = max(regain_seconds, float(entry.get('estimated_time_to_regain_access', 0)) * 60)
+        except (ValueError, TypeError, AttributeError):
+            logger.warning(f'Could not parse X-Business-Use-Case-Usage header: {raw_buc}')
+
+    return app_usage, account_usage, regain_seconds
+
+
+def is_throttled_response(status_code: int, payload) -> bool:
+    if status_code == 429:
+        return True
+    if status_code < 400 or not isinstance(payload, dict):
+        return False
+    return (payload.get('error') or {}).get('code') in THROTTLE_ERROR_CODES
+
+
+class GraphRateLimiter:
+    """
+    Token-bucket limiter for Graph API calls, shared by every web and Celery
+    process through Redis.
+
+    Each call takes one token from an app-wide bucket and one from a bucket for
+    the calling account, so a single busy account cannot starve the others.
+    Usage headers returned by Graph feed back into the buckets: above
+    SOFT_USAGE_PCT the refill rate is scaled down, and above HARD_USAGE_PCT (or
+    when Graph reports an estimated time to regain access) calls are blocked
+    until the window recovers.
+
+    If Redis is unreachable the limiter lets calls through rather than taking
+    the Graph integration down with it.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = REDIS_URL,
+        app_rate: float = APP_RATE,
+        app_burst: float = APP_BURST,
+        account_rate: float = ACCOUNT_RATE,
+        account_burst: float = ACCOUNT_BURST,
+        max_wait: float = MAX_WAIT,
+        redis_client=None,
+    ):
+        self.redis_url = redis_url
+        self.app_rate = app_rate
+        self.app_burst = app_burst
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self.max_wait = max_wait
+
+        self._redis = redis_client
+        self._script = None
+        self._unavailable_until = 0.0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self.redis_url, socket_connect_timeout=0.25, socket_timeout=0.5)
+        return self._redis
+
+    def _keys(self, account_key: str) -> list[str]:
+        return [
+            f'{KEY_PREFIX}:bucket:app',
+            f'{KEY_PREFIX}:bucket:{account_key}',
+            f'{KEY_PREFIX}:block:app',
+            f'{KEY_PREFIX}:block:{account_key}',
+            f'{KEY_PREFIX}:usage:app',
+            f'{KEY_PREFIX}:usage:{account_key}',
+        ]
+
+    def _redis_down(self, e: Exception) -> None:
+        if time.monotonic() >= self._unavailable_until:
+            logger.warning(f'Graph rate limiter disabled for 30s, Redis unavailable: {e}')
+        self._unavailable_until = time.monotonic() + 30
+
+    def reserve(self, account_key: str) -> float:
+        """
+        Try to take a token for `account_key`. Returns 0 on success, otherwise
+        the number of seconds to wait before trying again.
+        """
+        if time.monotonic() < self._unavailable_until:
+            return 0.0
+
+        try:
+            if self._script is None:
+                self._script = self.redis.register_script(TOKEN_BUCKET_LUA)
+            wait = self._script(
+                keys=self._keys(account_key),
+                args=[self.app_rate, self.app_burst, self.account_rate, self.account_burst, SOFT_USAGE_PCT, HARD_USAGE_PCT],
+            )
+            return float(wait)
+        except redis.RedisError as e:
+            self._redis_down(e)
+            return 0.0
+
+    def acquire(self, account_key: str, max_wait: float | None = None) -> None:
+        """Block until a token is available, or raise GraphRateLimitExceeded."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+
+        while True:
+            wait = self.reserve(account_key)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise GraphRateLimitExceeded(wait, account_key)
+            time.sleep(wait)
+
+    def record(self, account_key: str, status_code: int, headers, payload=None) -> None:
+        """Feed a Graph response's usage headers (and throttling errors) back into the limiter."""
+        if time.monotonic() < self._unavailable_until:
+            return
+
+        app_usage, account_usage, regain_seconds = parse_usage_headers(headers)
+        _, _, app_block, account_block, app_usage_key, account_usage_key = self._keys(account_key)
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            if app_usage:
+                pipe.set(app_usage_key, app_usage, ex=300)
+            if account_usage:
+                pipe.set(account_usage_key, account_usage, ex=300)
+
+            if app_usage >= HARD_USAGE_PCT:
+                logger.warning(f'Graph app usage at {app_usage}%, pausing all calls for {BLOCK_SECONDS}s')
+                pipe.set(app_block, 1, px=int(BLOCK_SECONDS * 1000))
+
+            account_block_seconds = regain_seconds
+            if account_usage >= HARD_USAGE_PCT or is_throttled_response(status_code, payload):
+                account_block_seconds = max(account_block_seconds, BLOCK_SECONDS)
+            if account_block_seconds:
+                logger.warning(f'Graph account {account_key} throttled, pausing its calls for {account_block_seconds}s')
+                pipe.set(account_block, 1, px=int(account_block_seconds * 1000))
+
+            pipe.execute()
+        except redis.RedisError as e:
+            self._redis_down(e)
+
+
+def graph_rate_limiter_from_env() -> GraphRateLimiter | None:
+    return GraphRateLimiter() if RATE_LIMIT_ENABLED else None
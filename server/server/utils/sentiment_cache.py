@@ -0,0 +1,116 @@
+"""
+Cache of sentiment model outputs, keyed on the text the model actually sees.
+
+Comments repeat a lot ("nice", "🔥🔥", "price?"), and many different raw
+comments become the same model input once translated and cleaned. The class
+probabilities for each model input are kept in an in-process LRU backed by
+the shared Django cache (Redis). Keys include a digest of the model and
+tokenizer files, so scores from a previous model are never served after the
+files change.
+"""
+import hashlib
+import os
+import threading
+from typing import Dict, Iterable, List, Sequence
+
+from .graph_cache import CACHE_ALIAS, LRUCache, TwoTierCache, _MISSING
+from .logger import logger
+from .utility_functions import hash_text
+
+
+LOCAL_MAXSIZE = int(os.getenv('SENTIMENT_CACHE_LOCAL_MAXSIZE', 10000))
+# Entries are tied to a model version, so this only bounds memory in Redis.
+TTL = int(os.getenv('SENTIMENT_CACHE_TTL', 7 * 24 * 3600))
+# Log the hit/miss counters after this many lookups.
+LOG_EVERY = int(os.getenv('SENTIMENT_CACHE_LOG_EVERY', 1000))
+
+KEY_PREFIX = 'sentiment:probs'
+
+
+def files_version(*paths: str) -> str:
+    """Digest of the files' contents; changes whenever any of them does."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+class SentimentCache(TwoTierCache):
+    """
+    Class probabilities by (model version, model input text).
+
+    Hits and misses are counted per distinct text looked up; `stats()`
+    returns the counters of this process and they are logged every
+    LOG_EVERY lookups.
+    """
+
+    name = 'Sentiment cache'
+
+    def __init__(self, alias: str = CACHE_ALIAS, ttl: int = TTL, local: LRUCache | None = None,
+                 shared=None, log_every: int = LOG_EVERY):
+        super().__init__(alias, local or LRUCache(LOCAL_MAXSIZE), shared)
+        self.ttl = ttl
+        self.log_every = log_every
+        self._counts_lock = threading.Lock()
+        self._counts = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+        self._unlogged = 0
+
+    @staticmethod
+    def key(version: str, text: str) -> str:
+        return f'{KEY_PREFIX}:{version}:{hash_text(text, 32)}'
+
+    def get_many(self, version: str, texts: Iterable[str]) -> Dict[str, List[float]]:
+        """Cached probabilities for those of `texts` that have them."""
+        keys = {self.key(version, text): text for text in dict.fromkeys(texts)}
+        found, not_local = {}, []
+        for key, text in keys.items():
+            value = self.local.get(key)
+            if value is _MISSING:
+                not_local.append(key)
+            else:
+                found[text] = value
+        local_hits = len(found)
+
+        if not_local:
+            for key, value in self._shared_get_many(not_local).items():
+                self.local.set(key, value, self.ttl)
+                found[keys[key]] = value
+
+        self._count(local_hits, len(found) - local_hits, len(keys) - len(found))
+        return found
+
+    def set_many(self, version: str, probs: Dict[str, Sequence[float]]) -> None:
+        entries = {self.key(version, text): [float(p) for p in values] for text, values in probs.items()}
+        for key, value in entries.items():
+            self.local.set(key, value, self.ttl)
+        self._shared_set_many(entries, self.ttl)
+
+    def _count(self, local_hits: int, shared_hits: int, misses: int) -> None:
+        with self._counts_lock:
+            self._counts['local_hits'] += local_hits
+            self._counts['shared_hits'] += shared_hits
+            self._counts['misses'] += misses
+            self._unlogged += local_hits + shared_hits + misses
+            if self._unlogged < self.log_every:
+                return
+            self._unlogged = 0
+            stats = self._stats()
+        logger.info(
+            f"Sentiment cache: {stats['local_hits']} local hits, {stats['shared_hits']} shared hits, "
+            f"{stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)"
+        )
+
+    def _stats(self) -> dict:
+        lookups = sum(self._counts.values())
+        hits = self._counts['local_hits'] + self._counts['shared_hits']
+        return {**self._counts, 'hit_rate': hits / lookups if lookups else 0.0}
+
+    def stats(self) -> dict:
+        """Hit/miss counters of this process and the overall hit rate."""
+        with self._counts_lock:
+            return self._stats()
+
+
+sentiment_cache = SentimentCache()
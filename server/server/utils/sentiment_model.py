@@ -4,15 +4,23 @@ from time import sleep
 import numpy as np
 import os
 from typing import Dict, Union, List
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from .nepali_translate import compile_raw_to_english
+from .micro_batcher import MicroBatcher
+from .nepali_translate import compile_raw_to_english, compile_raw_to_english_batch
+from .sentiment_cache import files_version, sentiment_cache
+from .sentiment_runtime import LiteModel, load_lite_model, pad_sequences
 
 
 # Paths (relative to this file)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 MODEL_PATH = os.path.join(BASE_DIR, "server", "utils", "models", "sentiment_model.keras")
 TOKENIZER_PATH = os.path.join(BASE_DIR, "server", "utils", "models", "tokenizer.pkl")
+# Weights + vocabulary exported by `python -m server.utils.sentiment_runtime`
+LITE_MODEL_PATH = os.path.join(BASE_DIR, "server", "utils", "models", "sentiment_model.npz")
+
+# "numpy" serves LITE_MODEL_PATH without importing TensorFlow, "keras" loads
+# the .keras model with TensorFlow, "auto" uses the export when it is at
+# least as new as the .keras file.
+SENTIMENT_RUNTIME = os.getenv("SENTIMENT_RUNTIME", "auto").lower()
 
 # Model configuration (must match training settings)
 MAX_LEN = 50
@@ -31,9 +39,29 @@ LABEL2ID = {
     "Neutral": 2
 }
 
+# Micro-batching of single predictions (see predict_sentiment): at most this
+# many rows per forward pass, waiting at most this long for a batch to fill.
+BATCH_MAX_SIZE = int(os.getenv("SENTIMENT_BATCH_MAX_SIZE", 32))
+BATCH_MAX_WAIT = float(os.getenv("SENTIMENT_BATCH_MAX_WAIT_MS", 2)) / 1000
+
+# predict_batch groups texts by token count into these buckets (upper bounds),
+# each padded only to its own longest text
+LENGTH_BUCKETS = (8, 16, 32, MAX_LEN)
+
+# clean_text steps
+URL_RE = re.compile(r"http\S+")
+MENTION_RE = re.compile(r"@\w+")
+HASHTAG_RE = re.compile(r"#\w+")
+NON_LETTER_RE = re.compile(r"[^a-z\s]")
+WHITESPACE_RE = re.compile(r"\s+")
+# Whitespace except newlines, which separate texts in clean_texts
+INLINE_WHITESPACE_RE = re.compile(r"[^\S\n]+")
+
 # Global model and tokenizer (lazy loaded)
 _model = None
 _tokenizer = None
+# Digest of the files they were loaded from; sentiment cache keys include it
+_model_version = None
 
 
 def clean_text(text: str) -> str:
@@ -55,22 +83,71 @@ def clean_text(text: str) -> str:
         Cleaned text string
     """
     text = str(text).lower()
-    text = re.sub(r"http\S+", "", text)     # Remove URLs
-    text = re.sub(r"@\w+", "", text)        # Remove @mentions
-    text = re.sub(r"#\w+", "", text)        # Remove #hashtags
-    text = re.sub(r"[^a-z\s]", "", text)    # Keep only letters and spaces
-    text = re.sub(r"\s+", " ", text).strip()  # Normalize whitespace
+    text = URL_RE.sub("", text)             # Remove URLs
+    text = MENTION_RE.sub("", text)         # Remove @mentions
+    text = HASHTAG_RE.sub("", text)         # Remove #hashtags
+    text = NON_LETTER_RE.sub("", text)      # Keep only letters and spaces
+    text = WHITESPACE_RE.sub(" ", text).strip()  # Normalize whitespace
     return text
 
 
+def clean_texts(texts: List[str]) -> List[str]:
+    """
+    `clean_text` for many texts at once, with the same output.
+
+    The texts are joined by newlines so each regex runs once over the whole
+    batch instead of once per text. None of the steps can cross a newline,
+    and newlines inside a text would become spaces anyway.
+    """
+    if not texts:
+        return []
+    joined = "\n".join(str(t).replace("\n", " ") for t in texts).lower()
+    joined = URL_RE.sub("", joined)
+    joined = MENTION_RE.sub("", joined)
+    joined = HASHTAG_RE.sub("", joined)
+    joined = NON_LETTER_RE.sub("", joined)
+    joined = INLINE_WHITESPACE_RE.sub(" ", joined)
+    return [t.strip() for t in joined.split("\n")]
+
+
+def translate_texts(texts: List[str]) -> List[str]:
+    """
+    English versions of `texts` for the model, as `preprocess_text_for_inference`
+    makes them one at a time: only texts with Nepali in them are translated,
+    in grouped NLLB calls. A text that cannot be translated is used as is.
+    """
+    try:
+        return compile_raw_to_english_batch(texts)
+    except Exception:
+        # Fall back to one at a time so one bad text does not cost the whole batch its translations
+        translated = []
+        for text in texts:
+            try:
+                translated.append(compile_raw_to_english(text))
+            except Exception:
+                translated.append(text)
+        return translated
+
+
+def _use_lite_runtime() -> bool:
+    if SENTIMENT_RUNTIME == "numpy":
+        return True
+    if SENTIMENT_RUNTIME == "keras" or not os.path.exists(LITE_MODEL_PATH):
+        return False
+    return not os.path.exists(MODEL_PATH) or os.path.getmtime(LITE_MODEL_PATH) >= os.path.getmtime(MODEL_PATH)
+
+
 def load_model_and_tokenizer(model_path: str = None, tokenizer_path: str = None):
     """
     Loads the trained LSTM model and tokenizer from disk.
     Uses global caching to avoid reloading on every prediction.
+
+    A `.npz` export (see SENTIMENT_RUNTIME) holds both and is run with NumPy,
+    so TensorFlow is only imported for `.keras` models.
     
     Args:
-        model_path: Path to .keras model file (uses default if None)
-        tokenizer_path: Path to .pkl tokenizer file (uses default if None)
+        model_path: Path to .keras model file or .npz export (uses default if None)
+        tokenizer_path: Path to .pkl tokenizer file (uses default if None; unused for .npz)
         
     Returns:
         tuple: (model, tokenizer)
@@ -78,12 +155,20 @@ def load_model_and_tokenizer(model_path: str = None, tokenizer_path: str = None)
     Raises:
         FileNotFoundError: If model or tokenizer files don't exist
     """
-    global _model, _tokenizer
+    global _model, _tokenizer, _model_version
     
     if model_path is None:
-        model_path = MODEL_PATH
+        model_path = LITE_MODEL_PATH if _use_lite_runtime() else MODEL_PATH
     if tokenizer_path is None:
         tokenizer_path = TOKENIZER_PATH
+
+    if model_path.endswith(".npz"):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model export not found at: {model_path}")
+        if _model is None or _tokenizer is None:
+            _model, _tokenizer = load_lite_model(model_path)
+            _model_version = files_version(model_path)
+        return _model, _tokenizer
     
     # Check if files exist
     if not os.path.exists(model_path):
@@ -93,6 +178,7 @@ def load_model_and_tokenizer(model_path: str = None, tokenizer_path: str = None)
     
     # Load model (with compatibility handling for different Keras versions)
     if _model is None:
+        from tensorflow.keras.models import load_model
         try:
             # Try loading with safe_mode=False for compatibility with different Keras versions
             _model = load_model(model_path, safe_mode=False)
@@ -104,10 +190,26 @@ def load_model_and_tokenizer(model_path: str = None, tokenizer_path: str = None)
     if _tokenizer is None:
         with open(tokenizer_path, "rb") as f:
             _tokenizer = pickle.load(f)
+
+    if _model_version is None:
+        _model_version = files_version(model_path, tokenizer_path)
     
     return _model, _tokenizer
 
 
+def model_input_text(text: str) -> str:
+    """
+    The text the model scores for `text`: translated to English (if it has
+    Nepali in it), then cleaned. Results are cached under it.
+    """
+    # translate raw text to english
+    try:
+        text = compile_raw_to_english(text)
+    except:
+        pass
+    return clean_text(text)
+
+
 def preprocess_text_for_inference(text: str, tokenizer=None, max_len: int = MAX_LEN) -> np.ndarray:
     """
     Converts raw text into a padded token sequence suitable for model input.
@@ -128,24 +230,71 @@ def preprocess_text_for_inference(text: str, tokenizer=None, max_len: int = MAX_
     if tokenizer is None:
         _, tokenizer = load_model_and_tokenizer()
     
-    # translate raw text to english
-    try:
-        text = compile_raw_to_english(text)
-    except:
-        pass
-
-    # Clean text
-    cleaned = clean_text(text)
+    # Translate and clean
+    cleaned = model_input_text(text)
     
     # Convert to sequence of token indices
     seq = tokenizer.texts_to_sequences([cleaned])
     
     # Pad to MAX_LEN
-    padded = pad_sequences(seq, maxlen=max_len, padding="post", truncating="post")
+    padded = pad_sequences(seq, maxlen=max_len)
     
     return padded
 
 
+def _predict_bucketed(model, seqs: List[List[int]]) -> np.ndarray:
+    """
+    Scores of `pad_sequences(seqs, MAX_LEN)`, one length bucket at a time.
+
+    The model was trained on sequences padded to MAX_LEN, and its LSTM sees
+    that padding, so a shorter bucket is only equivalent when the model
+    accounts for the missing padding itself (LiteModel's `steps`). Other
+    models get the full padding in one pass.
+    """
+    if not isinstance(model, LiteModel) or not seqs:
+        return model.predict(pad_sequences(seqs, maxlen=MAX_LEN), verbose=0)
+
+    lengths = np.minimum([len(seq) for seq in seqs], MAX_LEN)
+    order = np.argsort(lengths, kind="stable")
+    buckets = np.searchsorted(LENGTH_BUCKETS, lengths[order])
+    probs = None
+    for bucket in np.unique(buckets):
+        rows = order[buckets == bucket]
+        X = pad_sequences([seqs[i] for i in rows], maxlen=int(lengths[rows].max()))
+        bucket_probs = model.predict(X, verbose=0, steps=MAX_LEN)
+        if probs is None:
+            probs = np.empty((len(seqs), bucket_probs.shape[1]), dtype=bucket_probs.dtype)
+        # Back to the callers' order
+        probs[rows] = bucket_probs
+    return probs
+
+
+def _predict_cached(inputs: List[str], predict) -> np.ndarray:
+    """
+    Probabilities for model input texts (see `model_input_text`), from the
+    sentiment cache where possible. `predict` scores a list of the distinct
+    inputs that are not cached yet.
+    """
+    if _model_version is None:
+        return np.asarray(predict(inputs))
+    found = sentiment_cache.get_many(_model_version, inputs)
+    missing = [text for text in dict.fromkeys(inputs) if text not in found]
+    if missing:
+        scored = dict(zip(missing, predict(missing)))
+        sentiment_cache.set_many(_model_version, scored)
+        found.update(scored)
+    return np.array([found[text] for text in inputs], dtype=np.float32)
+
+
+def _predict_rows(rows: List[np.ndarray]) -> np.ndarray:
+    """One forward pass of the shared model over padded sequences from concurrent callers."""
+    model, _ = load_model_and_tokenizer()
+    return model.predict(np.stack(rows), verbose=0)
+
+
+_batcher = MicroBatcher(_predict_rows, max_batch_size=BATCH_MAX_SIZE, max_wait=BATCH_MAX_WAIT, name="sentiment-batcher")
+
+
 def predict_sentiment(
     text: str,
     model=None,
@@ -154,6 +303,12 @@ def predict_sentiment(
 ) -> Dict[str, Union[str, float, Dict[str, float]]]:
     """
     Predicts sentiment for a single text input with confidence scores.
+
+    With the default (shared) model, scores come from the sentiment cache
+    when the same model input has been scored before, and calls made at the
+    same time from different threads are batched into a single
+    `model.predict`, waiting up to SENTIMENT_BATCH_MAX_WAIT_MS for company.
+    Use `predict_batch` when all texts are known up front.
     
     Args:
         text: Input text to analyze
@@ -183,14 +338,20 @@ def predict_sentiment(
     # Load artifacts if not provided
     if model is None or tokenizer is None:
         model, tokenizer = load_model_and_tokenizer()
-    print("Model loaded successfully for inference.")
-    # Preprocess text
-    X = preprocess_text_for_inference(text, tokenizer)
-    print(f"Preprocessed text: {X}")
-
-    # Get prediction probabilities for the three classes
-    probs = model.predict(X, verbose=0)[0]
-    print(f"Raw model output probabilities: {probs}")
+
+    # Get prediction probabilities for the three classes. With the shared
+    # model, cached scores are reused and concurrent calls are folded into
+    # one forward pass. Preprocessing (translation included) runs in the
+    # caller's thread.
+    if model is _model and tokenizer is _tokenizer:
+        def score(inputs):
+            X = pad_sequences(tokenizer.texts_to_sequences(inputs), maxlen=MAX_LEN)
+            return [_batcher.run(X[0])]
+
+        probs = _predict_cached([model_input_text(text)], score)[0]
+    else:
+        X = preprocess_text_for_inference(text, tokenizer)
+        probs = model.predict(X, verbose=0)[0]
     pred_id = int(np.argmax(probs))
     predicted_sentiment = ID2LABEL[pred_id]
     confidence = float(probs[pred_id])
@@ -222,6 +383,7 @@ def predict_batch(
 ) -> List[Dict[str, Union[str, float, Dict[str, float]]]]:
     """
     Predicts sentiment for multiple texts at once (more efficient than individual predictions).
+    Scores match `predict_sentiment` for every text, Nepali ones included.
     
     Args:
         texts: List of text inputs to analyze
@@ -241,17 +403,28 @@ def predict_batch(
         >>> for result in results:
         ...     print(f"{result['text']}: {result['sentiment']}")
     """
+    if not texts:
+        return []
+
     # Load artifacts if not provided
     if model is None or tokenizer is None:
         model, tokenizer = load_model_and_tokenizer()
     
-    # Preprocess all texts
-    cleaned_texts = [clean_text(t) for t in texts]
-    seqs = tokenizer.texts_to_sequences(cleaned_texts)
-    X = pad_sequences(seqs, maxlen=MAX_LEN, padding="post", truncating="post")
-    
-    # Get predictions for all texts
-    probs = model.predict(X, verbose=0)  # Shape: (batch_size, 3)
+    # Preprocess all texts the way predict_sentiment does: translate (only
+    # the texts that need it), then clean the whole batch
+    cleaned_texts = clean_texts(texts)
+    inputs = clean_texts(translate_texts(texts))
+
+    def score(inputs):
+        # Short texts without most of the padding
+        return _predict_bucketed(model, tokenizer.texts_to_sequences(inputs))
+
+    # Get predictions for all texts; the shared model reuses cached scores
+    # and scores each distinct uncached input once
+    if model is _model and tokenizer is _tokenizer:
+        probs = _predict_cached(inputs, score)  # Shape: (batch_size, 3)
+    else:
+        probs = score(inputs)
     pred_ids = np.argmax(probs, axis=1)
     
     # Build results
@@ -285,9 +458,10 @@ def clear_cache():
     Clears the globally cached model and tokenizer to free memory.
     Useful when you want to reload fresh instances or shutdown the application.
     """
-    global _model, _tokenizer
+    global _model, _tokenizer, _model_version
     _model = None
     _tokenizer = None
+    _model_version = None
 
 
 # ============================================================================
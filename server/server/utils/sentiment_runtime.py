@@ -0,0 +1,338 @@
+"""
+Runs the sentiment LSTM without TensorFlow.
+
+`export_files` reads the trained `sentiment_model.keras` and `tokenizer.pkl`
+(this part needs TensorFlow/Keras) and writes their weights and vocabulary to
+one `.npz` file. `load_lite_model` loads that file back as a `LiteModel` /
+`LiteTokenizer` pair with the same `predict` / `texts_to_sequences` interface,
+implemented with NumPy only, so web and Celery processes never import
+TensorFlow. Dropout layers are no-ops at inference and are dropped.
+
+Export from `server/` after every retraining:
+
+    python -m server.utils.sentiment_runtime
+"""
+import argparse
+import json
+import os
+import pickle
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+DEFAULT_MODEL_PATH = os.path.join(MODELS_DIR, "sentiment_model.keras")
+DEFAULT_TOKENIZER_PATH = os.path.join(MODELS_DIR, "tokenizer.pkl")
+DEFAULT_LITE_MODEL_PATH = os.path.join(MODELS_DIR, "sentiment_model.npz")
+
+FORMAT_VERSION = 1
+
+# Layers with no effect at inference time
+SKIPPED_LAYERS = {"InputLayer", "Dropout", "SpatialDropout1D", "SpatialDropout2D", "GaussianNoise", "GaussianDropout"}
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": lambda x: np.clip(x / 6 + 0.5, 0, 1),
+    "softmax": _softmax,
+}
+
+MERGE_MODES = {
+    "concat": lambda a, b: np.concatenate([a, b], axis=-1),
+    "sum": lambda a, b: a + b,
+    "ave": lambda a, b: (a + b) / 2,
+    "mul": lambda a, b: a * b,
+}
+
+
+def pad_sequences(sequences: Sequence[Sequence[int]], maxlen: int) -> np.ndarray:
+    """
+    Keras `pad_sequences(..., maxlen=maxlen, padding="post", truncating="post")`:
+    each sequence cut to `maxlen` and right-padded with zeros.
+    """
+    padded = np.zeros((len(sequences), maxlen), dtype=np.int32)
+    for i, seq in enumerate(sequences):
+        seq = seq[:maxlen]
+        padded[i, :len(seq)] = seq
+    return padded
+
+
+class LiteTokenizer:
+    """`texts_to_sequences` of a fitted Keras `Tokenizer`, from its exported vocabulary."""
+
+    def __init__(self, word_index: Dict[str, int], num_words: int = None, oov_token: str = None,
+                 filters: str = "", lower: bool = True, split: str = " ", char_level: bool = False):
+        self.word_index = word_index
+        self.num_words = num_words
+        self.oov_token = oov_token
+        self.lower = lower
+        self.split = split
+        self.char_level = char_level
+        self._filter_table = str.maketrans({c: split for c in filters})
+
+    def _words(self, text: str) -> List[str]:
+        if self.lower:
+            text = text.lower()
+        if self.char_level:
+            return list(text)
+        return [w for w in text.translate(self._filter_table).split(self.split) if w]
+
+    def texts_to_sequences(self, texts: Sequence[str]) -> List[List[int]]:
+        oov_index = self.word_index.get(self.oov_token)
+        sequences = []
+        for text in texts:
+            seq = []
+            for word in self._words(text):
+                i = self.word_index.get(word)
+                if i is not None and not (self.num_words and i >= self.num_words):
+                    seq.append(i)
+                elif oov_index is not None:
+                    seq.append(oov_index)
+            sequences.append(seq)
+        return sequences
+
+
+def _lstm(x: np.ndarray, kernel, recurrent_kernel, bias, activation, recurrent_activation,
+          return_sequences: bool, reverse: bool = False, pad: np.ndarray = None, missing: int = 0) -> np.ndarray:
+    """
+    Keras LSTM over x of shape (batch, steps, features); gates are ordered i, f, c, o.
+
+    `missing` more steps of trailing padding, each with input `pad`, are run
+    as if they were at the end of x, without x having to hold them.
+    """
+    act = ACTIVATIONS[activation]
+    rec_act = ACTIVATIONS[recurrent_activation]
+    units = recurrent_kernel.shape[0]
+    batch, given = x.shape[0], x.shape[1]
+    total = given + missing
+    steps = range(total - 1, -1, -1) if reverse else range(total)
+
+    # Input projections for every step in one matmul; only h @ U is sequential.
+    projected = x @ kernel
+    pad_projected = pad @ kernel if missing else None
+    if bias is not None:
+        projected += bias
+        if missing:
+            pad_projected += bias
+    # A single zero state row broadcasts against the batch. Run backwards, the
+    # padding comes first and is the same for every row, so it is computed once.
+    h = np.zeros((1, units), dtype=x.dtype)
+    c = np.zeros_like(h)
+    outputs = np.empty((batch, total, units), dtype=x.dtype) if return_sequences else None
+    for t in steps:
+        z = (projected[:, t] if t < given else pad_projected) + h @ recurrent_kernel
+        i = rec_act(z[:, :units])
+        f = rec_act(z[:, units:2 * units])
+        c = f * c + i * act(z[:, 2 * units:3 * units])
+        h = rec_act(z[:, 3 * units:]) * act(c)
+        if return_sequences:
+            # Backward outputs are stored at their input position, as Bidirectional realigns them.
+            outputs[:, t] = h
+    return outputs if return_sequences else np.broadcast_to(h, (batch, units)).copy()
+
+
+class LiteModel:
+    """Forward pass of an exported Sequential model; `predict` mirrors `keras.Model.predict`."""
+
+    def __init__(self, layers: List[dict], weights: Dict[str, np.ndarray]):
+        self.layers = layers
+        self.weights = weights
+
+    def _w(self, layer: dict) -> List[np.ndarray]:
+        return [self.weights[name] for name in layer["weights"]]
+
+    def _run_lstm(self, x, config: dict, weights: List[np.ndarray], reverse: bool = False, pad=None, missing=0):
+        kernel, recurrent_kernel = weights[0], weights[1]
+        bias = weights[2] if len(weights) > 2 else None
+        return _lstm(x, kernel, recurrent_kernel, bias, config["activation"], config["recurrent_activation"],
+                     config["return_sequences"], reverse, pad, missing)
+
+    def predict(self, X, verbose=0, steps: int = None) -> np.ndarray:
+        """
+        Class probabilities for padded token sequences X.
+
+        With `steps`, X may be padded only to its longest row; the scores are
+        those of X zero-padded at the end to `steps` columns. The embedding
+        lookup and input projection are skipped for the missing padding, and
+        the backward LSTM runs over it once for the whole batch.
+        """
+        x = np.asarray(X)
+        missing = max(0, steps - x.shape[1]) if steps else 0
+        pad = None  # embedding of the missing padding positions
+        for layer in self.layers:
+            kind, config, weights = layer["type"], layer["config"], self._w(layer)
+            if kind == "Embedding":
+                x = weights[0][x.astype(np.int64)]
+                if missing:
+                    pad = weights[0][0]
+                continue
+            if missing and (pad is None or kind not in ("LSTM", "Bidirectional")):
+                # Anything else needs the padding spelled out.
+                if pad is None:
+                    x = np.pad(x, [(0, 0), (0, missing)] + [(0, 0)] * (x.ndim - 2))
+                else:
+                    x = np.concatenate([x, np.broadcast_to(pad, (x.shape[0], missing, pad.shape[0]))], axis=1)
+                missing = 0
+            if kind == "LSTM":
+                # Returns all `steps` positions, so later layers see no missing padding.
+                x = self._run_lstm(x, config, weights, config.get("go_backwards", False), pad, missing)
+                missing = 0
+            elif kind == "Bidirectional":
+                half = len(weights) // 2
+                forward = self._run_lstm(x, config["forward"], weights[:half], False, pad, missing)
+                backward = self._run_lstm(x, config["backward"], weights[half:], True, pad, missing)
+                x = MERGE_MODES[config["merge_mode"]](forward, backward)
+                missing = 0
+            elif kind == "GlobalMaxPooling1D":
+                x = x.max(axis=1)
+            elif kind == "GlobalAveragePooling1D":
+                x = x.mean(axis=1)
+            elif kind == "Flatten":
+                x = x.reshape(x.shape[0], -1)
+            elif kind == "Dense":
+                x = x @ weights[0]
+                if len(weights) > 1:
+                    x = x + weights[1]
+                x = ACTIVATIONS[config["activation"]](x)
+        return x
+
+
+def _activation_name(value) -> str:
+    name = value if isinstance(value, str) else getattr(value, "__name__", str(value))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return name
+
+
+def _lstm_config(layer) -> dict:
+    config = layer.get_config()
+    if config.get("stateful") or config.get("return_state"):
+        raise ValueError(f"Unsupported LSTM option in layer {layer.name}")
+    return {
+        "activation": _activation_name(config["activation"]),
+        "recurrent_activation": _activation_name(config["recurrent_activation"]),
+        "return_sequences": bool(config["return_sequences"]),
+        "go_backwards": bool(config.get("go_backwards", False)),
+    }
+
+
+def _layer_spec(layer) -> dict:
+    kind = type(layer).__name__
+    config = layer.get_config()
+    if kind == "Embedding":
+        if config.get("mask_zero"):
+            raise ValueError("Embedding(mask_zero=True) is not supported")
+        return {}
+    if kind == "LSTM":
+        spec = _lstm_config(layer)
+        if spec["go_backwards"] and spec["return_sequences"]:
+            raise ValueError("LSTM(go_backwards=True, return_sequences=True) is not supported")
+        return spec
+    if kind == "Bidirectional":
+        if type(layer.forward_layer).__name__ != "LSTM" or type(layer.backward_layer).__name__ != "LSTM":
+            raise ValueError("Only Bidirectional(LSTM) is supported")
+        if config["merge_mode"] not in MERGE_MODES:
+            raise ValueError(f"Unsupported merge_mode: {config['merge_mode']}")
+        return {
+            "merge_mode": config["merge_mode"],
+            "forward": _lstm_config(layer.forward_layer),
+            "backward": _lstm_config(layer.backward_layer),
+        }
+    if kind in ("GlobalMaxPooling1D", "GlobalAveragePooling1D", "Flatten"):
+        if config.get("keepdims") or config.get("data_format", "channels_last") != "channels_last":
+            raise ValueError(f"Unsupported {kind} options")
+        return {}
+    if kind == "Dense":
+        return {"activation": _activation_name(config["activation"])}
+    raise ValueError(f"Unsupported layer: {kind}")
+
+
+def export_model(model, tokenizer, path: str) -> None:
+    """
+    Write a Keras Sequential model and its fitted Tokenizer to `path` (.npz).
+
+    Raises:
+        ValueError: If the model uses a layer or option LiteModel cannot run
+    """
+    layers, weights = [], {}
+    for index, layer in enumerate(model.layers):
+        kind = type(layer).__name__
+        if kind in SKIPPED_LAYERS:
+            continue
+        names = []
+        for j, w in enumerate(layer.get_weights()):
+            name = f"layer{index}_{j}"
+            weights[name] = np.asarray(w, dtype=np.float32)
+            names.append(name)
+        layers.append({"type": kind, "config": _layer_spec(layer), "weights": names})
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "layers": layers,
+        "tokenizer": {
+            "word_index": tokenizer.word_index,
+            "num_words": tokenizer.num_words,
+            "oov_token": tokenizer.oov_token,
+            "filters": tokenizer.filters,
+            "lower": tokenizer.lower,
+            "split": tokenizer.split,
+            "char_level": tokenizer.char_level,
+        },
+    }
+    # Write next to the target and rename, so a running server never reads a half-written file.
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, header=np.array(json.dumps(header)), **weights)
+    os.replace(tmp_path, path)
+
+
+def export_files(model_path: str = DEFAULT_MODEL_PATH, tokenizer_path: str = DEFAULT_TOKENIZER_PATH,
+                 out_path: str = DEFAULT_LITE_MODEL_PATH) -> None:
+    """Load the .keras model and pickled tokenizer (needs TensorFlow) and export them to `out_path`."""
+    from tensorflow.keras.models import load_model
+
+    try:
+        model = load_model(model_path, safe_mode=False)
+    except TypeError:
+        model = load_model(model_path)
+    with open(tokenizer_path, "rb") as f:
+        tokenizer = pickle.load(f)
+    export_model(model, tokenizer, out_path)
+
+
+def load_lite_model(path: str = DEFAULT_LITE_MODEL_PATH):
+    """
+    Load an export made by `export_model`.
+
+    Returns:
+        tuple: (LiteModel, LiteTokenizer)
+    """
+    with np.load(path, allow_pickle=False) as data:
+        header = json.loads(str(data["header"]))
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported sentiment model export format: {header.get('format_version')}")
+        weights = {name: data[name] for name in data.files if name != "header"}
+    return LiteModel(header["layers"], weights), LiteTokenizer(**header["tokenizer"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the sentiment model for serving without TensorFlow.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--tokenizer", default=DEFAULT_TOKENIZER_PATH)
+    parser.add_argument("--out", default=DEFAULT_LITE_MODEL_PATH)
+    args = parser.parse_args()
+
+    export_files(args.model, args.tokenizer, args.out)
+    print(f"Exported {args.model} and {args.tokenizer} to {args.out}")
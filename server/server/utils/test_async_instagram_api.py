@@ -0,0 +1,396 @@
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+from django.core.cache.backends.locmem import LocMemCache
+
+from server.utils import async_instagram_api as async_insta_api
+from server.utils.graph_cache import GraphObjectCache
+from server.utils.graph_client import AsyncGraphClient, run_concurrently
+
+
+class FakeGraphServer:
+    """
+    Minimal stand-in for graph.instagram.com.
+
+    `routes` maps (method, path) to a callable taking the parsed query/form
+    params and returning (status, json_body). Every request is recorded in
+    `requests` as (method, path, params).
+    """
+
+    def __init__(self, routes, delay: float = 0.0):
+        self.routes = routes
+        self.delay = delay
+        self.requests = []
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self, method):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    body = self.rfile.read(length).decode()
+                    if self.headers.get('Content-Type', '').startswith('application/json'):
+                        params.update(json.loads(body))
+                    else:
+                        params.update({k: v[0] for k, v in parse_qs(body).items()})
+
+                with server._lock:
+                    server.requests.append((method, parsed.path, params))
+
+                if server.delay:
+                    time.sleep(server.delay)
+
+                handler = server.routes.get((method, parsed.path))
+                status, payload = handler(params) if handler else (404, {'error': {'message': 'Unknown path'}})
+                data = json.dumps(payload).encode()
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/'
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+API = async_insta_api.API_VERSION
+
+
+class AsyncInstagramApiTests(unittest.IsolatedAsyncioTestCase):
+
+    def serve(self, routes, delay: float = 0.0) -> FakeGraphServer:
+        server = FakeGraphServer(routes, delay=delay)
+        self.enterContext(server)
+        self.enterContext(mock.patch.object(async_insta_api, 'HOST_URL', server.url))
+        return server
+
+    def isolate_object_cache(self) -> GraphObjectCache:
+        shared = LocMemCache(f'async-insta-tests-{id(self)}', {})
+        shared.clear()
+        cache = GraphObjectCache(shared=shared)
+        self.enterContext(mock.patch.object(async_insta_api, 'graph_object_cache', cache))
+        return cache
+
+    async def asyncTearDown(self):
+        await async_insta_api.async_graph_client.aclose()
+
+    async def test_fetch_business_account(self):
+        server = self.serve({('GET', '/me'): lambda p: (200, {'id': '1', 'username': 'shop'})})
+
+        account = await async_insta_api.fetch_business_account('tok')
+
+        self.assertEqual(account, {'id': '1', 'username': 'shop'})
+        _, _, params = server.requests[0]
+        self.assertEqual(params['access_token'], 'tok')
+        self.assertEqual(params['fields'], async_insta_api.BUSINESS_ACCOUNT_FIELDS)
+
+    async def test_error_status_returns_none(self):
+        self.serve({('GET', f'/{API}/42'): lambda p: (400, {'error': {'message': 'bad'}})})
+
+        self.assertIsNone(await async_insta_api.fetch_post_details('42', 'tok'))
+
+    async def test_fetch_comments_returns_data_list(self):
+        self.serve({
+            ('GET', f'/{API}/42/comments'): lambda p: (200, {'data': [{'id': 'c1', 'text': 'nice'}]}),
+        })
+
+        self.assertEqual(await async_insta_api.fetch_comments('42', 'tok'), [{'id': 'c1', 'text': 'nice'}])
+
+    async def test_fetch_conversations_clamps_limit_and_passes_cursor(self):
+        server = self.serve({('GET', f'/{API}/biz/conversations'): lambda p: (200, {'data': []})})
+
+        await async_insta_api.fetch_conversations('biz', 'tok', limit=500, after='CUR')
+
+        _, _, params = server.requests[0]
+        self.assertEqual(params['limit'], '100')
+        self.assertEqual(params['after'], 'CUR')
+
+    async def test_reply_to_message_posts_json(self):
+        server = self.serve({('POST', f'/{API}/biz/messages'): lambda p: (200, {'message_id': 'm1'})})
+
+        self.assertTrue(await async_insta_api.reply_to_message('user', 'hello', 'tok', 'biz'))
+
+        _, _, payload = server.requests[0]
+        self.assertEqual(payload['recipient'], {'id': 'user'})
+        self.assertEqual(payload['message'], {'text': 'hello'})
+
+    async def test_create_and_publish_post(self):
+        self.serve({
+            ('POST', f'/{API}/biz/media'): lambda p: (200, {'id': 'container'}),
+            ('POST', f'/{API}/biz/media_publish'): lambda p: (200, {'id': 'media'}),
+            ('GET', f'/{API}/media'): lambda p: (200, {'permalink': 'https://instagram.com/p/abc/'}),
+        })
+
+        result = await async_insta_api.create_and_publish_post('https://img', 'caption', 'tok', 'biz')
+
+        self.assertEqual(result, ('https://instagram.com/p/abc/', 'media'))
+
+    async def test_container_creation_is_not_repeated_after_server_error(self):
+        server = self.serve({
+            ('POST', f'/{API}/biz/media'): lambda p: (500, {'error': {'message': 'Internal', 'code': 100}}),
+        })
+
+        self.assertIsNone(await async_insta_api.generate_creation_object('https://img', 'caption', 'tok', 'biz'))
+        self.assertEqual(len(server.requests), 1)
+
+    async def test_container_creation_retries_throttling_error(self):
+        self.enterContext(mock.patch.object(async_insta_api.asyncio, 'sleep', mock.AsyncMock()))
+        attempts = []
+
+        def create(params):
+            attempts.append(params)
+            if len(attempts) == 1:
+                return 400, {'error': {'message': 'Application request limit reached', 'code': 4}}
+            return 200, {'id': 'container'}
+
+        self.serve({('POST', f'/{API}/biz/media'): create})
+
+        self.assertEqual(await async_insta_api.generate_creation_object('https://img', 'caption', 'tok', 'biz'), 'container')
+        self.assertEqual(len(attempts), 2)
+
+    async def test_publish_is_not_repeated_once_container_is_published(self):
+        self.enterContext(mock.patch.object(async_insta_api.asyncio, 'sleep', mock.AsyncMock()))
+        publishes = []
+
+        def publish(params):
+            publishes.append(params)
+            # The publish went through but the response was lost as a 503.
+            return 503, {'error': {'message': 'Service unavailable', 'code': 2}}
+
+        server = self.serve({
+            ('POST', f'/{API}/biz/media_publish'): publish,
+            ('GET', f'/{API}/container'): lambda p: (200, {'status_code': 'PUBLISHED'}),
+            ('GET', f'/{API}/biz/media'): lambda p: (200, {'data': [
+                {'id': 'media', 'caption': 'caption', 'timestamp': '2026-03-01T10:05:00+0000'},
+                {'id': 'repost', 'caption': 'caption', 'timestamp': '2026-02-20T09:00:00+0000'},
+            ]}),
+        })
+
+        media_id = await async_insta_api.publish_creation(
+            'container', 'tok', 'biz', caption='caption', published_after=datetime(2026, 3, 1, 10, 0, tzinfo=timezone.utc),
+        )
+
+        self.assertEqual(media_id, 'media')
+        self.assertEqual(len(publishes), 1)
+        _, _, params = server.requests[-1]
+        self.assertEqual(params['limit'], '10')
+
+    async def test_resumed_publish_checks_container_first(self):
+        server = self.serve({
+            ('GET', f'/{API}/container'): lambda p: (200, {'status_code': 'PUBLISHED'}),
+            ('GET', f'/{API}/biz/media'): lambda p: (200, {'data': [
+                {'id': 'media', 'caption': 'caption', 'timestamp': '2026-03-01T10:05:00+0000'},
+            ]}),
+            ('GET', f'/{API}/media'): lambda p: (200, {'permalink': 'https://instagram.com/p/abc/'}),
+        })
+
+        result = await async_insta_api.create_and_publish_post(
+            'https://img', 'caption', 'tok', 'biz', creation_id='container',
+            published_after=datetime(2026, 3, 1, 10, 0, tzinfo=timezone.utc),
+        )
+
+        self.assertEqual(result, ('https://instagram.com/p/abc/', 'media'))
+        self.assertNotIn('POST', [method for method, _, _ in server.requests])
+
+    async def test_unreachable_graph_is_not_retried_for_writes(self):
+        self.enterContext(mock.patch.object(
+            async_insta_api.async_graph_client, 'request',
+            mock.AsyncMock(side_effect=httpx.ReadTimeout('timed out')),
+        ))
+
+        with self.assertRaises(httpx.ReadTimeout):
+            await async_insta_api.generate_creation_object('https://img', 'caption', 'tok', 'biz')
+        self.assertEqual(async_insta_api.async_graph_client.request.await_count, 1)
+
+    async def test_account_and_audience_insights_requests_overlap(self):
+        self.isolate_object_cache()
+
+        def insights(params):
+            names = params['metric'].split(',')
+            if 'follower_demographics' in names:
+                return 200, {'data': [{'name': 'follower_demographics', 'total_value': {}}]}
+            if 'reach' in names:
+                return 200, {'data': [{'name': 'reach', 'values': [{'value': 5}]}]}
+            return 200, {'data': []}
+
+        server = self.serve({('GET', f'/{API}/biz/insights'): insights}, delay=0.3)
+        account = mock.AsyncMock(return_value={'id': 'biz', 'account_type': 'BUSINESS'})
+
+        started = time.perf_counter()
+        with mock.patch.object(async_insta_api, 'aget_business_account', account):
+            result = await async_insta_api.fetch_account_and_audience_insights('biz', 'tok')
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(result['account_metrics'], {'reach': [{'value': 5}]})
+        self.assertIn('follower_demographics', result['demographics'])
+        self.assertEqual(len(server.requests), len(async_insta_api.INSIGHT_METRIC_GROUPS))
+        self.assertLess(elapsed, 0.55)
+
+    async def test_unsupported_insight_metrics_are_discovered_once(self):
+        self.isolate_object_cache()
+
+        def insights(params):
+            names = params['metric'].split(',')
+            if 'follower_count' in names:
+                return 400, {'error': {'code': 100, 'message': '(#100) metric[1] must be one of the following values: reach'}}
+            return 200, {'data': [{'name': name, 'values': [{'value': 1}]} for name in names]}
+
+        server = self.serve({('GET', f'/{API}/biz/insights'): insights})
+
+        first = await async_insta_api.fetch_insight_group('biz', 'tok', 'time_series', account_type='CREATOR', period='day')
+        requests_made = len(server.requests)
+        second = await async_insta_api.fetch_insight_group('biz', 'tok', 'time_series', account_type='CREATOR', period='day')
+
+        self.assertEqual([e['name'] for e in first], ['reach'])
+        self.assertEqual(second, first)
+        # One grouped request plus one probe per metric, then a single request.
+        self.assertEqual(requests_made, 3)
+        self.assertEqual(len(server.requests), 4)
+        self.assertEqual(server.requests[-1][2]['metric'], 'reach')
+
+    async def test_other_insight_errors_are_not_probed(self):
+        self.isolate_object_cache()
+        server = self.serve({
+            ('GET', f'/{API}/biz/insights'): lambda p: (400, {'error': {'code': 190, 'message': 'Invalid OAuth access token'}}),
+        })
+
+        result = await async_insta_api.fetch_insight_group('biz', 'tok', 'time_series', account_type='BUSINESS', period='day')
+
+        self.assertIsNone(result)
+        self.assertEqual(len(server.requests), 1)
+
+
+    async def test_iter_conversation_pages_follows_next_and_caps_items(self):
+        server = None
+
+        def conversations(params):
+            offset = int(params.get('after', 0))
+            body = {'data': [{'id': f'c{offset + i}'} for i in range(2)]}
+            body['paging'] = {'next': f'{server.url}{API}/biz/conversations?after={offset + 2}&access_token=tok'}
+            return 200, body
+
+        server = self.serve({('GET', f'/{API}/biz/conversations'): conversations})
+
+        pages = [page async for page in async_insta_api.iter_conversation_pages('biz', 'tok', limit=2, max_items=5)]
+
+        self.assertEqual(pages, [[{'id': 'c0'}, {'id': 'c1'}], [{'id': 'c2'}, {'id': 'c3'}], [{'id': 'c4'}]])
+        self.assertEqual(len(server.requests), 3)
+
+    async def test_fetch_all_posts_follows_every_page(self):
+        server = None
+
+        def media(params):
+            offset = int(params.get('after', 0))
+            body = {'data': [{'id': f'p{offset + i}'} for i in range(2)]}
+            if offset < 4:
+                body['paging'] = {'next': f'{server.url}{API}/biz/media?after={offset + 2}&access_token=tok'}
+            return 200, body
+
+        server = self.serve({('GET', f'/{API}/biz/media'): media})
+
+        posts = await async_insta_api.fetch_all_posts('biz', 'tok')
+
+        self.assertEqual([post['id'] for post in posts], ['p0', 'p1', 'p2', 'p3', 'p4', 'p5'])
+        self.assertEqual(len(server.requests), 3)
+
+    async def test_fetch_comments_max_items_stops_fetching(self):
+        server = None
+
+        def comments(params):
+            offset = int(params.get('after', 0))
+            body = {'data': [{'id': f'c{offset + i}'} for i in range(2)]}
+            body['paging'] = {'next': f'{server.url}{API}/42/comments?after={offset + 2}&access_token=tok'}
+            return 200, body
+
+        server = self.serve({('GET', f'/{API}/42/comments'): comments})
+
+        result = await async_insta_api.fetch_comments('42', 'tok', max_items=3)
+
+        self.assertEqual([comment['id'] for comment in result], ['c0', 'c1', 'c2'])
+        self.assertEqual(len(server.requests), 2)
+        _, _, params = server.requests[0]
+        self.assertEqual(params['limit'], '3')
+
+    async def test_fetch_all_posts_returns_none_on_failed_page(self):
+        self.serve({('GET', f'/{API}/biz/media'): lambda p: (400, {'error': {'code': 100, 'message': 'bad'}})})
+
+        self.assertIsNone(await async_insta_api.fetch_all_posts('biz', 'tok'))
+
+    async def test_iter_pages_raises_on_failed_page(self):
+        self.serve({('GET', f'/{API}/biz/conversations'): lambda p: (400, {'error': {'code': 100, 'message': 'bad'}})})
+
+        with self.assertRaises(async_insta_api.GraphAPIError):
+            await anext(async_insta_api.iter_conversation_pages('biz', 'tok'))
+
+
+class AsyncGraphClientTests(unittest.IsolatedAsyncioTestCase):
+
+    async def test_connections_are_split_across_pools(self):
+        graph_client = AsyncGraphClient(max_connections=100, pool_size=20)
+        self.addAsyncCleanup(graph_client.aclose)
+
+        clients = {id(graph_client.client) for _ in range(10)}
+
+        self.assertEqual(graph_client.pools, 5)
+        self.assertEqual(graph_client.limits.max_connections, 20)
+        self.assertEqual(len(clients), 5)
+
+    def test_small_limit_uses_one_pool(self):
+        graph_client = AsyncGraphClient(max_connections=8, pool_size=20)
+
+        self.assertEqual((graph_client.pools, graph_client.limits.max_connections), (1, 8))
+
+
+class RunConcurrentlyTests(unittest.TestCase):
+
+    def test_runs_coroutines_concurrently_from_sync_code(self):
+        server = FakeGraphServer({
+            ('GET', '/me'): lambda p: (200, {'id': '1', 'username': 'shop'}),
+            ('GET', f'/{API}/t_1'): lambda p: (200, {'id': 't_1', 'participants': {'data': []}}),
+        }, delay=0.3)
+
+        with server, mock.patch.object(async_insta_api, 'HOST_URL', server.url):
+            started = time.perf_counter()
+            participants, me = run_concurrently(
+                async_insta_api.fetch_conversation_participants('t_1', 'tok'),
+                async_insta_api.fetch_business_account('tok'),
+            )
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(participants['id'], 't_1')
+        self.assertEqual(me['username'], 'shop')
+        self.assertLess(elapsed, 0.55)
+
+
+if __name__ == '__main__':
+    unittest.main()
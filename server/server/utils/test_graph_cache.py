@@ -0,0 +1,112 @@
+import unittest
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from server.utils import graph_cache
+from server.utils.graph_cache import GraphObjectCache, LRUCache
+from server.utils.test_async_instagram_api import FakeGraphServer
+
+
+class BrokenCache:
+    def get(self, *args):
+        raise ConnectionError('redis down')
+
+    set = delete = get
+
+
+class GraphObjectCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.shared = LocMemCache('graph-cache-tests', {})
+        self.shared.clear()
+        self.cache = GraphObjectCache(ttls={'profile': 300}, shared=self.shared)
+        self.fetch = mock.Mock(return_value={'id': 'biz', 'followers_count': 10})
+
+    def test_second_lookup_is_served_from_cache(self):
+        first = self.cache.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+        second = self.cache.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+
+        self.assertEqual(first, second)
+        self.fetch.assert_called_once()
+
+    def test_shared_tier_is_used_by_other_processes(self):
+        self.cache.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+        other_process = GraphObjectCache(ttls={'profile': 300}, shared=self.shared)
+
+        other_process.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+
+        self.fetch.assert_called_once()
+
+    def test_key_hashes_token_and_separates_objects(self):
+        key = GraphObjectCache.key('profile', 'secret-token', 'biz')
+
+        self.assertNotIn('secret-token', key)
+        self.assertNotEqual(key, GraphObjectCache.key('profile', 'other-token', 'biz'))
+        self.assertNotEqual(key, GraphObjectCache.key('profile', 'secret-token', 'biz2'))
+
+    def test_invalidate_forces_refetch(self):
+        self.cache.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+        self.cache.invalidate('profile', 'tok', 'biz')
+        self.cache.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_failed_fetch_is_not_cached(self):
+        self.fetch.return_value = None
+
+        self.cache.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+        self.cache.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_unreachable_shared_tier_falls_back_to_local(self):
+        cache = GraphObjectCache(ttls={'profile': 300}, shared=BrokenCache())
+
+        cache.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+        cache.get_or_fetch('profile', 'tok', 'biz', self.fetch)
+
+        self.fetch.assert_called_once()
+
+    def test_lru_evicts_least_recently_used(self):
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIs(lru.get('b'), graph_cache._MISSING)
+
+
+class CachedFetcherTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        cache = GraphObjectCache(shared=LocMemCache('graph-fetcher-tests', {}))
+        self.enterContext(mock.patch.object(graph_cache, 'graph_object_cache', cache))
+
+    async def asyncTearDown(self):
+        from server.utils import async_instagram_api
+        await async_instagram_api.async_graph_client.aclose()
+
+    async def test_business_account_is_fetched_once_across_sync_and_async(self):
+        from server.utils import async_instagram_api, instagram_api
+
+        server = FakeGraphServer({('GET', '/me'): lambda p: (200, {'id': '1', 'username': 'shop'})})
+        self.enterContext(server)
+        self.enterContext(mock.patch.object(instagram_api, 'HOST_URL', server.url))
+        self.enterContext(mock.patch.object(async_instagram_api, 'HOST_URL', server.url))
+
+        first = graph_cache.get_business_account('tok')
+        second = await graph_cache.aget_business_account('tok')
+        graph_cache.invalidate_account('tok')
+        third = await graph_cache.aget_business_account('tok')
+
+        self.assertEqual(first, {'id': '1', 'username': 'shop'})
+        self.assertEqual(second, first)
+        self.assertEqual(third, first)
+        self.assertEqual(len(server.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
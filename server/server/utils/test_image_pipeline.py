@@ -0,0 +1,96 @@
+import unittest
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+
+from server.utils import image_pipeline
+from server.utils.image_pipeline import ImageValidationError, check_instagram_image, process_image, process_images
+
+
+def encode(image: Image.Image, format: str = 'PNG') -> bytes:
+    out = BytesIO()
+    image.save(out, format=format)
+    return out.getvalue()
+
+
+def decode(data: bytes) -> Image.Image:
+    return Image.open(BytesIO(data))
+
+
+class ProcessImageTests(unittest.TestCase):
+
+    def test_output_is_an_instagram_jpeg_named_after_the_source(self):
+        source = encode(Image.new('RGB', (1080, 1080), 'red'))
+
+        processed = process_image(source)
+
+        jpeg = decode(processed.jpeg)
+        self.assertEqual(jpeg.format, 'JPEG')
+        self.assertEqual(jpeg.size, (1080, 1080))
+        self.assertEqual((processed.width, processed.height), (1080, 1080))
+        self.assertEqual(processed.digest, image_pipeline.content_hash(source))
+        self.assertEqual(process_image(source).digest, processed.digest)
+
+    def test_tall_and_wide_images_are_cropped_into_the_allowed_ratios(self):
+        tall = process_image(encode(Image.new('RGB', (800, 2000))))
+        wide = process_image(encode(Image.new('RGB', (1400, 400))))
+
+        self.assertEqual((tall.width, tall.height), (800, 1000))
+        self.assertAlmostEqual(wide.width / wide.height, 1.91, places=2)
+
+    def test_width_is_clamped(self):
+        large = process_image(encode(Image.new('RGB', (3000, 3000))))
+        small = process_image(encode(Image.new('RGB', (100, 100))))
+
+        self.assertEqual((large.width, large.height), (1440, 1440))
+        self.assertEqual((small.width, small.height), (320, 320))
+
+    def test_transparency_is_flattened_onto_white(self):
+        processed = process_image(encode(Image.new('RGBA', (400, 400), (0, 0, 0, 0))))
+
+        self.assertGreater(decode(processed.jpeg).getpixel((200, 200))[0], 240)
+
+    def test_thumbnail_fits_the_thumbnail_box(self):
+        processed = process_image(encode(Image.new('RGB', (1440, 1152))))
+
+        thumbnail = decode(processed.thumbnail)
+        self.assertEqual(thumbnail.format, 'JPEG')
+        self.assertEqual(max(thumbnail.size), image_pipeline.THUMBNAIL_SIZE)
+
+    def test_unreadable_source_is_rejected(self):
+        with self.assertRaises(ImageValidationError):
+            process_image(b'not an image')
+
+    def test_oversized_source_is_rejected_before_decoding(self):
+        with mock.patch.object(image_pipeline, 'MAX_SOURCE_BYTES', 10), \
+                mock.patch.object(image_pipeline.Image, 'open') as image_open:
+            with self.assertRaises(ImageValidationError):
+                process_image(encode(Image.new('RGB', (400, 400))))
+
+        image_open.assert_not_called()
+
+    def test_batch_keeps_input_order(self):
+        sources = [encode(Image.new('RGB', (400 + 10 * i, 400))) for i in range(4)]
+
+        processed = process_images(sources)
+
+        self.assertEqual([p.digest for p in processed], [image_pipeline.content_hash(s) for s in sources])
+        self.assertEqual([p.width for p in processed], [400, 410, 420, 430])
+
+
+class CheckInstagramImageTests(unittest.TestCase):
+
+    def test_accepts_limits(self):
+        check_instagram_image(1080, 1350, 1024)
+        check_instagram_image(1440, 754, image_pipeline.MAX_FILE_BYTES)
+
+    def test_rejects_out_of_range_sizes(self):
+        for width, height, size in [(1080, 1920, 1024), (1080, 400, 1024), (200, 200, 1024), (1080, 1080, image_pipeline.MAX_FILE_BYTES + 1)]:
+            with self.subTest(width=width, height=height, size=size):
+                with self.assertRaises(ImageValidationError):
+                    check_instagram_image(width, height, size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,364 @@
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+import unittest
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from server.utils import instagram_api as insta_api
+from server.utils.rate_limiter import is_throttled_response, parse_usage_headers
+from server.utils.test_async_instagram_api import FakeGraphServer
+
+
+API = insta_api.API_VERSION
+
+# When the publish jobs in these tests created their containers.
+JOB_CREATED = datetime(2026, 3, 1, 10, 0, 30, 500000, tzinfo=timezone.utc)
+
+
+def fake_batch_endpoint(params):
+    """Answer each sub-request the way Graph does, echoing the media id back."""
+    responses = []
+    for sub in json.loads(params['batch']):
+        url = urlparse(sub['relative_url'])
+        segments = url.path.split('/')
+        media_id = segments[1]
+        if media_id == 'missing':
+            responses.append({'code': 400, 'body': json.dumps({'error': {'message': 'Unsupported get request'}})})
+        elif url.path.endswith('/comments'):
+            responses.append({'code': 200, 'body': json.dumps({'data': [{'id': f'c_{media_id}'}]})})
+        elif url.path.endswith('/insights'):
+            responses.append({'code': 200, 'body': json.dumps({'data': [{'name': 'reach'}]})})
+        else:
+            fields = parse_qs(url.query)['fields'][0]
+            responses.append({'code': 200, 'body': json.dumps({'id': media_id, 'fields': fields})})
+    return 200, responses
+
+
+class BatchRequestTests(unittest.TestCase):
+
+    def serve(self) -> FakeGraphServer:
+        server = FakeGraphServer({('POST', '/'): fake_batch_endpoint})
+        self.enterContext(server)
+        self.enterContext(mock.patch.object(insta_api, 'HOST_URL', server.url))
+        return server
+
+    def test_chunks_to_batch_limit(self):
+        server = self.serve()
+        media_ids = [str(i) for i in range(insta_api.GRAPH_BATCH_LIMIT + 10)]
+
+        bundle = insta_api.fetch_media_bundle(media_ids, 'tok', include=('details',))
+
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(list(bundle), media_ids)
+        self.assertEqual(bundle['55']['details']['id'], '55')
+
+    def test_splits_parts_per_media_id(self):
+        server = self.serve()
+
+        bundle = insta_api.fetch_media_bundle(['1', '2'], 'tok')
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(bundle['2']['comments'], [{'id': 'c_2'}])
+        self.assertEqual(bundle['2']['insights'], [{'name': 'reach'}])
+        self.assertEqual(bundle['1']['details']['fields'], insta_api.POST_DETAIL_FIELDS)
+
+    def test_failed_sub_request_is_none(self):
+        self.serve()
+
+        bundle = insta_api.fetch_media_bundle(['missing', '1'], 'tok', include=('details',))
+
+        self.assertIsNone(bundle['missing']['details'])
+        self.assertEqual(bundle['1']['details']['id'], '1')
+
+
+class RetryPolicyTests(unittest.TestCase):
+
+    def serve(self, routes) -> FakeGraphServer:
+        server = FakeGraphServer(routes)
+        self.enterContext(server)
+        self.enterContext(mock.patch.object(insta_api, 'HOST_URL', server.url))
+        self.enterContext(mock.patch.object(insta_api.time, 'sleep'))
+        return server
+
+    def test_backoff_honours_retry_after(self):
+        policy = insta_api.RetryPolicy(base_delay=1, max_delay=8)
+
+        self.assertLessEqual(policy.backoff(10), 8)
+        self.assertEqual(policy.backoff(0, retry_after=20), 20)
+
+    def test_container_creation_is_not_repeated_after_server_error(self):
+        server = self.serve({
+            ('POST', f'/{API}/biz/media'): lambda p: (500, {'error': {'message': 'Internal', 'code': 100}}),
+        })
+
+        self.assertIsNone(insta_api.generate_creation_object('https://img', 'caption', 'tok', 'biz'))
+        self.assertEqual(len(server.requests), 1)
+
+    def test_container_creation_retries_throttling_error(self):
+        attempts = []
+
+        def create(params):
+            attempts.append(params)
+            if len(attempts) == 1:
+                return 400, {'error': {'message': 'Application request limit reached', 'code': 4}}
+            return 200, {'id': 'container'}
+
+        self.serve({('POST', f'/{API}/biz/media'): create})
+
+        self.assertEqual(insta_api.generate_creation_object('https://img', 'caption', 'tok', 'biz'), 'container')
+        self.assertEqual(len(attempts), 2)
+
+    def serve_lost_publish(self, media) -> list:
+        """A publish that goes through but whose response is lost as a 503; returns the publish requests."""
+        publishes = []
+
+        def publish(params):
+            publishes.append(params)
+            return 503, {'error': {'message': 'Service unavailable', 'code': 2}}
+
+        self.serve({
+            ('POST', f'/{API}/biz/media_publish'): publish,
+            ('GET', f'/{API}/container'): lambda p: (200, {'status_code': 'PUBLISHED'}),
+            ('GET', f'/{API}/biz/media'): lambda p: (200, {'data': media}),
+        })
+        return publishes
+
+    def test_publish_is_not_repeated_once_container_is_published(self):
+        publishes = self.serve_lost_publish([
+            {'id': 'media', 'caption': 'caption', 'timestamp': '2026-03-01T10:00:30+0000'},
+            {'id': 'other', 'caption': 'older post', 'timestamp': '2026-02-28T09:00:00+0000'},
+            # Same caption, but posted before this job.
+            {'id': 'repost', 'caption': 'caption', 'timestamp': '2026-02-20T09:00:00+0000'},
+        ])
+
+        media_id = insta_api.publish_creation('container', 'tok', 'biz', caption='caption', published_after=JOB_CREATED)
+
+        self.assertEqual(media_id, 'media')
+        self.assertEqual(len(publishes), 1)
+
+    def test_published_media_without_caption_is_not_guessed(self):
+        self.serve_lost_publish([
+            {'id': 'newest', 'caption': 'someone else', 'timestamp': '2026-03-01T10:05:00+0000'},
+        ])
+
+        with self.assertLogs('base', 'ERROR'):
+            media_id = insta_api.publish_creation('container', 'tok', 'biz', published_after=JOB_CREATED)
+
+        self.assertIsNone(media_id)
+
+    def test_published_media_with_a_repeated_caption_is_not_guessed(self):
+        self.serve_lost_publish([
+            {'id': 'second', 'caption': 'caption', 'timestamp': '2026-03-01T10:05:00+0000'},
+            {'id': 'first', 'caption': 'caption', 'timestamp': '2026-03-01T10:01:00+0000'},
+        ])
+
+        with self.assertLogs('base', 'ERROR'):
+            media_id = insta_api.publish_creation('container', 'tok', 'biz', caption='caption', published_after=JOB_CREATED)
+
+        self.assertIsNone(media_id)
+
+    def test_published_media_is_not_guessed_without_a_creation_time(self):
+        self.serve_lost_publish([{'id': 'media', 'caption': 'caption', 'timestamp': '2026-03-01T10:05:00+0000'}])
+
+        with self.assertLogs('base', 'ERROR'):
+            self.assertIsNone(insta_api.publish_creation('container', 'tok', 'biz', caption='caption'))
+
+    def test_celery_task_defers_instead_of_sleeping(self):
+        self.serve({
+            ('POST', f'/{API}/biz/media'): lambda p: (200, {'id': 'container'}),
+            ('POST', f'/{API}/biz/media_publish'): lambda p: (400, {'error': {'message': 'Media not ready', 'code': 9007}}),
+        })
+
+        with mock.patch.object(insta_api, '_in_celery_task', return_value=True):
+            with self.assertRaises(insta_api.GraphRetryLater) as ctx:
+                insta_api.create_and_publish_post('https://img', 'caption', 'tok', 'biz')
+
+        self.assertEqual(ctx.exception.creation_id, 'container')
+        insta_api.time.sleep.assert_not_called()
+
+
+class MediaContainerTests(unittest.TestCase):
+
+    def serve(self, routes, delay: float = 0.0) -> FakeGraphServer:
+        server = FakeGraphServer(routes, delay=delay)
+        self.enterContext(server)
+        self.enterContext(mock.patch.object(insta_api, 'HOST_URL', server.url))
+        return server
+
+    def test_reel_container_payload(self):
+        server = self.serve({('POST', f'/{API}/biz/media'): lambda p: (200, {'id': 'reel'})})
+
+        creation_id = insta_api.create_media_container(
+            'biz', 'tok', media_type='REELS', video_url='https://v.mp4', cover_url='https://c.jpg', caption='hi',
+        )
+
+        self.assertEqual(creation_id, 'reel')
+        _, _, params = server.requests[0]
+        self.assertEqual(params['media_type'], 'REELS')
+        self.assertEqual(params['video_url'], 'https://v.mp4')
+        self.assertEqual(params['cover_url'], 'https://c.jpg')
+        self.assertEqual(params['caption'], 'hi')
+
+    def test_carousel_items_are_created_in_parallel(self):
+        def create(params):
+            return 200, {'id': params.get('image_url') or params.get('video_url')}
+
+        server = self.serve({('POST', f'/{API}/biz/media'): create}, delay=0.3)
+        items = [{'media_type': 'IMAGE', 'url': f'img{i}'} for i in range(4)] + [{'media_type': 'VIDEO', 'url': 'vid'}]
+
+        started = time.perf_counter()
+        creation_ids = insta_api.create_carousel_item_containers(items, 'tok', 'biz')
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(creation_ids, ['img0', 'img1', 'img2', 'img3', 'vid'])
+        self.assertLess(elapsed, 1.0)
+        video = next(params for _, _, params in server.requests if params.get('video_url'))
+        self.assertEqual(video['media_type'], 'VIDEO')
+        self.assertEqual(video['is_carousel_item'], 'true')
+        self.assertNotIn('caption', video)
+
+    def test_container_statuses_use_one_batch_call(self):
+        def batch(params):
+            return 200, [
+                {'code': 200, 'body': json.dumps({'status_code': 'FINISHED'})},
+                {'code': 400, 'body': json.dumps({'error': {'message': 'bad'}})},
+            ]
+
+        server = self.serve({('POST', '/'): batch})
+
+        statuses = insta_api.fetch_container_statuses(['c1', 'c2'], 'tok')
+
+        self.assertEqual(statuses, {'c1': 'FINISHED', 'c2': None})
+        self.assertEqual(len(server.requests), 1)
+
+
+class PaginationTests(unittest.TestCase):
+
+    def serve_pages(self, path, total, page_size=3) -> FakeGraphServer:
+        server = None
+
+        def page(params):
+            offset = int(params.get('after', 0))
+            size = min(int(params.get('limit', page_size)), page_size)
+            items = [{'id': str(i)} for i in range(offset, min(offset + size, total))]
+            body = {'data': items, 'paging': {'cursors': {'after': str(offset + size)}}}
+            if offset + size < total:
+                body['paging']['next'] = f'{server.url}{path.lstrip("/")}?after={offset + size}&access_token=tok'
+            return 200, body
+
+        server = FakeGraphServer({('GET', path): page})
+        self.enterContext(server)
+        self.enterContext(mock.patch.object(insta_api, 'HOST_URL', server.url))
+        return server
+
+    def test_fetch_all_posts_follows_every_page(self):
+        server = self.serve_pages(f'/{API}/biz/media', total=10)
+
+        posts = insta_api.fetch_all_posts('biz', 'tok')
+
+        self.assertEqual([p['id'] for p in posts], [str(i) for i in range(10)])
+        self.assertEqual(len(server.requests), 4)
+
+    def test_max_items_budget_stops_fetching(self):
+        server = self.serve_pages(f'/{API}/42/comments', total=100)
+
+        comments = list(insta_api.iter_comments('42', 'tok', max_items=5))
+
+        self.assertEqual(len(comments), 5)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_conversation_messages_respect_backfill_cap(self):
+        server = self.serve_pages(f'/{API}/t_1/messages', total=20)
+
+        messages = list(insta_api.iter_conversation_messages('t_1', 'tok', max_items=7))
+
+        self.assertEqual([m['id'] for m in messages], [str(i) for i in range(7)])
+        self.assertEqual(server.requests[0][2]['fields'], insta_api.MESSAGE_FIELDS)
+
+    def test_next_page_is_prefetched_while_consuming(self):
+        server = self.serve_pages(f'/{API}/biz/conversations', total=9)
+
+        pages = insta_api.iter_conversation_pages('biz', 'tok', limit=3)
+        first = next(pages)
+        for _ in range(50):
+            if len(server.requests) == 2:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(server.requests), 2)
+        pages.close()
+
+    def test_failed_page_raises(self):
+        server = FakeGraphServer({})
+        self.enterContext(server)
+        self.enterContext(mock.patch.object(insta_api, 'HOST_URL', server.url))
+
+        with self.assertRaises(insta_api.GraphAPIError):
+            list(insta_api.iter_conversations('biz', 'tok'))
+        self.assertIsNone(insta_api.fetch_comments('42', 'tok'))
+
+
+class DailyInsightTests(unittest.TestCase):
+
+    def test_windows_cover_range_without_gaps(self):
+        windows = insta_api.insight_windows(date(2024, 1, 1), date(2024, 3, 5))
+
+        self.assertEqual(windows[0], (date(2024, 1, 1), date(2024, 1, 30)))
+        self.assertEqual(windows[-1][1], date(2024, 3, 5))
+        for (_, previous_end), (start, _) in zip(windows, windows[1:]):
+            self.assertEqual(start - previous_end, timedelta(days=1))
+        self.assertTrue(all((end - start).days < insta_api.INSIGHT_WINDOW_DAYS for start, end in windows))
+
+    def test_points_are_dated_by_the_day_they_cover(self):
+        data = [{'name': 'reach', 'values': [
+            {'value': 3, 'end_time': '2024-01-01T08:00:00+0000'},
+            {'value': 5, 'end_time': '2024-01-02T08:00:00+0000'},
+            {'value': 8, 'end_time': '2024-01-03T08:00:00+0000'},
+        ]}]
+
+        points = insta_api.parse_daily_insight_points(data, date(2024, 1, 1), date(2024, 1, 2))
+
+        self.assertEqual(points, [('reach', date(2024, 1, 1), 5), ('reach', date(2024, 1, 2), 8)])
+
+    def test_window_request_ends_after_last_day(self):
+        server = FakeGraphServer({('GET', f'/{API}/biz/insights'): lambda p: (200, {'data': []})})
+        self.enterContext(server)
+        self.enterContext(mock.patch.object(insta_api, 'HOST_URL', server.url))
+
+        insta_api.fetch_daily_insights_window('biz', 'tok', ['reach', 'follower_count'], date(2024, 1, 1), date(2024, 1, 30))
+
+        _, _, params = server.requests[0]
+        self.assertEqual(params['since'], '2024-01-01')
+        self.assertEqual(params['until'], '2024-01-31')
+        self.assertEqual(params['metric'], 'reach,follower_count')
+        self.assertEqual(params['period'], 'day')
+
+
+class UsageHeaderTests(unittest.TestCase):
+
+    def test_parses_app_and_business_usage(self):
+        headers = {
+            'X-App-Usage': json.dumps({'call_count': 12, 'total_time': 40, 'total_cputime': 3}),
+            'X-Business-Use-Case-Usage': json.dumps({
+                '1784': [{'type': 'instagram', 'call_count': 81, 'total_time': 5, 'total_cputime': 2,
+                          'estimated_time_to_regain_access': 3}],
+            }),
+        }
+
+        self.assertEqual(parse_usage_headers(headers), (40.0, 81.0, 180.0))
+
+    def test_missing_or_malformed_headers(self):
+        self.assertEqual(parse_usage_headers({}), (0.0, 0.0, 0.0))
+        self.assertEqual(parse_usage_headers({'X-App-Usage': 'not json'}), (0.0, 0.0, 0.0))
+
+    def test_throttle_error_codes(self):
+        self.assertTrue(is_throttled_response(429, None))
+        self.assertTrue(is_throttled_response(400, {'error': {'code': 4}}))
+        self.assertFalse(is_throttled_response(400, {'error': {'code': 100}}))
+        self.assertFalse(is_throttled_response(200, {'error': {'code': 4}}))
+
+
+if __name__ == '__main__':
+    unittest.main()
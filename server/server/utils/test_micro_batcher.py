@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from server.utils.micro_batcher import MicroBatcher
+
+
+class MicroBatcherTests(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = []
+
+    def double(self, items):
+        self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+    def test_concurrent_items_share_a_batch(self):
+        batcher = MicroBatcher(self.double, max_batch_size=64, max_wait=0.2)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(batcher.run, range(16)))
+
+        self.assertEqual(results, [i * 2 for i in range(16)])
+        self.assertLess(len(self.batches), 16)
+        self.assertEqual(sorted(i for batch in self.batches for i in batch), list(range(16)))
+
+    def test_batch_is_cut_at_max_batch_size(self):
+        release = threading.Event()
+
+        def blocked(items):
+            release.wait(1)
+            return self.double(items)
+
+        batcher = MicroBatcher(blocked, max_batch_size=4, max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(10)]
+        release.set()
+
+        self.assertEqual([f.result(1) for f in futures], [i * 2 for i in range(10)])
+        self.assertTrue(all(len(batch) <= 4 for batch in self.batches))
+
+    def test_lone_item_waits_at_most_max_wait(self):
+        batcher = MicroBatcher(self.double, max_wait=0.01)
+
+        started = time.monotonic()
+        self.assertEqual(batcher.run(21, timeout=1), 42)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_errors_reach_every_caller_of_the_batch(self):
+        def broken(items):
+            raise RuntimeError('model crashed')
+
+        batcher = MicroBatcher(broken, max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(3)]
+
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(1)
+
+        # The worker keeps serving after a failed batch.
+        batcher._run_batch = self.double
+        self.assertEqual(batcher.run(1, timeout=1), 2)
+
+    def test_wrong_number_of_results_is_an_error(self):
+        batcher = MicroBatcher(lambda items: items[:1], max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(2)]
+
+        for future in futures:
+            with self.assertRaises(ValueError):
+                future.result(1)
+
+    def test_cancelled_items_are_skipped(self):
+        release = threading.Event()
+
+        def blocked(items):
+            release.wait(1)
+            return self.double(items)
+
+        batcher = MicroBatcher(blocked, max_batch_size=1, max_wait=0)
+        first = batcher.submit(1)
+        time.sleep(0.05)
+        cancelled = batcher.submit(2)
+        cancelled.cancel()
+        last = batcher.submit(3)
+        release.set()
+
+        self.assertEqual((first.result(1), last.result(1)), (2, 6))
+        self.assertNotIn([2], self.batches)
+
+
+if __name__ == '__main__':
+    unittest.main()
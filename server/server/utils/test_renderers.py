@@ -0,0 +1,65 @@
+import datetime
+import decimal
+import unittest
+import uuid
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure()
+
+from django.utils.functional import lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from server.utils.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(unittest.TestCase):
+
+    def assertSameOutput(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_matches_drf_for_dashboard_payloads(self):
+        self.assertSameOutput({
+            'posts': ReturnList([
+                ReturnDict({'id': '17841405793187218', 'caption': 'Amazing sunset vibes! 🌅', 'like_count': 120, 'thumbnail_url': None}, serializer=None),
+            ], serializer=None),
+            'count': 1,
+            'next_offset': None,
+            'confidence': 0.9137,
+            'flags': [True, False],
+        })
+
+    def test_matches_drf_for_values_it_encodes_itself(self):
+        self.assertSameOutput({
+            'aware': datetime.datetime(2026, 3, 22, 18, 30, 0, 123456, tzinfo=datetime.timezone.utc),
+            'naive': datetime.datetime(2026, 3, 22, 18, 30),
+            'date': datetime.date(2026, 3, 22),
+            'time': datetime.time(18, 30),
+            'delta': datetime.timedelta(seconds=90),
+            'decimal': decimal.Decimal('1.50'),
+            'uuid': uuid.UUID('5b1c1c0e-8c4f-4a53-9f7e-1f0a6f3b2d11'),
+            'lazy': lazy(lambda: 'translated', str)(),
+            'set': {1},
+            1: 'integer key',
+        })
+
+    def test_line_separators_are_escaped(self):
+        self.assertSameOutput({'text': 'one\u2028two\u2029three'})
+
+    def test_wide_integers_fall_back_to_the_stdlib(self):
+        self.assertSameOutput({'big': 2 ** 70})
+
+    def test_indent_falls_back_to_the_stdlib(self):
+        self.assertSameOutput({'a': [1, 2]}, 'application/json; indent=2')
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
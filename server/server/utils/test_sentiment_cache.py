@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from server.utils.sentiment_cache import SentimentCache, files_version
+from server.utils.test_graph_cache import BrokenCache
+
+
+class BrokenManyCache(BrokenCache):
+    get_many = set_many = BrokenCache.get
+
+
+class SentimentCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.shared = LocMemCache('sentiment-cache-tests', {})
+        self.shared.clear()
+        self.cache = SentimentCache(shared=self.shared)
+
+    def test_stored_probabilities_are_found_again(self):
+        self.cache.set_many('v1', {'nice': [0.1, 0.8, 0.1]})
+
+        self.assertEqual(self.cache.get_many('v1', ['nice', 'price']), {'nice': [0.1, 0.8, 0.1]})
+        self.assertEqual(self.cache.stats(), {'local_hits': 1, 'shared_hits': 0, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_shared_tier_is_used_by_other_processes(self):
+        self.cache.set_many('v1', {'nice': [0.1, 0.8, 0.1]})
+        other_process = SentimentCache(shared=self.shared)
+
+        self.assertEqual(other_process.get_many('v1', ['nice', 'nice']), {'nice': [0.1, 0.8, 0.1]})
+        self.assertEqual(other_process.get_many('v1', ['nice']), {'nice': [0.1, 0.8, 0.1]})
+        self.assertEqual(other_process.stats()['shared_hits'], 1)
+        self.assertEqual(other_process.stats()['local_hits'], 1)
+
+    def test_entries_of_another_model_version_are_not_used(self):
+        self.cache.set_many('v1', {'nice': [0.1, 0.8, 0.1]})
+
+        self.assertEqual(self.cache.get_many('v2', ['nice']), {})
+
+    def test_unreachable_shared_tier_falls_back_to_local(self):
+        cache = SentimentCache(shared=BrokenManyCache())
+
+        with self.assertLogs('base', 'WARNING'):
+            cache.set_many('v1', {'nice': [0.1, 0.8, 0.1]})
+        self.assertEqual(cache.get_many('v1', ['nice', 'price']), {'nice': [0.1, 0.8, 0.1]})
+
+    def test_counters_are_logged_periodically(self):
+        cache = SentimentCache(shared=self.shared, log_every=3)
+        cache.get_many('v1', ['a', 'b'])
+
+        with self.assertLogs('base', 'INFO') as logs:
+            cache.get_many('v1', ['c'])
+
+        self.assertIn('0 local hits, 0 shared hits, 3 misses', logs.output[0])
+
+
+class FilesVersionTests(unittest.TestCase):
+
+    def test_changes_with_file_contents(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model, tokenizer = os.path.join(tmp, 'model'), os.path.join(tmp, 'tokenizer')
+            for path in (model, tokenizer):
+                with open(path, 'wb') as f:
+                    f.write(b'weights')
+            before = files_version(model, tokenizer)
+
+            with open(tokenizer, 'wb') as f:
+                f.write(b'new vocabulary')
+
+            self.assertNotEqual(files_version(model, tokenizer), before)
+            self.assertEqual(files_version(model, tokenizer), files_version(model, tokenizer))
+
+
+if __name__ == '__main__':
+    unittest.main()
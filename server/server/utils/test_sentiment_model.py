@@ -0,0 +1,209 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+from django.core.cache.backends.locmem import LocMemCache
+
+from server.utils import nepali_translate, sentiment_model
+from server.utils.sentiment_model import MAX_LEN, clean_text, clean_texts, predict_batch, predict_sentiment
+from server.utils.sentiment_cache import SentimentCache
+from server.utils.sentiment_runtime import pad_sequences
+from server.utils.test_sentiment_runtime import random_lite_model, short_sequences
+
+
+TEXTS = [
+    "I absolutely love this product! Best purchase ever!",
+    "This is terrible, worst experience ever!",
+    "ma aaja dherai khusi xu 😄🔥 @shashank #happy https://example.com",
+    "आज मेरो दिन राम्रो भयो 🎉✅ #success @team",
+    "Bro yo ta lastai ramro xa 😂 visit www.test.com @user_99",
+    "kina yesto bhayo 😡🔥 @someone #angry",
+    "Check this out http://example.com very cool!",
+    "",
+]
+
+
+class FakeNLLBTokenizer:
+    """Stands in for the NLLB tokenizer: 'token ids' are the texts themselves."""
+    src_lang = None
+
+    def __call__(self, text, **kwargs):
+        return {'input_ids': text if isinstance(text, list) else [text]}
+
+    def convert_tokens_to_ids(self, token):
+        return 1
+
+    def batch_decode(self, output, skip_special_tokens=True):
+        return [f'translated {len(text)}' for text in output]
+
+
+class FakeNLLBModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def generate(self, input_ids, forced_bos_token_id):
+        self.batch_sizes.append(len(input_ids))
+        return input_ids
+
+
+class FakeTokenizer:
+    def texts_to_sequences(self, texts):
+        return [[(sum(map(ord, word)) % 19999) + 1 for word in text.split()] for text in texts]
+
+
+class FakeModel:
+    """Row-wise deterministic 'model': each row's scores depend only on that row."""
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = []
+
+    def predict(self, X, verbose=0):
+        self.calls += 1
+        self.rows.append(len(X))
+        X = np.asarray(X, dtype='float32')
+        logits = np.stack([np.sin(X.sum(axis=1)), np.cos(X.sum(axis=1)), np.sin(X[:, 0] + 1)], axis=1)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+class CleanTextsTests(unittest.TestCase):
+
+    def test_matches_clean_text(self):
+        texts = TEXTS + ["line\none\r\ntwo\tthree", "HTTP://X.COM Yes", "#\nhash", "http\nnext", "a b\x85c", 42]
+
+        self.assertEqual(clean_texts(texts), [clean_text(t) for t in texts])
+
+    def test_empty(self):
+        self.assertEqual(clean_texts([]), [])
+
+
+class PredictBatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.patch_model()
+
+    def patch_model(self):
+        self.nllb = FakeNLLBModel()
+        self.model = FakeModel()
+        tokenizer = FakeTokenizer()
+        patches = [
+            mock.patch.object(nepali_translate, 'tokenizer', FakeNLLBTokenizer()),
+            mock.patch.object(nepali_translate, 'model', self.nllb),
+            mock.patch.object(sentiment_model, '_model', self.model),
+            mock.patch.object(sentiment_model, '_tokenizer', tokenizer),
+            mock.patch.object(sentiment_model, 'load_model_and_tokenizer', return_value=(self.model, tokenizer)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_bulk_scores_match_single_scores(self):
+        single = [predict_sentiment(text) for text in TEXTS]
+
+        self.assertEqual(predict_batch(TEXTS), single)
+
+    def test_translation_runs_in_grouped_calls_for_nepali_texts_only(self):
+        predict_batch(TEXTS)
+        once = list(self.nllb.batch_sizes)
+        self.nllb.batch_sizes.clear()
+
+        predict_batch(TEXTS * 3)
+
+        # Every distinct Devanagari segment once, all in a single generate() call.
+        self.assertEqual(len(once), 1)
+        self.assertEqual(self.nllb.batch_sizes, once)
+
+    def test_english_texts_never_reach_nllb(self):
+        predict_batch(["This is great", "I love this product!"])
+
+        self.assertEqual(self.nllb.batch_sizes, [])
+
+    def test_untranslatable_batch_falls_back_to_one_text_at_a_time(self):
+        with mock.patch.object(sentiment_model, 'compile_raw_to_english_batch', side_effect=RuntimeError('oom')):
+            self.assertEqual(predict_batch(TEXTS), [predict_sentiment(text) for text in TEXTS])
+
+
+class CachedPredictionTests(PredictBatchTests):
+
+    def setUp(self):
+        self.patch_model()
+        shared = LocMemCache('sentiment-model-tests', {})
+        shared.clear()
+        self.cache = SentimentCache(shared=shared)
+        for patch in (mock.patch.object(sentiment_model, 'sentiment_cache', self.cache),
+                      mock.patch.object(sentiment_model, '_model_version', 'v1')):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_texts_with_the_same_model_input_are_scored_once(self):
+        results = predict_batch(["great", "Great!!", "@bob great 🔥", "I love this product"])
+
+        self.assertEqual(self.model.rows, [2])
+        self.assertEqual([r['sentiment_scores'] for r in results[:3]], [results[0]['sentiment_scores']] * 3)
+        self.assertEqual(results[2]['cleaned_text'], 'great')
+
+    def test_cached_scores_are_reused_by_both_paths(self):
+        first = predict_batch(TEXTS)
+        calls, misses = self.model.calls, self.cache.stats()['misses']
+
+        self.assertEqual(predict_batch(TEXTS), first)
+        self.assertEqual([predict_sentiment(text) for text in TEXTS], first)
+        self.assertEqual((self.model.calls, self.cache.stats()['misses']), (calls, misses))
+
+    def test_scores_match_uncached_scores(self):
+        cached = predict_batch(TEXTS)
+
+        with mock.patch.object(sentiment_model, '_model_version', None):
+            self.assertEqual(predict_batch(TEXTS), cached)
+
+    def test_new_model_version_is_scored_again(self):
+        predict_batch(["nice"])
+
+        with mock.patch.object(sentiment_model, '_model_version', 'v2'):
+            predict_batch(["nice"])
+
+        self.assertEqual(self.model.rows, [1, 1])
+
+
+def spell(seq):
+    """Token ids as a text that survives clean_text: digits 0-9 become letters a-j."""
+    return ' '.join(''.join(chr(ord('a') + int(d)) for d in str(i)) for i in seq)
+
+
+class SpelledTokenizer:
+    """Reads the token ids back out of a `spell`ed text."""
+
+    def texts_to_sequences(self, texts):
+        return [[int(''.join(str(ord(c) - ord('a')) for c in word)) for word in text.split()] for text in texts]
+
+
+class BucketedPredictBatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.model = random_lite_model(vocab_size=60, max_len=MAX_LEN)
+        self.seqs = short_sequences(100, max_len=MAX_LEN + 10)
+        patch = mock.patch.object(sentiment_model, 'translate_texts', side_effect=lambda texts: texts)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.results = predict_batch([spell(seq) for seq in self.seqs], self.model, SpelledTokenizer())
+
+    def test_scores_match_full_padding_in_the_original_order(self):
+        probs = self.model.predict(pad_sequences(self.seqs, maxlen=MAX_LEN))
+
+        self.assertEqual(
+            [result['sentiment_scores']['Negative'] for result in self.results],
+            [round(float(p), 4) for p in probs[:, 0]],
+        )
+        self.assertEqual([result['confidence'] for result in self.results], [round(float(p), 4) for p in probs.max(axis=1)])
+
+    def test_each_bucket_is_padded_to_its_own_longest_text(self):
+        with mock.patch.object(self.model, 'predict', wraps=self.model.predict) as predict:
+            texts = [spell([1, 2]), spell([3]), spell(range(4, 14))]
+            predict_batch(texts, self.model, SpelledTokenizer())
+
+        self.assertEqual([call.args[0].shape for call in predict.call_args_list], [(2, 2), (1, 10)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from server.utils.sentiment_runtime import LiteModel, export_model, load_lite_model, pad_sequences
+
+
+HAS_TENSORFLOW = importlib.util.find_spec('tensorflow') is not None
+
+TEXTS = [
+    "i absolutely love this product best purchase ever",
+    "This is terrible, worst experience ever!",
+    "it's okay... nothing special; not bad\tnot great",
+    "unseen words only xyzzy plugh",
+    "",
+]
+
+
+def build_model(vocab_size=60, max_len=12, recurrent='bidirectional'):
+    """Small, randomly initialised version of the notebooks' Embedding + BiLSTM classifier."""
+    from tensorflow.keras.layers import (
+        LSTM, Bidirectional, Dense, Dropout, Embedding, GlobalMaxPool1D, Input, SpatialDropout1D,
+    )
+    from tensorflow.keras.models import Sequential
+
+    if recurrent == 'bidirectional':
+        recurrent_layers = [Bidirectional(LSTM(8, return_sequences=True)), GlobalMaxPool1D()]
+    else:
+        recurrent_layers = [LSTM(8)]
+    model = Sequential([
+        Input(shape=(max_len,)),
+        Embedding(vocab_size, 6),
+        SpatialDropout1D(0.3),
+        *recurrent_layers,
+        Dense(5, activation='relu'),
+        Dropout(0.3),
+        Dense(3, activation='softmax'),
+    ])
+    # Non-zero biases so the bias path is exercised too.
+    for layer in model.layers:
+        weights = layer.get_weights()
+        if weights:
+            layer.set_weights([np.random.default_rng(7).normal(0, 0.5, w.shape).astype('float32') for w in weights])
+    return model
+
+
+def random_lite_model(recurrent='bidirectional', vocab_size=60, max_len=12, seed=0):
+    """The same classifiers as build_model, as LiteModels with random weights (no TensorFlow needed)."""
+    rng = np.random.default_rng(seed)
+    weights = {}
+
+    def w(name, *shape):
+        weights[name] = rng.normal(0, 0.5, shape).astype('float32')
+        return name
+
+    def lstm(prefix, return_sequences=True):
+        config = {'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': return_sequences}
+        return config, [w(f'{prefix}_kernel', 6, 32), w(f'{prefix}_recurrent', 8, 32), w(f'{prefix}_bias', 32)]
+
+    layers = [{'type': 'Embedding', 'config': {}, 'weights': [w('embeddings', vocab_size, 6)]}]
+    if recurrent == 'bidirectional':
+        (forward, forward_w), (backward, backward_w) = lstm('forward'), lstm('backward')
+        layers += [
+            {'type': 'Bidirectional', 'config': {'merge_mode': 'concat', 'forward': forward, 'backward': backward},
+             'weights': forward_w + backward_w},
+            {'type': 'GlobalMaxPooling1D', 'config': {}, 'weights': []},
+        ]
+        features = 16
+    elif recurrent == 'lstm':
+        config, names = lstm('lstm', return_sequences=False)
+        layers.append({'type': 'LSTM', 'config': config, 'weights': names})
+        features = 8
+    else:
+        layers.append({'type': 'Flatten', 'config': {}, 'weights': []})
+        features = 6 * max_len
+    layers += [
+        {'type': 'Dense', 'config': {'activation': 'relu'}, 'weights': [w('hidden', features, 5), w('hidden_bias', 5)]},
+        {'type': 'Dense', 'config': {'activation': 'softmax'}, 'weights': [w('out', 5, 3), w('out_bias', 3)]},
+    ]
+    return LiteModel(layers, weights)
+
+
+def short_sequences(n, vocab_size=60, max_len=12, seed=0):
+    """Token sequences of mixed lengths (empty ones included), like comments."""
+    rng = np.random.default_rng(seed)
+    return [list(rng.integers(1, vocab_size, size=rng.integers(0, max_len + 1))) for _ in range(n)]
+
+
+def build_tokenizer(num_words=20):
+    from tensorflow.keras.preprocessing.text import Tokenizer
+
+    tokenizer = Tokenizer(num_words=num_words, oov_token='<OOV>')
+    tokenizer.fit_on_texts(TEXTS * 2 + ["love love great great good bad", "worst ever ever ever"])
+    return tokenizer
+
+
+class PadSequencesTests(unittest.TestCase):
+
+    def test_pads_and_truncates_at_the_end(self):
+        padded = pad_sequences([[1, 2, 3, 4], [5], []], maxlen=3)
+
+        self.assertEqual(padded.dtype, np.int32)
+        self.assertEqual(padded.tolist(), [[1, 2, 3], [5, 0, 0], [0, 0, 0]])
+
+
+class ShortPaddingTests(unittest.TestCase):
+    """predict(X, steps=n) on X padded to its longest row equals predict on X padded to n."""
+
+    def assertSameScores(self, model, seqs):
+        longest = max(len(seq) for seq in seqs)
+        np.testing.assert_allclose(
+            model.predict(pad_sequences(seqs, maxlen=longest), steps=12),
+            model.predict(pad_sequences(seqs, maxlen=12)),
+            rtol=1e-5, atol=1e-7,
+        )
+
+    def test_bidirectional_lstm(self):
+        self.assertSameScores(random_lite_model(), short_sequences(40))
+
+    def test_last_state_lstm(self):
+        self.assertSameScores(random_lite_model('lstm'), short_sequences(40))
+
+    def test_layers_that_need_every_position(self):
+        self.assertSameScores(random_lite_model('flatten'), short_sequences(40))
+
+    def test_rows_that_are_all_padding(self):
+        model = random_lite_model()
+        probs = model.predict(np.zeros((3, 0), dtype=np.int32), steps=12)
+
+        np.testing.assert_allclose(probs, model.predict(np.zeros((3, 12), dtype=np.int32)), rtol=1e-5, atol=1e-7)
+
+
+@unittest.skipUnless(HAS_TENSORFLOW, 'parity with Keras needs TensorFlow')
+class KerasParityTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'sentiment_model.npz')
+
+    def export(self, model, tokenizer):
+        export_model(model, tokenizer, self.path)
+        return load_lite_model(self.path)
+
+    def test_tokenizer_matches_keras(self):
+        tokenizer = build_tokenizer()
+        _, lite_tokenizer = self.export(build_model(), tokenizer)
+
+        texts = TEXTS + ["LOVE it!!! (great)", "never seen before", "ever ever\nworst"]
+        self.assertEqual(lite_tokenizer.texts_to_sequences(texts), tokenizer.texts_to_sequences(texts))
+
+    def test_bidirectional_predictions_match_keras(self):
+        model, tokenizer = build_model(), build_tokenizer()
+        lite_model, _ = self.export(model, tokenizer)
+        X = np.random.default_rng(0).integers(0, 60, size=(64, 12))
+        X[:16, 5:] = 0  # padded rows, like short comments
+        X[16] = 0
+
+        np.testing.assert_allclose(lite_model.predict(X), model.predict(X, verbose=0), rtol=1e-4, atol=1e-6)
+
+    def test_short_padding_matches_keras_full_padding(self):
+        model = build_model()
+        lite_model, _ = self.export(model, build_tokenizer())
+        seqs = short_sequences(48, max_len=6)
+
+        np.testing.assert_allclose(
+            lite_model.predict(pad_sequences(seqs, maxlen=6), steps=12),
+            model.predict(pad_sequences(seqs, maxlen=12), verbose=0),
+            rtol=1e-4, atol=1e-6,
+        )
+
+    def test_last_state_lstm_predictions_match_keras(self):
+        model = build_model(recurrent='lstm')
+        lite_model, _ = self.export(model, build_tokenizer())
+        X = np.random.default_rng(1).integers(0, 60, size=(32, 12))
+
+        np.testing.assert_allclose(lite_model.predict(X), model.predict(X, verbose=0), rtol=1e-4, atol=1e-6)
+
+    def test_unsupported_layers_are_refused(self):
+        from tensorflow.keras.layers import Conv1D, Dense, Embedding, GlobalMaxPool1D, Input
+        from tensorflow.keras.models import Sequential
+
+        model = Sequential([Input(shape=(12,)), Embedding(60, 6), Conv1D(4, 3), GlobalMaxPool1D(), Dense(3)])
+
+        with self.assertRaises(ValueError):
+            export_model(model, build_tokenizer(), self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_loading_an_export_does_not_import_tensorflow(self):
+        export_model(build_model(), build_tokenizer(), self.path)
+        script = (
+            'import sys\n'
+            'from server.utils.sentiment_runtime import load_lite_model, pad_sequences\n'
+            f'model, tokenizer = load_lite_model({self.path!r})\n'
+            'model.predict(pad_sequences(tokenizer.texts_to_sequences(["love it"]), maxlen=12))\n'
+            'sys.exit("tensorflow" in sys.modules or "keras" in sys.modules)\n'
+        )
+        server_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        result = subprocess.run([sys.executable, '-c', script], cwd=server_dir, capture_output=True, text=True)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+
+from account.models import CustomUser, IGAccessToken, IGBusinessAccount
+from dashboard.models import Conversation, Message
+from webhook import webhook_handlers
+
+
+def message_payload(mid='mid.1', sender='user-1', recipient='biz', text='hi there', is_echo=False):
+    message = {'mid': mid, 'text': text}
+    if is_echo:
+        message['is_echo'] = True
+    return {'entry': [{'id': 'biz', 'messaging': [{
+        'sender': {'id': sender},
+        'recipient': {'id': recipient},
+        'timestamp': 1760000000000,
+        'message': message,
+    }]}]}
+
+
+class MessageWebhookTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        custom_user = CustomUser.objects.create(user=User.objects.create_user('owner'))
+        token = IGAccessToken.objects.create(custom_user=custom_user, access_token='tok', expires_at=timezone.now())
+        cls.business_account = IGBusinessAccount.objects.create(
+            custom_user=custom_user, business_account_id='biz', username='shop', access_token=token, name='Shop',
+        )
+
+    def handle(self, payload, accounts):
+        with mock.patch.object(webhook_handlers, 'fetch_others_accounts', side_effect=accounts):
+            return webhook_handlers.handle_message_webhook(payload)
+
+    def test_message_is_stored_when_username_lookup_fails(self):
+        self.handle(message_payload(), lambda token, user_id: None)
+
+        message = Message.objects.get(message_id='mid.1')
+        self.assertEqual(message.text, 'hi there')
+        self.assertIsNone(message.from_username)
+        self.assertFalse(message.is_outgoing)
+
+    def test_username_is_backfilled_when_lookup_succeeds(self):
+        self.handle(message_payload(mid='mid.1'), lambda token, user_id: None)
+
+        self.handle(message_payload(mid='mid.2'), lambda token, user_id: {'id': user_id, 'username': f'name-{user_id}'})
+
+        conversation = Conversation.objects.get(business_account=self.business_account, participant_id='user-1')
+        self.assertEqual(conversation.participant_username, 'name-user-1')
+        self.assertEqual(
+            set(conversation.messages.values_list('from_username', flat=True)), {'name-user-1'},
+        )
+
+    def test_lookup_exception_does_not_lose_message(self):
+        def accounts(token, user_id):
+            raise ConnectionError('Graph unreachable')
+
+        self.assertFalse(self.handle(message_payload(), accounts))
+        self.assertTrue(Message.objects.filter(message_id='mid.1').exists())
+
+    def test_echo_is_stored_as_outgoing_without_lookup(self):
+        with mock.patch.object(webhook_handlers, 'fetch_others_accounts') as fetch:
+            webhook_handlers.handle_message_webhook(message_payload(sender='biz', recipient='user-1', is_echo=True))
+
+        fetch.assert_not_called()
+        message = Message.objects.get(message_id='mid.1')
+        self.assertTrue(message.is_outgoing)
+        self.assertEqual(message.conversation.participant_id, 'user-1')
+
+    def test_redelivered_webhook_is_stored_once(self):
+        for _ in range(2):
+            self.handle(message_payload(), lambda token, user_id: None)
+
+        self.assertEqual(Message.objects.filter(message_id='mid.1').count(), 1)
+
+    def test_account_connected_by_two_users_gets_the_message_in_both_inboxes(self):
+        other_user = CustomUser.objects.create(user=User.objects.create_user('colleague'))
+        token = IGAccessToken.objects.create(custom_user=other_user, access_token='tok-2', expires_at=timezone.now())
+        other_account = IGBusinessAccount.objects.create(
+            custom_user=other_user, business_account_id='biz', username='shop', access_token=token, name='Shop',
+        )
+
+        self.handle(message_payload(), lambda token, user_id: None)
 
-# Create your tests here.
+        for business_account in (self.business_account, other_account):
+            self.assertTrue(
+                Message.objects.filter(conversation__business_account=business_account, message_id='mid.1').exists()
+            )
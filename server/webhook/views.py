@@ -7,7 +7,8 @@ from django.views.decorators.csrf import csrf_exempt
 
 from server.utils.logger import logger
 from .webhook_handlers import (
-    handle_message_webhook
+    handle_comment_webhook,
+    handle_message_webhook,
 )
 
 @csrf_exempt
@@ -28,12 +29,17 @@ def receive_webhook(request):
 
         if 'messaging' in webhook_entry:
             webhook_type = 'messages'
+        elif 'changes' in webhook_entry:
+            webhook_type = (webhook_entry['changes'] or [{}])[0].get('field')
 
         logger.info(f"Received webhook of type: {webhook_type} with payload: {payload}")
         print(f"\nReceived webhook of type: {webhook_type} with payload: {payload}")
         match webhook_type:
             case 'messages':
                 handle_message_webhook.delay(payload)
+
+            case 'comments':
+                handle_comment_webhook.delay(payload)
                 
             case _:
                 logger.warning(f"Received unsupported webhook type: {webhook_type}")
@@ -4,13 +4,44 @@ from django.conf import settings
 from server.utils.logger import logger
 
 from server.utils.instagram_api import fetch_others_accounts, reply_to_message
+from server.utils.rate_limiter import GraphRateLimitExceeded
 from account.models import IGBusinessAccount
+from dashboard.tasks import record_participant_username, record_webhook_comments, record_webhook_messages
 from server.utils.rag_pipeline import rag_pipeline
 
 COMMON_API_TOKEN = settings.COMMON_IG_ACCESS_TOKEN
 
-@shared_task
-def handle_message_webhook(payload):
+
+def store_webhook_messages(payload, usernames=None):
+    """Add the webhook's messages to the local inbox without failing the auto-reply."""
+    try:
+        record_webhook_messages(payload, usernames)
+    except Exception as e:
+        logger.error(f"Error storing webhook messages: {str(e)}")
+
+
+def fetch_sender_username(business_account_id, sender):
+    """
+    Look up the sender's username and add it to their already stored messages.
+    Returns '' if Graph cannot tell us; a rate limit propagates so the task is
+    deferred (storing the message again on retry is a no-op).
+    """
+    try:
+        sender_username = (fetch_others_accounts(COMMON_API_TOKEN, sender) or {}).get('username', '')
+    except GraphRateLimitExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching username of {sender}: {str(e)}")
+        return ''
+
+    try:
+        record_participant_username(business_account_id, sender, sender_username)
+    except Exception as e:
+        logger.error(f"Error storing username of {sender}: {str(e)}")
+    return sender_username
+
+@shared_task(bind=True, max_retries=5)
+def handle_message_webhook(self, payload):
     try:
         sender = payload['entry'][0]['messaging'][0]['sender']['id']
         recepient = payload['entry'][0]['messaging'][0]['recipient']['id']
@@ -21,9 +52,12 @@ def handle_message_webhook(payload):
         print("\n\n\n")
         print(sender, recepient, message, timestamp, is_echo)
 
+        # Store first, so the DM is kept even if the Graph lookups below fail.
+        store_webhook_messages(payload)
+
         if not is_echo:
-            sender_username = fetch_others_accounts(COMMON_API_TOKEN, sender).get('username', '')
-            recepient_data = fetch_others_accounts(COMMON_API_TOKEN, recepient)
+            sender_username = fetch_sender_username(payload['entry'][0].get('id'), sender)
+            recepient_data = fetch_others_accounts(COMMON_API_TOKEN, recepient) or {}
             
             print(f"\nFetched sender username: {sender_username} for sender ID: {sender}")
             print(f"\nFetched recepient data: {recepient_data}")
@@ -62,6 +96,23 @@ def handle_message_webhook(payload):
                 logger.info(f"Successfully replied to message from {sender_username} to {recepient_username} for message: {message}")
             return True
     
+    except GraphRateLimitExceeded as e:
+        # Defer instead of blocking the worker; the limiter tells us when to come back.
+        logger.warning(f"Deferring message webhook, Graph rate limit reached: {str(e)}")
+        raise self.retry(exc=e, countdown=e.retry_after)
+
     except Exception as e:
         logger.error(f"Error handling message webhook: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+
+@shared_task
+def handle_comment_webhook(payload):
+    """Cache the webhook's new comments with their sentiment."""
+    try:
+        stored = record_webhook_comments(payload)
+        logger.info(f"Stored {stored} comments from webhook")
+        return stored
+    except Exception as e:
+        logger.error(f"Error handling comment webhook: {str(e)}")
+        return 0